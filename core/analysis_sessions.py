@@ -0,0 +1,186 @@
+"""Upload-once analysis sessions for the slice page.
+
+The slice page used to re-upload the whole audio file for every transient
+detection request.  A session stores the upload once under
+``ANALYSIS_SESSION_DIR`` and keeps its content hash and onset envelopes in
+memory, so later sensitivity changes and the final kit build only send the
+session id.  Sessions idle for longer than ``ANALYSIS_SESSION_TIMEOUT``
+seconds are removed together with their files, and the least recently
+used sessions are removed once there are more than ``ANALYSIS_SESSION_MAX``
+or they hold more than ``ANALYSIS_SESSION_MAX_BYTES``.
+"""
+
+import logging
+import os
+import shutil
+import time
+import uuid
+from threading import Lock
+from typing import Optional
+
+import soundfile as sf
+
+from core.config import (
+    ANALYSIS_SESSION_DIR,
+    ANALYSIS_SESSION_MAX,
+    ANALYSIS_SESSION_MAX_BYTES,
+    ANALYSIS_SESSION_TIMEOUT,
+)
+from core import onset_cache
+from core.slice_handler import ONSET_ENGINES, ONSET_HOPS, get_onset_envelope, regions_from_envelope
+
+logger = logging.getLogger(__name__)
+
+_sessions: dict[str, dict] = {}
+_lock = Lock()
+
+
+def _remove_dir(session_id: str) -> None:
+    shutil.rmtree(os.path.join(ANALYSIS_SESSION_DIR, session_id), ignore_errors=True)
+
+
+def _evict_over_limits(keep: str) -> list[str]:
+    """Drop least recently used sessions until the limits hold.
+
+    ``keep`` is never evicted.  Must be called with ``_lock`` held; returns
+    the evicted ids so their folders can be removed outside the lock.
+    """
+    evicted = []
+    by_age = sorted(_sessions.values(), key=lambda s: s["last_used"])
+    total = sum(s["bytes"] for s in by_age)
+    for session in by_age:
+        if len(_sessions) <= ANALYSIS_SESSION_MAX and total <= ANALYSIS_SESSION_MAX_BYTES:
+            break
+        if session["id"] == keep:
+            continue
+        del _sessions[session["id"]]
+        total -= session["bytes"]
+        evicted.append(session["id"])
+    return evicted
+
+
+def _remove_evicted(evicted: list[str]) -> None:
+    for sid in evicted:
+        _remove_dir(sid)
+    if evicted:
+        logger.info("Evicted %d analysis sessions over the session limits", len(evicted))
+
+
+def expire_sessions(now: Optional[float] = None) -> int:
+    """Remove sessions idle for longer than the timeout.
+
+    Session folders left behind by a previous server run are removed as
+    well once they are older than the timeout.  Returns the number of
+    sessions removed.
+    """
+    now = time.monotonic() if now is None else now
+    with _lock:
+        expired = [
+            sid for sid, s in _sessions.items()
+            if now - s["last_used"] > ANALYSIS_SESSION_TIMEOUT
+        ]
+        for sid in expired:
+            del _sessions[sid]
+        active = set(_sessions)
+    for sid in expired:
+        _remove_dir(sid)
+
+    try:
+        names = os.listdir(ANALYSIS_SESSION_DIR)
+    except OSError:
+        names = []
+    cutoff = time.time() - ANALYSIS_SESSION_TIMEOUT
+    for name in names:
+        if name in active:
+            continue
+        try:
+            if os.stat(os.path.join(ANALYSIS_SESSION_DIR, name)).st_mtime < cutoff:
+                _remove_dir(name)
+                expired.append(name)
+        except OSError:
+            continue
+    if expired:
+        logger.debug("Expired %d analysis sessions", len(expired))
+    return len(expired)
+
+
+def create_session(filename: str, stream) -> dict:
+    """Store an uploaded audio file and return its new session.
+
+    ``stream`` is a readable binary file object.  Raises ``ValueError`` if
+    the upload is not a readable audio file.
+    """
+    expire_sessions()
+    session_id = uuid.uuid4().hex
+    session_dir = os.path.join(ANALYSIS_SESSION_DIR, session_id)
+    os.makedirs(session_dir, exist_ok=True)
+    path = os.path.join(session_dir, os.path.basename(filename) or "audio.wav")
+    try:
+        with open(path, "wb") as f:
+            shutil.copyfileobj(stream, f)
+        info = sf.info(path)
+        digest = onset_cache.file_digest(path)
+    except Exception as e:
+        _remove_dir(session_id)
+        raise ValueError(f"Could not read audio file: {e}") from e
+
+    session = {
+        "id": session_id,
+        "path": path,
+        "filename": os.path.basename(path),
+        "duration": info.duration,
+        "digest": digest,
+        "envelopes": {},
+        "bytes": os.path.getsize(path),
+        "last_used": time.monotonic(),
+    }
+    with _lock:
+        _sessions[session_id] = session
+        evicted = _evict_over_limits(session_id)
+    _remove_evicted(evicted)
+    logger.info("Created analysis session %s for %s", session_id, session["filename"])
+    return session
+
+
+def get_session(session_id: str) -> Optional[dict]:
+    """Return the session for ``session_id`` and mark it as used."""
+    expire_sessions()
+    with _lock:
+        session = _sessions.get(session_id)
+        if session is not None:
+            session["last_used"] = time.monotonic()
+    return session
+
+
+def close_session(session_id: str) -> bool:
+    """Remove a session and its file.  Returns ``False`` if it was unknown."""
+    with _lock:
+        session = _sessions.pop(session_id, None)
+    if session is None:
+        return False
+    _remove_dir(session_id)
+    return True
+
+
+def detect_session_transients(session_id: str, max_slices=None, delta=0.07, engine="hpss"):
+    """Detect transients in a session's audio, reusing its onset envelopes.
+
+    Returns regions as :func:`core.slice_handler.detect_transients` does.
+    Raises ``KeyError`` if the session does not exist or has expired.
+    """
+    if engine not in ONSET_ENGINES:
+        raise ValueError(f"Unknown onset engine: {engine}")
+    session = get_session(session_id)
+    if session is None:
+        raise KeyError(session_id)
+    envelope = session["envelopes"].get(engine)
+    if envelope is None:
+        envelope = get_onset_envelope(session["path"], engine, digest=session["digest"])
+        with _lock:
+            if engine not in session["envelopes"]:
+                session["envelopes"][engine] = envelope
+                session["bytes"] += envelope[0].nbytes
+            evicted = _evict_over_limits(session_id) if session_id in _sessions else []
+        _remove_evicted(evicted)
+    o_env, sr, duration = envelope
+    return regions_from_envelope(o_env, sr, duration, ONSET_HOPS[engine], max_slices, delta)
@@ -0,0 +1,59 @@
+"""Header-only audio metadata with a shared cache.
+
+:func:`probe_audio` reads an audio file's header with ``soundfile.info`` and
+returns its length and format without decoding any samples.  Results are
+cached per path and validated against the file's ``mtime`` and size, and
+the ``audio_probe:<path>`` keys are dropped by
+:func:`core.cache_manager.invalidate_path` when the library changes.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import soundfile as sf
+
+from core.cache_manager import get_cache, set_cache, configure_namespace
+
+logger = logging.getLogger(__name__)
+
+_CACHE_PREFIX = "audio_probe:"
+
+# Entries are small; keep enough for a few kits' worth of samples.
+configure_namespace("audio_probe", max_entries=1024, max_bytes=1024 * 1024)
+
+
+def probe_audio(path) -> Optional[dict]:
+    """
+    Return header metadata for the audio file at ``path``.
+
+    The result contains ``frames``, ``samplerate``, ``channels``,
+    ``duration`` (seconds), ``format`` and ``subtype``.  Returns ``None`` if
+    the file is missing or not a readable audio file.
+    """
+    abs_path = os.path.abspath(path)
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    key = f"{_CACHE_PREFIX}{abs_path}"
+    cached = get_cache(key)
+    if cached is not None and cached["signature"] == signature:
+        return dict(cached["info"])
+
+    try:
+        info = sf.info(abs_path)
+    except Exception as e:
+        logger.debug("Could not probe %s: %s", abs_path, e)
+        return None
+    result = {
+        "frames": info.frames,
+        "samplerate": info.samplerate,
+        "channels": info.channels,
+        "duration": info.frames / info.samplerate if info.samplerate else 0.0,
+        "format": info.format,
+        "subtype": info.subtype,
+    }
+    set_cache(key, {"signature": signature, "info": result})
+    return dict(result)
@@ -1,17 +1,185 @@
-"""Simple in-memory cache for library scans."""
+"""Bounded in-memory cache for library scans.
 
+Keys are grouped into namespaces by the text before the first ``:``
+(``"file_browser:/path"`` lives in ``file_browser``).  Each namespace is an
+LRU with its own lock, entry cap, optional byte cap and optional TTL, and
+keeps hit/miss/eviction counters for ``/debug/cache``.
+
+Entries can be dropped selectively: :func:`invalidate_path` removes entries
+whose key names a directory related to a changed path, and
+:func:`invalidate_tag` removes entries (or whole namespaces) carrying a tag.
+"""
+
+from collections import OrderedDict
 from threading import Lock
+from typing import Optional
 import logging
+import os
+import sys
+import time
 
-_cache = {}
-_lock = Lock()
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# Depth limit when estimating the size of nested containers.
+_SIZE_DEPTH = 6
+
+
+def _approx_size(obj, depth=0) -> int:
+    """Return an approximate deep size of ``obj`` in bytes."""
+    size = sys.getsizeof(obj)
+    if depth >= _SIZE_DEPTH:
+        return size
+    if isinstance(obj, dict):
+        size += sum(
+            _approx_size(k, depth + 1) + _approx_size(v, depth + 1)
+            for k, v in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(item, depth + 1) for item in obj)
+    return size
+
+
+class _Namespace:
+    """LRU store for one cache namespace."""
+
+    def __init__(self, name, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.tags: frozenset = frozenset()
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = Lock()
+
+    def _drop(self, key):
+        _, size, _, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, _, expires, _ = item
+            if expires is not None and time.monotonic() >= expires:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, tags=None):
+        size = _approx_size(value)
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        tags = frozenset(tags) if tags else frozenset()
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (value, size, expires, tags)
+            self.bytes += size
+            while self.entries and (
+                (self.max_entries is not None and len(self.entries) > self.max_entries)
+                or (self.max_bytes is not None and self.bytes > self.max_bytes and len(self.entries) > 1)
+            ):
+                oldest = next(iter(self.entries))
+                self._drop(oldest)
+                self.evictions += 1
+                logger.debug("Evicted %s from cache namespace %s", oldest, self.name)
+
+    def pop(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+
+    def pop_matching(self, predicate) -> int:
+        """Drop entries for which ``predicate(key, tags)`` is true."""
+        with self.lock:
+            stale = [k for k, item in self.entries.items() if predicate(k, item[3])]
+            for key in stale:
+                self._drop(key)
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_namespaces: dict[str, _Namespace] = {}
+_namespaces_lock = Lock()
+
+
+def _namespace_name(key) -> str:
+    return str(key).split(":", 1)[0]
+
+
+def _get_namespace(name) -> _Namespace:
+    ns = _namespaces.get(name)
+    if ns is None:
+        with _namespaces_lock:
+            ns = _namespaces.get(name)
+            if ns is None:
+                ns = _namespaces[name] = _Namespace(name)
+    return ns
+
+
+def configure_namespace(
+    name,
+    max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+    max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+    ttl: Optional[float] = None,
+    tags=(),
+):
+    """Set limits for a namespace.
+
+    ``None`` disables the corresponding limit.  ``ttl`` is the default
+    lifetime in seconds for entries stored without an explicit ``ttl``.
+    ``tags`` apply to every entry, so :func:`invalidate_tag` clears the
+    whole namespace.
+    """
+    ns = _get_namespace(name)
+    with ns.lock:
+        ns.max_entries = max_entries
+        ns.max_bytes = max_bytes
+        ns.ttl = ttl
+        ns.tags = frozenset(tags)
+    logger.debug(
+        "Configured cache namespace %s: max_entries=%s max_bytes=%s ttl=%s",
+        name, max_entries, max_bytes, ttl,
+    )
+
 
 def get_cache(key):
-    """Retrieve cached value if it exists."""
-    with _lock:
-        value = _cache.get(key)
+    """Retrieve cached value if it exists and has not expired."""
+    value = _get_namespace(_namespace_name(key)).get(key)
     if value is not None:
         logger.debug("Cache hit for %s", key)
     else:
@@ -19,10 +187,13 @@ def get_cache(key):
     return value
 
 
-def set_cache(key, value):
-    """Store value in cache."""
-    with _lock:
-        _cache[key] = value
+def set_cache(key, value, ttl=None, tags=None):
+    """Store value in cache.
+
+    ``ttl`` overrides the namespace's default lifetime in seconds and
+    ``tags`` lets the entry be dropped with :func:`invalidate_tag`.
+    """
+    _get_namespace(_namespace_name(key)).set(key, value, ttl, tags)
     logger.debug("Updated cache for %s", key)
 
 
@@ -31,12 +202,64 @@ def invalidate_cache(key=None):
 
     If ``key`` is ``None`` all cached entries are cleared.
     """
-    with _lock:
-        if key is None:
-            _cache.clear()
-        else:
-            _cache.pop(key, None)
     if key is None:
+        for ns in list(_namespaces.values()):
+            ns.clear()
         logger.debug("Cleared entire cache")
     else:
+        _get_namespace(_namespace_name(key)).pop(key)
         logger.debug("Invalidated cache for %s", key)
+
+
+def _key_path(key) -> Optional[str]:
+    """Return the absolute path named by ``key`` after its namespace, if any."""
+    _, sep, rest = str(key).partition(":")
+    if not sep or not os.path.isabs(rest):
+        return None
+    return os.path.normpath(rest)
+
+
+def _paths_related(a: str, b: str) -> bool:
+    """Return ``True`` if ``a`` and ``b`` are equal or one contains the other."""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+
+def invalidate_path(path):
+    """Drop entries keyed by a path that contains or lies below ``path``.
+
+    A changed file invalidates listings of every ancestor directory (e.g.
+    ``wav:`` and ``file_browser:`` entries), and a replaced directory also
+    invalidates entries for anything inside it.  Keys that do not name an
+    absolute path after their namespace are left alone.
+    """
+    path = os.path.normpath(os.path.abspath(path))
+    dropped = 0
+    for ns in list(_namespaces.values()):
+        dropped += ns.pop_matching(
+            lambda key, _tags: (
+                (kp := _key_path(key)) is not None and _paths_related(kp, path)
+            )
+        )
+    logger.debug("Invalidated %d cache entries for path %s", dropped, path)
+
+
+def invalidate_tag(tag):
+    """Drop entries tagged with ``tag`` and clear namespaces carrying it."""
+    dropped = 0
+    for ns in list(_namespaces.values()):
+        if tag in ns.tags:
+            dropped += len(ns.entries)
+            ns.clear()
+        else:
+            dropped += ns.pop_matching(lambda _key, tags: tag in tags)
+    logger.debug("Invalidated %d cache entries for tag %s", dropped, tag)
+
+
+def get_cache_stats():
+    """Return per-namespace usage and hit/miss/eviction counters."""
+    namespaces = {name: ns.stats() for name, ns in sorted(_namespaces.items())}
+    return {
+        "namespaces": namespaces,
+        "total_entries": sum(s["entries"] for s in namespaces.values()),
+        "total_bytes": sum(s["bytes"] for s in namespaces.values()),
+    }
@@ -0,0 +1,254 @@
+"""Server-side rendering of chord kits.
+
+A chord kit maps up to 16 chords onto the pads of a choke kit; each pad
+plays a mix of the source sample pitched to every note of its chord.  The
+source is decoded once, every distinct semitone offset across all chords
+is rendered once (concurrently on the DSP pool when Rubber Band keeps the
+length), and the voicings are mixed from those shared renders.
+"""
+
+import io
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+import numpy as np
+import soundfile as sf
+
+from core.config import DSP_MAX_CONCURRENT
+from core.dsp_pool import run_dsp
+from core.job_queue import bind_current_job, report_progress
+from core.refresh_handler import refresh_library, refresh_summary
+from core.slice_handler import generate_kit_template, get_unique_filename
+from core.time_stretch_handler import pitch_shift_array
+
+logger = logging.getLogger(__name__)
+
+MAX_CHORDS = 16
+# Widest supported offset: two octaves of transpose plus an octave voicing.
+MAX_SEMITONES = 48
+TARGET_PEAK = 0.9
+
+SAMPLES_DIR = "/data/UserData/UserLibrary/Samples/Preset Samples"
+PRESETS_DIR = "/data/UserData/UserLibrary/Track Presets"
+
+
+def parse_chords(chords):
+    """
+    Validate a chord list as sent by the chord page.
+
+    ``chords`` is a list (or its JSON encoding) of ``{"name", "intervals"}``
+    dicts, one per pad.  Pads with no intervals are left empty.
+
+    Returns:
+        list of ``(name, tuple of int semitones)``
+
+    Raises:
+        ValueError: if the list is malformed.
+    """
+    if isinstance(chords, str):
+        chords = json.loads(chords)
+    if not isinstance(chords, list) or not chords:
+        raise ValueError("No chords given")
+    if len(chords) > MAX_CHORDS:
+        raise ValueError(f"At most {MAX_CHORDS} chords are supported")
+    parsed = []
+    for chord in chords:
+        name = str(chord.get("name") or "").strip()
+        intervals = tuple(int(round(float(s))) for s in chord.get("intervals") or ())
+        if any(abs(s) > MAX_SEMITONES for s in intervals):
+            raise ValueError(f"Interval out of range in chord {name or '?'}")
+        parsed.append((name, intervals))
+    if not any(intervals for _, intervals in parsed):
+        raise ValueError("No chords given")
+    return parsed
+
+
+def unique_offsets(chords):
+    """Return the sorted distinct semitone offsets used by ``chords``."""
+    return sorted({s for _, intervals in chords for s in intervals})
+
+
+def resample_shift(y, semitones):
+    """
+    Pitch ``y`` by changing its playback rate, like a sampler would.
+
+    The result is shorter for upward shifts and longer for downward ones.
+    ``y`` has shape ``(frames, channels)``.
+    """
+    if semitones == 0:
+        return y
+    factor = 2.0 ** (semitones / 12.0)
+    length = int(len(y) / factor)
+    pos = np.arange(length) * factor
+    i0 = np.minimum(pos.astype(np.int64), len(y) - 1)
+    i1 = np.minimum(i0 + 1, len(y) - 1)
+    frac = (pos - i0).astype(y.dtype)[:, None]
+    return y[i0] * (1 - frac) + y[i1] * frac
+
+
+def render_offsets(y, sr, offsets, keep_length=False):
+    """
+    Render ``y`` at each semitone offset.
+
+    With ``keep_length`` the shifts use Rubber Band on the DSP pool, several
+    at a time; otherwise they are resampled inline.
+
+    Returns:
+        dict: ``{semitones: ndarray}``
+    """
+    rendered = {0: y} if 0 in offsets else {}
+    pending = [s for s in offsets if s != 0]
+    if not keep_length:
+        for s in pending:
+            rendered[s] = resample_shift(y, s)
+        return rendered
+
+    with ThreadPoolExecutor(max_workers=max(1, DSP_MAX_CONCURRENT)) as executor:
+        shift = bind_current_job(run_dsp)
+        futures = {executor.submit(shift, pitch_shift_array, y, sr, s): s for s in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            shifted = future.result()
+            rendered[futures[future]] = shifted.reshape(len(shifted), -1)
+            report_progress(0.8 * done / len(futures), f"Pitched {done} of {len(futures)} notes")
+    return rendered
+
+
+def mix_voices(voices, target_peak=TARGET_PEAK):
+    """Sum arrays of shape ``(frames, channels)`` and normalise the peak."""
+    length = max(len(v) for v in voices)
+    mixed = np.zeros((length, voices[0].shape[1]), dtype=np.float32)
+    for voice in voices:
+        mixed[:len(voice)] += voice
+    peak = float(np.max(np.abs(mixed))) if length else 0.0
+    if peak > 0:
+        mixed *= target_peak / peak
+    return mixed
+
+
+def _wav_bytes(y, sr):
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def _sample_names(source_name, chords):
+    """Return one filename per pad; pads with the same voicing share one."""
+    base = os.path.splitext(os.path.basename(source_name))[0] or "Chord"
+    by_voicing = {}
+    used = set()
+    names = []
+    for pad, (name, intervals) in enumerate(chords, 1):
+        if not intervals:
+            names.append(None)
+            continue
+        if intervals not in by_voicing:
+            filename = f"{base}_chord_{''.join(name.split()) or pad}.wav"
+            if filename in used:
+                filename = f"{base}_chord_{''.join(name.split())}_{pad}.wav"
+            used.add(filename)
+            by_voicing[intervals] = filename
+        names.append(by_voicing[intervals])
+    return names
+
+
+def _chord_preset(preset_name, chords, sample_uris):
+    """Build a choke kit preset with one drum cell per chord."""
+    preset = generate_kit_template(preset_name, kit_type="choke")
+    cells = preset["chains"][0]["devices"][0]["chains"]
+    kept = []
+    for cell, (name, _), uri in zip(cells, chords, sample_uris):
+        if uri is None:
+            continue
+        cell["name"] = name
+        device = cell["devices"][0]
+        device["name"] = name
+        device["parameters"] = {"Voice_Envelope_Hold": 60.0}
+        device["deviceData"]["sampleUri"] = uri
+        kept.append(cell)
+    preset["chains"][0]["devices"][0]["chains"] = kept
+    return preset
+
+
+def build_chord_kit(y, sr, source_name, chords, preset_name=None, mode="download",
+                    keep_length=False, output_dir="."):
+    """
+    Render a chord kit from decoded audio.
+
+    Args:
+        y: Source audio, shape ``(frames,)`` or ``(frames, channels)``
+        sr: Sample rate
+        source_name: Original filename, used to name the samples
+        chords: Chord list accepted by :func:`parse_chords`
+        preset_name: Preset name (default: the source's base name)
+        mode: ``"download"`` writes a bundle to ``output_dir``;
+            ``"auto_place"`` writes into the Move library
+        keep_length: Pitch with Rubber Band instead of resampling
+
+    Returns:
+        dict: ``success``, ``message`` and, in download mode, ``bundle_path``
+    """
+    if mode not in ("download", "auto_place"):
+        return {'success': False, 'message': "Invalid mode. Must be 'download' or 'auto_place'."}
+    try:
+        chords = parse_chords(chords)
+    except (ValueError, TypeError, AttributeError) as e:
+        return {'success': False, 'message': f"Invalid chords: {e}"}
+    preset = (preset_name or "").strip() or os.path.splitext(os.path.basename(source_name))[0] or "Chords"
+
+    try:
+        y = np.asarray(y, dtype=np.float32)
+        y = y.reshape(len(y), -1)
+        offsets = unique_offsets(chords)
+        rendered = render_offsets(y, sr, offsets, keep_length)
+
+        report_progress(0.85, "Mixing chords")
+        names = _sample_names(source_name, chords)
+        samples = {}
+        for (name, intervals), filename in zip(chords, names):
+            if filename is not None and filename not in samples:
+                samples[filename] = _wav_bytes(mix_voices([rendered[s] for s in intervals]), sr)
+        logger.info(
+            "Rendered %d chord samples from %d pitch renders", len(samples), len(offsets)
+        )
+
+        report_progress(0.95, "Writing preset")
+        if mode == "download":
+            uris = [None if n is None else "Samples/" + quote(n) for n in names]
+            bundle_path = os.path.join(output_dir, f"{preset}.ablpresetbundle")
+            with zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("Preset.ablpreset", json.dumps(_chord_preset(preset, chords, uris), indent=2))
+                for filename, data in samples.items():
+                    zf.writestr(f"Samples/{filename}", data)
+            return {'success': True, 'bundle_path': bundle_path, 'message': "Chord kit bundle created successfully."}
+
+        os.makedirs(SAMPLES_DIR, exist_ok=True)
+        placed = {}
+        for filename, data in samples.items():
+            path = get_unique_filename(os.path.join(SAMPLES_DIR, filename))
+            with open(path, "wb") as f:
+                f.write(data)
+            placed[filename] = os.path.basename(path)
+        uris = [
+            None if n is None
+            else "ableton:/user-library/Samples/Preset%20Samples/" + quote(placed[n])
+            for n in names
+        ]
+        preset_path = get_unique_filename(os.path.join(PRESETS_DIR, f"{preset}.ablpreset"))
+        with open(preset_path, "w") as f:
+            json.dump(_chord_preset(preset, chords, uris), f, indent=2)
+        refresh = refresh_library(
+            paths=[SAMPLES_DIR, PRESETS_DIR], tags=["presets"], wait=False
+        )
+        refresh_success, refresh_message = refresh_summary(refresh)
+        if refresh_success:
+            return {'success': True, 'refresh_id': refresh.refresh_id,
+                    'message': f"Chord kit {preset} placed successfully. {refresh_message}"}
+        return {'success': True, 'refresh_id': refresh.refresh_id,
+                'message': f"Chord kit {preset} placed, but library refresh failed: {refresh_message}"}
+    except Exception as e:
+        logger.error("Chord kit rendering failed: %s", e)
+        return {'success': False, 'message': f"Error rendering chord kit: {e}"}
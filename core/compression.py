@@ -0,0 +1,123 @@
+"""Negotiated compression of text responses.
+
+The parameter editor and set inspector pages inline large generated HTML
+and JSON.  :func:`compress_response` gzips (or, with the optional
+``brotli`` module, brotli-encodes) such responses when the client accepts
+it, and keeps per-route byte counts that :func:`get_compression_stats`
+reports.  File downloads, streamed and partial responses are left alone.
+"""
+
+import gzip
+import logging
+from threading import Lock
+from typing import Optional
+
+from core.config import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+_lock = Lock()
+_stats: dict[str, dict] = {}
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Return ``"br"``, ``"gzip"`` or ``None`` for an Accept-Encoding value."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def _compressible(response) -> bool:
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code != 200 or "Content-Encoding" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress_response(response, accept_encoding, route=None):
+    """
+    Compress ``response`` in place if the client accepts it.
+
+    Returns:
+        tuple: ``(encoding, original_size, compressed_size)``, or ``None``
+        if the response was left unchanged.
+    """
+    if not _compressible(response):
+        return None
+    # Caches must keep one copy per encoding, even of responses we skip.
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return None
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return None
+
+    if encoding == "br":
+        compressed = brotli.compress(data, quality=COMPRESSION_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+    if len(compressed) >= len(data):
+        return None
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The encoded body is no longer byte-identical to the original.
+        response.set_etag(etag, weak=True)
+
+    if route:
+        with _lock:
+            entry = _stats.setdefault(route, {"responses": 0, "original_bytes": 0, "sent_bytes": 0})
+            entry["responses"] += 1
+            entry["original_bytes"] += len(data)
+            entry["sent_bytes"] += len(compressed)
+    return encoding, len(data), len(compressed)
+
+
+def get_compression_stats() -> dict:
+    """Return per-route response counts and byte totals."""
+    with _lock:
+        return {route: dict(entry) for route, entry in _stats.items()}
+
+
+def reset_compression_stats() -> None:
+    """Forget the collected byte counts."""
+    with _lock:
+        _stats.clear()
@@ -5,6 +5,8 @@ sets and samples on the device. It also defines the valid numeric ranges
 accepted from users when restoring a set.  All ranges are inclusive.
 """
 
+import os
+
 # Path where Move sets are stored.  Each restored set is placed in a
 # unique UUID-named folder beneath this directory.
 MSETS_DIRECTORY = "/data/UserData/UserLibrary/Sets"
@@ -16,6 +18,9 @@ MSET_SAMPLE_PATH = "/data/UserData/UserLibrary/Samples"
 # Directory for samples placed when replacing Melodic Sampler presets.
 MELODIC_SAMPLER_SAMPLE_DIR = "/data/UserData/UserLibrary/Samples/melodicSampler"
 
+# Track Presets saved by Move and by the preset editors.
+TRACK_PRESETS_DIRECTORY = "/data/UserData/UserLibrary/Track Presets"
+
 # Base URI prefix inserted into Song.abl files to reference set contents.
 MSET_ABLETON_URI = "ableton:/user-library/Sets"
 
@@ -24,3 +29,89 @@ MSET_INDEX_RANGE = (0, 31)
 
 # Inclusive range of valid color IDs used by Move's UI (1–26).
 MSET_COLOR_RANGE = (1, 26)
+
+# Persistent index of Track Presets metadata.  Stored next to the server so
+# library scans survive restarts and cache invalidations.
+PRESET_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "preset_index.json",
+)
+
+# Index of time-stretched and repitched files rendered from each source
+# sample, keyed by the source's content hash and the render parameters.
+DERIVED_AUDIO_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "derived_audio_index.json",
+)
+
+# Cached onset strength envelopes for transient detection, keyed by audio
+# content hash so re-detecting a file only repeats peak picking.
+ONSET_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "onset_cache",
+)
+
+# Uploaded audio kept for slice-page analysis sessions, and how long an idle
+# session is kept before its file and analysis are discarded.
+ANALYSIS_SESSION_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "analysis_sessions",
+)
+ANALYSIS_SESSION_TIMEOUT = 15 * 60
+# Limits on concurrent sessions; the least recently used ones are removed
+# first.  The byte limit covers uploaded files plus in-memory envelopes.
+ANALYSIS_SESSION_MAX = 8
+ANALYSIS_SESSION_MAX_BYTES = 256 * 1024 * 1024
+
+# Seconds during which library refresh requests are coalesced into a single
+# ``refreshCache`` D-Bus call.
+LIBRARY_REFRESH_WINDOW = 0.5
+
+# Background jobs for long-running audio operations: number of worker
+# threads, where finished jobs keep their downloadable artifacts, and how
+# long a finished job is kept when its result is never collected.
+JOB_WORKERS = 2
+JOB_ARTIFACT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "job_artifacts",
+)
+JOB_RETENTION = 60 * 60
+
+# Process pool for CPU-heavy DSP work (time-stretching, onset analysis,
+# pitch shifting).  ``None`` sizes the pool to the CPU count minus
+# ``DSP_CPU_RESERVE`` cores left for Move and the HTTP threads.  Tasks that
+# run longer than ``DSP_TASK_TIMEOUT`` seconds are killed.
+DSP_POOL_WORKERS = None
+DSP_CPU_RESERVE = 1
+DSP_TASK_TIMEOUT = 300
+
+# Admission control for DSP work.  At most ``DSP_MAX_CONCURRENT`` heavy tasks
+# run at once; others wait in FIFO order.  Workers run at ``DSP_NICE``
+# (added to the server's niceness), optionally pinned to the CPUs in
+# ``DSP_CPU_AFFINITY`` (e.g. ``{1, 2, 3}``), with NumPy/BLAS thread pools
+# capped at ``DSP_BLAS_THREADS`` so Move's audio engine keeps its headroom.
+DSP_MAX_CONCURRENT = 2
+DSP_NICE = 10
+DSP_CPU_AFFINITY = None
+DSP_BLAS_THREADS = 1
+
+# HTTP server.  ``HTTP_SERVER_ENGINE`` is ``"keepalive"`` (persistent
+# HTTP/1.1 connections on a pool of ``HTTP_WORKERS`` threads) or
+# ``"threading"`` (a thread and connection per request); the
+# ``HTTP_SERVER_ENGINE`` environment variable overrides it.  Idle
+# connections close after ``HTTP_KEEPALIVE_TIMEOUT`` seconds or
+# ``HTTP_KEEPALIVE_MAX_REQUESTS`` requests.  Once a request has started,
+# each socket read or write may take up to ``HTTP_IO_TIMEOUT`` seconds.
+HTTP_SERVER_ENGINE = "keepalive"
+HTTP_WORKERS = 8
+HTTP_KEEPALIVE_TIMEOUT = 5
+HTTP_KEEPALIVE_MAX_REQUESTS = 100
+HTTP_IO_TIMEOUT = 60
+
+# Response compression for text responses (HTML, JSON, JS, CSS, SVG) of at
+# least ``COMPRESSION_MIN_SIZE`` bytes.  Levels are kept low: beyond them
+# the Move's CPU time grows much faster than the bytes saved.  Brotli is
+# used when the optional ``brotli`` module is installed.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 5
+COMPRESSION_BROTLI_QUALITY = 4
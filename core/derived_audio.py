@@ -0,0 +1,220 @@
+"""Content-addressed index of derived audio files.
+
+Time-stretching a pad used to render a new file every time, even when the
+same source had already been rendered with the same settings.  This module
+records each rendered file under the source's SHA-256 digest and the render
+parameters, so a repeated (or undone and redone) stretch resolves to the
+existing file.  The index is kept as JSON next to the server; entries whose
+files were deleted or modified since they were recorded are dropped on
+lookup.  Whenever a file is recorded, entries whose source or output is gone
+are pruned and the least recently used ones beyond ``MAX_ENTRIES`` are
+forgotten (their files are left alone).
+"""
+
+import json
+import logging
+import os
+import time
+from threading import Lock
+from typing import Optional
+
+from core.config import DERIVED_AUDIO_INDEX_PATH
+from core.cache_manager import get_cache, set_cache, configure_namespace
+from core.onset_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+MAX_ENTRIES = 512
+
+_DIGEST_PREFIX = "audio_digest:"
+
+configure_namespace("audio_digest", max_entries=1024, max_bytes=256 * 1024)
+
+# {source digest: {params key: {"path", "params", "mtime", "size", "source", "used"}}}
+_sources: dict[str, dict[str, dict]] = {}
+_loaded = False
+_dirty = False
+_lock = Lock()
+
+
+def source_digest(path) -> Optional[str]:
+    """Return the SHA-256 digest of ``path``, cached by ``mtime`` and size.
+
+    Returns ``None`` if the file cannot be read.
+    """
+    abs_path = os.path.abspath(path)
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        return None
+    signature = (st.st_mtime_ns, st.st_size)
+    key = f"{_DIGEST_PREFIX}{abs_path}"
+    cached = get_cache(key)
+    if cached is not None and cached["signature"] == signature:
+        return cached["digest"]
+    try:
+        digest = file_digest(abs_path)
+    except OSError as e:
+        logger.debug("Could not hash %s: %s", abs_path, e)
+        return None
+    set_cache(key, {"signature": signature, "digest": digest})
+    return digest
+
+
+def params_key(params: dict) -> str:
+    """Return a stable string for a dict of render parameters."""
+    normalized = {
+        k: round(v, 6) if isinstance(v, float) else v
+        for k, v in params.items()
+    }
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def _ensure_loaded() -> None:
+    """Load the index file once.  Must be called with ``_lock`` held."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    try:
+        with open(DERIVED_AUDIO_INDEX_PATH, "r") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION:
+            _sources.update(data.get("sources", {}))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Ignoring unreadable derived audio index %s: %s", DERIVED_AUDIO_INDEX_PATH, e)
+
+
+def _is_current(entry: dict) -> bool:
+    try:
+        st = os.stat(entry["path"])
+    except OSError:
+        return False
+    return entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size
+
+
+def find_derived(digest: str, params: dict) -> Optional[str]:
+    """Return the path of a file rendered from ``digest`` with ``params``."""
+    global _dirty
+    key = params_key(params)
+    with _lock:
+        _ensure_loaded()
+        entry = _sources.get(digest, {}).get(key)
+        if entry is None:
+            return None
+        if _is_current(entry):
+            # Kept in memory only; saved with the next change to the index.
+            entry["used"] = time.time()
+            return entry["path"]
+        del _sources[digest][key]
+        if not _sources[digest]:
+            del _sources[digest]
+        _dirty = True
+    flush_index()
+    return None
+
+
+def _is_stale(entry: dict) -> bool:
+    source = entry.get("source")
+    return not _is_current(entry) or (source is not None and not os.path.exists(source))
+
+
+def _prune() -> int:
+    """Drop stale entries and the least recently used ones beyond ``MAX_ENTRIES``.
+
+    Must be called with ``_lock`` held.  Returns the number of entries dropped.
+    """
+    global _dirty
+    entries = [
+        (digest, key, entry)
+        for digest, by_params in _sources.items()
+        for key, entry in by_params.items()
+    ]
+    dropped = []
+    live = []
+    for digest, key, entry in entries:
+        if _is_stale(entry):
+            dropped.append((digest, key))
+        else:
+            live.append((entry.get("used", 0), digest, key))
+    if len(live) > MAX_ENTRIES:
+        live.sort()
+        dropped.extend((d, k) for _, d, k in live[:len(live) - MAX_ENTRIES])
+    for digest, key in dropped:
+        del _sources[digest][key]
+        if not _sources[digest]:
+            del _sources[digest]
+    if dropped:
+        _dirty = True
+        logger.debug("Pruned %d derived audio entries", len(dropped))
+    return len(dropped)
+
+
+def record_derived(digest: str, params: dict, path: str, source: Optional[str] = None) -> None:
+    """Record that ``path`` was rendered from ``digest`` with ``params``.
+
+    ``source`` is the path the render was made from; the entry is pruned
+    once that file is gone.
+    """
+    global _dirty
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    with _lock:
+        _ensure_loaded()
+        _sources.setdefault(digest, {})[params_key(params)] = {
+            "path": path,
+            "params": params,
+            "mtime": st.st_mtime_ns,
+            "size": st.st_size,
+            "source": os.path.abspath(source) if source else None,
+            "used": time.time(),
+        }
+        _dirty = True
+        _prune()
+    flush_index()
+
+
+def derived_files(digest: str) -> list[dict]:
+    """Return ``{"path", "params"}`` for every existing file derived from ``digest``."""
+    with _lock:
+        _ensure_loaded()
+        entries = list(_sources.get(digest, {}).values())
+    return [
+        {"path": e["path"], "params": e["params"]}
+        for e in entries if _is_current(e)
+    ]
+
+
+def flush_index() -> None:
+    """Write the index to ``DERIVED_AUDIO_INDEX_PATH`` if it changed."""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        payload = {"version": INDEX_VERSION, "sources": {d: dict(e) for d, e in _sources.items()}}
+        _dirty = False
+    tmp_path = DERIVED_AUDIO_INDEX_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, DERIVED_AUDIO_INDEX_PATH)
+    except Exception as e:
+        logger.warning("Could not save derived audio index %s: %s", DERIVED_AUDIO_INDEX_PATH, e)
+        with _lock:
+            _dirty = True
+
+
+def reset_index() -> None:
+    """Forget in-memory entries so the index is reloaded from disk."""
+    global _loaded, _dirty
+    with _lock:
+        _sources.clear()
+        _loaded = False
+        _dirty = False
@@ -3,47 +3,58 @@ import os
 import json
 import urllib.parse
 import logging
-from core.cache_manager import get_cache, set_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.cache_manager import get_cache, set_cache, configure_namespace
+from core.preset_index import classify_presets
+from core.audio_probe import probe_audio
+from core.utils import sample_uri_to_path
+from core.config import DSP_MAX_CONCURRENT
+from core.job_queue import bind_current_job, report_progress
+from core.refresh_handler import refresh_library, refresh_summary
+from core.time_stretch_handler import time_stretch_wav
 
 logger = logging.getLogger(__name__)
 
-def update_drum_cell_sample(preset_path, pad_number, new_sample_path, new_playback_start=None, new_playback_length=None):
+configure_namespace("drum_rack_presets", tags=("presets",))
+
+def _sample_path_to_uri(sample_path):
+    """Convert a system path to the URI stored in a drum cell."""
+    encoded_path = urllib.parse.quote(sample_path)
+    if encoded_path.startswith('/data/UserData/UserLibrary/Samples/'):
+        return encoded_path.replace('/data/UserData/UserLibrary/Samples/', 'ableton:/user-library/Samples/')
+    return 'file://' + encoded_path
+
+
+def update_drum_cell_samples(preset_path, updates):
     """
-    Update the sample URI for a specific drum cell in a preset.
-    
+    Update the samples of several drum cells with a single preset write.
+
     Args:
         preset_path: Path to the .ablpreset file
-        pad_number: The pad number to update
-        new_sample_path: The new sample path to set
-        
+        updates: Dict mapping pad numbers to dicts with ``path`` and optional
+            ``playback_start`` / ``playback_length``
+
     Returns:
         tuple: (success: bool, message: str)
     """
     try:
         with open(preset_path, 'r') as f:
             preset_data = json.load(f)
-            
+
+        pending = {int(pad): update for pad, update in updates.items()}
         current_pad = [1]  # Use list to allow modification in nested function
-        found = [False]  # Track if we found and updated the correct pad
-        
+
         def update_drum_cells(data):
             if isinstance(data, dict):
                 if data.get('kind') == 'drumCell':
-                    if current_pad[0] == int(pad_number):
-                        # Convert system path to Ableton URI format
-                        # Encode the new sample path
-                        encoded_path = urllib.parse.quote(new_sample_path)
-                        
-                        if encoded_path.startswith('/data/UserData/UserLibrary/Samples/'):
-                            uri = encoded_path.replace('/data/UserData/UserLibrary/Samples/', 'ableton:/user-library/Samples/')
-                        else:
-                            uri = 'file://' + encoded_path
-                            
-                        # Update the sample URI
+                    update = pending.pop(current_pad[0], None)
+                    if update is not None:
                         if 'deviceData' not in data:
                             data['deviceData'] = {}
-                        data['deviceData']['sampleUri'] = uri
+                        data['deviceData']['sampleUri'] = _sample_path_to_uri(update['path'])
                         # Update slice playback parameters if given
+                        new_playback_start = update.get('playback_start')
+                        new_playback_length = update.get('playback_length')
                         if new_playback_start is not None or new_playback_length is not None:
                             if 'parameters' not in data:
                                 data['parameters'] = {}
@@ -51,31 +62,156 @@ def update_drum_cell_sample(preset_path, pad_number, new_sample_path, new_playba
                                 data['parameters']['Voice_PlaybackStart'] = float(new_playback_start)
                             if new_playback_length is not None:
                                 data['parameters']['Voice_PlaybackLength'] = float(new_playback_length)
-                        found[0] = True
                     current_pad[0] += 1
-                    
+
                 for value in data.values():
-                    if not found[0]:  # Only continue searching if we haven't found it yet
+                    if pending:  # Only continue searching while pads are left
                         update_drum_cells(value)
             elif isinstance(data, list):
                 for item in data:
-                    if not found[0]:  # Only continue searching if we haven't found it yet
+                    if pending:
                         update_drum_cells(item)
-                        
+
         update_drum_cells(preset_data)
-        
-        if not found[0]:
-            return False, f"Could not find pad {pad_number} in preset"
-            
+
+        if pending:
+            missing = ", ".join(str(p) for p in sorted(pending))
+            return False, f"Could not find pad {missing} in preset"
+
         # Save the modified preset
         with open(preset_path, 'w') as f:
             json.dump(preset_data, f, indent=2)
-            
-        return True, f"Updated sample URI for pad {pad_number}"
-        
+
+        pads = ", ".join(str(p) for p in sorted(int(p) for p in updates))
+        return True, f"Updated sample URI for pad {pads}"
+
     except Exception as e:
         return False, f"Error updating drum cell sample: {e}"
 
+
+def update_drum_cell_sample(preset_path, pad_number, new_sample_path, new_playback_start=None, new_playback_length=None):
+    """
+    Update the sample URI for a specific drum cell in a preset.
+    
+    Args:
+        preset_path: Path to the .ablpreset file
+        pad_number: The pad number to update
+        new_sample_path: The new sample path to set
+        
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    return update_drum_cell_samples(preset_path, {
+        pad_number: {
+            'path': new_sample_path,
+            'playback_start': new_playback_start,
+            'playback_length': new_playback_length,
+        }
+    })
+
+def stretched_sample_path(sample_path, pad_number, bpm, measures, preserve_pitch=True):
+    """Return the output path for a pad's sample stretched to BPM/measures."""
+    sample_dir = os.path.dirname(sample_path)
+    sample_basename = os.path.splitext(os.path.basename(sample_path))[0]
+    # Format BPM and measures as strings preserving decimals
+    suffix = 'stretched' if preserve_pitch else 'repitched'
+    output_filename = f"{sample_basename}-slice{pad_number}-{suffix}-{bpm:g}-{measures:g}.wav"
+    return os.path.join(sample_dir, output_filename)
+
+
+def batch_time_stretch(preset_path, bpm, measures, pads=None, preserve_pitch=True, algorithm='rubberband'):
+    """
+    Stretch the slices of several pads to ``measures`` bars at ``bpm``.
+
+    Each pad's sample is stretched so its slice lasts the target duration.
+    Pads sharing a sample and slice length share one render, and the
+    renders run concurrently on the DSP pool.  All preset changes are
+    written at once and a single library refresh is scheduled at the end.
+
+    Args:
+        preset_path: Path to the drum rack preset
+        bpm, measures: Target tempo and length in 4/4 bars
+        pads: Pad numbers to stretch; every pad with a sample if ``None``
+
+    Returns:
+        dict: ``success``, ``message``, ``stretched`` ({pad: new path}) and
+        ``failed`` ({pad: error message})
+    """
+    target_duration = (60.0 / bpm) * 4 * measures
+    samples_info = get_drum_cell_samples(preset_path)
+    if not samples_info['success']:
+        return {'success': False, 'message': samples_info['message'], 'stretched': {}, 'failed': {}}
+
+    wanted = {int(p) for p in pads} if pads else None
+    failed = {}
+    if wanted is not None:
+        known = {sample['pad'] for sample in samples_info['samples']}
+        for pad in wanted - known:
+            failed[pad] = "No drum cell on this pad"
+    renders = {}  # (sample path, full duration) -> pads
+    for sample in samples_info['samples']:
+        pad = sample['pad']
+        if wanted is not None and pad not in wanted:
+            continue
+        if not sample['path'] or sample['duration'] is None:
+            if wanted is not None:
+                failed[pad] = "No readable sample"
+            continue
+        playback_length = float(sample.get('playback_length', 1.0)) or 1.0
+        # Compute full-stretch duration so the slice maps to the target
+        full_duration = round(target_duration / playback_length, 6)
+        renders.setdefault((sample['path'], full_duration), []).append(pad)
+    if not renders:
+        return {'success': False, 'message': "No samples to stretch", 'stretched': {}, 'failed': failed}
+
+    stretched = {}
+    stretch = bind_current_job(time_stretch_wav)
+    with ThreadPoolExecutor(max_workers=max(1, DSP_MAX_CONCURRENT)) as executor:
+        futures = {
+            executor.submit(
+                stretch,
+                path,
+                duration,
+                stretched_sample_path(path, pad_list[0], bpm, measures, preserve_pitch),
+                preserve_pitch=preserve_pitch,
+                algorithm=algorithm,
+                refresh=False,
+            ): pad_list
+            for (path, duration), pad_list in renders.items()
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            pad_list = futures[future]
+            success, message, new_path = future.result()
+            for pad in pad_list:
+                if success:
+                    stretched[pad] = new_path
+                else:
+                    failed[pad] = message
+            report_progress(0.9 * done / len(futures), f"Stretched {done} of {len(futures)} samples")
+
+    if stretched:
+        report_progress(0.95, "Updating preset")
+        success, message = update_drum_cell_samples(
+            preset_path, {pad: {'path': path} for pad, path in stretched.items()}
+        )
+        if not success:
+            return {'success': False, 'message': message, 'stretched': {}, 'failed': failed}
+        changed = {os.path.dirname(os.path.abspath(p)) for p in stretched.values()}
+        changed.add(os.path.dirname(os.path.abspath(preset_path)))
+        refresh = refresh_library(paths=sorted(changed), wait=False)
+        refresh_success, refresh_message = refresh_summary(refresh)
+
+    message = f"Stretched {len(stretched)} pads to {measures:g} bars at {bpm:g} BPM."
+    if failed:
+        message += " Failed: " + "; ".join(f"pad {pad}: {msg}" for pad, msg in sorted(failed.items()))
+    result = {'success': bool(stretched), 'message': message, 'stretched': stretched, 'failed': failed}
+    if stretched:
+        result['refresh_id'] = refresh.refresh_id
+        if not refresh_success:
+            result['message'] += f" Library refresh failed: {refresh_message}"
+    return result
+
+
 def get_drum_cell_samples(preset_path):
     """
     Extract sample information from a preset's drum cells.
@@ -105,35 +241,13 @@ def get_drum_cell_samples(preset_path):
                     logger.debug("Processing drum cell:")
                     logger.debug("Sample URI: %s", sample_uri)
                     if sample_uri:
-                        # Handle Ableton URI format
-                        if sample_uri.startswith('ableton:/user-library/Samples/'):
-                            # Convert ableton:/user-library/Samples/ to /data/UserData/UserLibrary/Samples/
-                            sample_path = sample_uri.replace(
-                                'ableton:/user-library/Samples/',
-                                '/data/UserData/UserLibrary/Samples/',
-                            )
-                        elif sample_uri.startswith('ableton:/packs/'):
-                            # Convert ableton:/packs/<pack>/ to /data/CoreLibrary/
-                            # Strip the 'ableton:/packs/<pack>/' prefix
-                            parts = sample_uri.split('/', 3)
-                            if len(parts) >= 4:
-                                sample_path = '/data/CoreLibrary/' + parts[3]
-                            else:
-                                sample_path = sample_uri.split('file://')[-1]
-                        else:
-                            # Fallback to original file:// handling
-                            sample_path = sample_uri.split('file://')[-1]
-                        
-                        logger.debug("After path translation - Path: %s", sample_path)
+                        sample_path = sample_uri_to_path(sample_uri)
                         sample_name = os.path.basename(sample_path)
-                        # URL decode both
-                        sample_path = urllib.parse.unquote(sample_path)
-                        sample_name = urllib.parse.unquote(sample_name)
                         logger.debug("Final decoded path: %s", sample_path)
-                        logger.debug("Final decoded name: %s", sample_name)
                     else:
                         sample_path = ""
                         sample_name = "No sample loaded"
+                    info = probe_audio(sample_path) if sample_path else None
 
                     # New: Extract playback_start and playback_length from parameters
                     params = data.get('parameters', {})
@@ -146,7 +260,10 @@ def get_drum_cell_samples(preset_path):
                         'sample': sample_name,
                         'path': sample_path,
                         'playback_start': playback_start,
-                        'playback_length': playback_length
+                        'playback_length': playback_length,
+                        'duration': info['duration'] if info else None,
+                        'samplerate': info['samplerate'] if info else None,
+                        'channels': info['channels'] if info else None,
                     })
                     pad_counter[0] += 1
                     
@@ -197,37 +314,13 @@ def scan_for_drum_rack_presets():
                 'presets': []
             }
 
-        # Recursively scan all preset files (.ablpreset or .json)
-        for root, _, files in os.walk(presets_dir):
-            for filename in files:
-                lower = filename.lower()
-                if lower.endswith('.ablpreset') or lower.endswith('.json'):
-                    filepath = os.path.join(root, filename)
-                    try:
-                        with open(filepath, 'r') as f:
-                            preset_data = json.load(f)
-                            
-                        # Function to recursively search for drumRack devices
-                        def has_drum_rack(data):
-                            if isinstance(data, dict):
-                                if data.get('kind') == 'drumRack':
-                                    return True
-                                return any(has_drum_rack(v) for v in data.values())
-                            elif isinstance(data, list):
-                                return any(has_drum_rack(item) for item in data)
-                            return False
-
-                        # If preset contains a drumRack, add it to our list
-                        if has_drum_rack(preset_data):
-                            preset_name = os.path.splitext(filename)[0]
-                            drum_rack_presets.append({
-                                'name': preset_name,
-                                'path': filepath
-                            })
-
-                    except Exception as e:
-                        logger.warning("Could not parse preset %s: %s", filename, e)
-                        continue
+        # Look up drumRack presets in the shared classification table
+        for filepath, _ in classify_presets(presets_dir)["drumRack"]:
+            preset_name = os.path.splitext(os.path.basename(filepath))[0]
+            drum_rack_presets.append({
+                'name': preset_name,
+                'path': filepath
+            })
 
         set_cache(cache_key, drum_rack_presets)
         return {
@@ -0,0 +1,288 @@
+"""Process pool for CPU-heavy DSP work.
+
+numpy, librosa and Rubber Band calls used to run on the HTTP handler
+threads, so one long time-stretch could stall unrelated page loads.
+:func:`run_dsp` sends such calls to a separate pool of worker processes and
+waits for the result; the calling thread only pickles the arguments.
+
+The pool is started by the server with :func:`start_dsp_pool`.  Until then
+(and in tests) :func:`run_dsp` simply calls the function in-process.
+
+A task running longer than its timeout, or a worker that crashes, raises
+:class:`DSPError`.  The pool is then replaced with fresh workers; tasks
+that were running in the old pool at that moment fail as well.
+
+Every :func:`run_dsp` call first passes admission control: at most
+``DSP_MAX_CONCURRENT`` tasks run at once and the rest wait in FIFO order.
+Workers run at lowered priority (``DSP_NICE``), optionally pinned to
+``DSP_CPU_AFFINITY``, with BLAS thread pools capped at ``DSP_BLAS_THREADS``.
+"""
+
+import importlib.machinery
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from threading import Condition, Lock
+from typing import Optional
+
+from core import job_queue
+from core.config import (
+    DSP_BLAS_THREADS,
+    DSP_CPU_AFFINITY,
+    DSP_CPU_RESERVE,
+    DSP_MAX_CONCURRENT,
+    DSP_NICE,
+    DSP_POOL_WORKERS,
+    DSP_TASK_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Imported once by the fork server so workers start with them loaded.
+PRELOAD_MODULES = ("core.time_stretch_handler", "core.slice_handler")
+
+# Environment variables read by NumPy's BLAS backends and numexpr when they
+# create their thread pools.
+BLAS_THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+_lock = Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_workers = 0
+_preload: tuple = ()
+
+
+class DSPError(RuntimeError):
+    """Raised when a DSP task times out or its worker process dies."""
+
+
+class _Admission:
+    """FIFO admission queue limiting concurrently running DSP tasks."""
+
+    def __init__(self):
+        self._cond = Condition()
+        self._queue = deque()
+        self._running = 0
+        self._admitted = 0
+        self._waits = deque(maxlen=50)
+
+    def acquire(self, on_wait=None) -> float:
+        """Block until this caller may run; return the seconds waited.
+
+        ``on_wait`` is called with the caller's 1-based queue position
+        whenever it has to wait.
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while self._queue[0] is not ticket or self._running >= max(1, DSP_MAX_CONCURRENT):
+                    if on_wait is not None:
+                        on_wait(self._queue.index(ticket) + 1)
+                    self._cond.wait()
+            except BaseException:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._queue.popleft()
+            self._running += 1
+            self._admitted += 1
+            waited = time.monotonic() - start
+            self._waits.append(waited)
+            # The next caller may fit in a free slot as well.
+            self._cond.notify_all()
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def status(self) -> dict:
+        with self._cond:
+            waits = list(self._waits)
+            return {
+                "running": self._running,
+                "queued": len(self._queue),
+                "max_concurrent": max(1, DSP_MAX_CONCURRENT),
+                "admitted": self._admitted,
+                "last_wait": waits[-1] if waits else None,
+                "avg_wait": sum(waits) / len(waits) if waits else None,
+                "max_wait": max(waits) if waits else None,
+            }
+
+
+_admission = _Admission()
+
+
+def get_dsp_status() -> dict:
+    """Return admission queue depth and recent wait times for DSP tasks."""
+    status = _admission.status()
+    with _lock:
+        status["pool_workers"] = _workers if _executor is not None else 0
+    return status
+
+
+def _init_worker(nice, affinity, blas_threads) -> None:
+    """Lower the priority of a new worker process and limit its CPUs."""
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(blas_threads)
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError as e:
+            logger.warning("Could not lower DSP worker priority: %s", e)
+    if affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, affinity)
+        except OSError as e:
+            logger.warning("Could not set DSP worker CPU affinity: %s", e)
+
+
+def pool_size() -> int:
+    """Return the configured number of DSP worker processes."""
+    if DSP_POOL_WORKERS is not None:
+        return max(1, DSP_POOL_WORKERS)
+    return max(1, (os.cpu_count() or 1) - DSP_CPU_RESERVE)
+
+
+def _detach_main() -> None:
+    """Stop spawned workers from re-running the server script.
+
+    spawn and forkserver children import the parent's ``__main__`` file as
+    ``__mp_main__``; for move-webserver.py that means Flask, every handler
+    and the log file handler in each worker.  Giving a script-run main
+    module a ``__main__`` spec makes multiprocessing leave it alone, as it
+    does for ``python -m package``.  Task functions must therefore live in
+    importable modules, which :func:`run_dsp` already requires.
+    """
+    main = sys.modules.get("__main__")
+    if main is not None and getattr(main, "__spec__", None) is None:
+        main.__spec__ = importlib.machinery.ModuleSpec("__main__", None)
+
+
+def _context(preload):
+    # Forking the threaded server directly is unsafe; a fork server (or
+    # spawn where unavailable) gives workers a clean interpreter.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(list(preload))
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _create_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=_workers,
+        mp_context=_context(_preload),
+        initializer=_init_worker,
+        initargs=(DSP_NICE, DSP_CPU_AFFINITY, DSP_BLAS_THREADS),
+    )
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    """Shut ``executor`` down without waiting for stuck workers."""
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for proc in processes:
+        if proc.is_alive():
+            proc.terminate()
+
+
+def start_dsp_pool(workers: Optional[int] = None, preload=PRELOAD_MODULES) -> int:
+    """Start the DSP pool and return its number of workers.
+
+    Worker processes are created on demand as tasks arrive.
+    """
+    global _executor, _workers, _preload
+    with _lock:
+        if _executor is None:
+            # BLAS thread pools are sized when NumPy is imported, which the
+            # fork server does before any worker initializer runs.
+            for var in BLAS_THREAD_VARS:
+                os.environ.setdefault(var, str(DSP_BLAS_THREADS))
+            _workers = workers or pool_size()
+            _preload = tuple(preload)
+            _detach_main()
+            _executor = _create_executor()
+            logger.info("DSP pool started with %d workers", _workers)
+        return _workers
+
+
+def stop_dsp_pool() -> None:
+    """Stop the DSP pool; later :func:`run_dsp` calls run in-process."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        _terminate(executor)
+        logger.info("DSP pool stopped")
+
+
+def is_running() -> bool:
+    with _lock:
+        return _executor is not None
+
+
+def _replace(executor: ProcessPoolExecutor) -> None:
+    """Replace a broken or stuck pool, unless another thread already did."""
+    global _executor
+    with _lock:
+        if _executor is not executor:
+            return
+        _executor = _create_executor()
+    _terminate(executor)
+
+
+def run_dsp(func, *args, timeout: Optional[float] = None, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` in a DSP worker process and return the result.
+
+    The call waits for a free slot under admission control first; when it
+    runs inside a background job, the job's queue position and wait time
+    are updated.  ``func`` and its arguments must be picklable, so pass
+    module-level functions.  Exceptions raised by ``func`` are re-raised
+    here.  ``timeout`` (seconds, counted once the task is admitted) defaults
+    to ``DSP_TASK_TIMEOUT``.
+
+    Raises:
+        DSPError: the task timed out or its worker process crashed.
+    """
+    waited = _admission.acquire(job_queue.report_queue_position)
+    job_queue.report_queue_position(None, waited)
+    try:
+        return _run(func, args, kwargs, timeout)
+    finally:
+        _admission.release()
+
+
+def _run(func, args, kwargs, timeout):
+    with _lock:
+        executor = _executor
+    if executor is None:
+        return func(*args, **kwargs)
+
+    name = getattr(func, "__name__", repr(func))
+    timeout = DSP_TASK_TIMEOUT if timeout is None else timeout
+    try:
+        future = executor.submit(func, *args, **kwargs)
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        logger.error("DSP task %s timed out after %.1fs; restarting pool", name, timeout)
+        _replace(executor)
+        raise DSPError(f"{name} timed out after {timeout:g}s") from None
+    except BrokenProcessPool:
+        logger.error("DSP worker died while running %s; restarting pool", name)
+        _replace(executor)
+        raise DSPError(f"{name} crashed its worker process") from None
@@ -2,20 +2,30 @@ import os
 import json
 from typing import Callable, Tuple, Union, Optional
 
-from core.cache_manager import get_cache, set_cache
+from core.cache_manager import get_cache, set_cache, configure_namespace
+from core import preset_index, library_watcher
 
 _CACHE_PREFIX = "file_browser:"
 
+# One entry per listed directory; keep the most recently browsed ones.
+configure_namespace("file_browser", max_entries=256, max_bytes=2 * 1024 * 1024)
+
 
 def _list_directory(base_dir: str, rel_path: str) -> Tuple[list[str], list[str]]:
     """List subdirectories and files for the given path with caching.
 
     Cached entries are automatically invalidated if the directory's
-    modification time or entry count changes.
+    modification time or entry count changes.  While the library watcher
+    covers the directory it invalidates entries itself, so cached listings
+    are returned without touching the filesystem.  Listings that raced
+    with a change the watcher applied are returned but not stored.
     """
     abs_path = os.path.join(base_dir, rel_path)
     key = f"{_CACHE_PREFIX}{abs_path}"
     cached = get_cache(key)
+    if cached is not None and library_watcher.is_watched(abs_path):
+        return cached["dirs"], cached["files"]
+    generation = library_watcher.generation()
     try:
         mtime = os.stat(abs_path).st_mtime_ns
         entries = os.listdir(abs_path)
@@ -35,34 +45,18 @@ def _list_directory(base_dir: str, rel_path: str) -> Tuple[list[str], list[str]]
         elif os.path.isfile(full):
             files.append(name)
 
-    set_cache(key, {"dirs": dirs, "files": files, "mtime": mtime, "count": len(entries)})
+    entry = {"dirs": dirs, "files": files, "mtime": mtime, "count": len(entries)}
+    library_watcher.store_if_unchanged(generation, lambda: set_cache(key, entry))
     return dirs, files
 
 
 def _check_json_file(file_path: str, kind: str) -> bool:
-    """Check JSON file for a specific ``kind`` with caching.
+    """Check JSON file for a specific ``kind`` using the preset index.
 
-    Cached results are revalidated if the file's modification time changes.
+    The index re-reads the file only if its modification time or size
+    changes.
     """
-    key = f"{_CACHE_PREFIX}{kind}:{file_path}"
-    cached = get_cache(key)
-    try:
-        mtime = os.stat(file_path).st_mtime_ns
-    except FileNotFoundError:
-        return False
-
-    if cached is not None and cached.get("mtime") == mtime:
-        return cached.get("result", False)
-
-    try:
-        with open(file_path, "r") as f:
-            data = json.load(f)
-        result = _has_kind(data, kind)
-    except Exception:
-        result = False
-
-    set_cache(key, {"result": result, "mtime": mtime})
-    return result
+    return preset_index.has_kind(file_path, kind)
 
 
 def _has_kind(data: Union[dict, list], kind: str) -> bool:
@@ -145,4 +139,5 @@ def generate_dir_html(
                 '</li>'
             )
     html += '</ul>'
+    preset_index.flush_index()
     return html
@@ -0,0 +1,377 @@
+"""WSGI server pieces for the Move webserver.
+
+The standard library ``wsgiref`` server copies file responses through
+Python in 8 KB blocks.  :class:`SendfileRequestHandler` hands files
+returned via ``wsgi.file_wrapper`` (Flask's ``send_file``, the static
+route, bundle downloads) to ``os.sendfile`` instead, so the kernel copies
+them straight from the page cache to the socket.  Byte-range responses are
+sent the same way.  Responses that are not backed by a real file fall back
+to normal iteration.
+
+Two server engines are available (see :func:`make_http_server`):
+
+* ``threading`` - a thread per connection, one request per connection
+* ``keepalive`` - HTTP/1.1 persistent connections, including pipelined
+  requests, served by a bounded pool of worker threads.  Idle connections
+  are closed after ``HTTP_KEEPALIVE_TIMEOUT`` seconds, or within
+  ``IDLE_POLL_INTERVAL`` seconds when other connections are waiting for a
+  worker.
+"""
+
+import io
+import logging
+import os
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer, make_server
+from wsgiref.util import FileWrapper
+
+from core.config import (
+    HTTP_IO_TIMEOUT,
+    HTTP_KEEPALIVE_MAX_REQUESTS,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for one sendfile call; large files are sent in several calls.
+SENDFILE_CHUNK = 8 * 1024 * 1024
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Simple threading-capable WSGI server."""
+
+    daemon_threads = True
+
+
+class SendfileWrapper(FileWrapper):
+    """``wsgi.file_wrapper`` that exposes the file position.
+
+    werkzeug's range support seeks seekable wrappers to the start of the
+    range instead of reading and discarding the bytes before it.
+    """
+
+    def seekable(self):
+        return getattr(self.filelike, "seekable", lambda: False)()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.filelike.seek(offset, whence)
+
+    def tell(self):
+        return self.filelike.tell()
+
+
+class SendfileServerHandler(ServerHandler):
+    """Server handler that sends file responses with ``os.sendfile``."""
+
+    wsgi_file_wrapper = SendfileWrapper
+
+    def _file_source(self):
+        """Return ``(file, offset)`` if the response is a file, else ``None``."""
+        result = self.result
+        if isinstance(result, SendfileWrapper):
+            try:
+                return result.filelike, result.filelike.tell()
+            except (AttributeError, OSError):
+                return None
+        # werkzeug wraps the file in its (private) _RangeWrapper for 206
+        # responses; the range itself is described by the headers.
+        inner = getattr(result, "iterable", None)
+        start = getattr(result, "start_byte", None)
+        if isinstance(inner, SendfileWrapper) and isinstance(start, int):
+            return inner.filelike, start
+        return None
+
+    def result_is_file(self):
+        return hasattr(os, "sendfile") and self._file_source() is not None
+
+    def sendfile(self):
+        filelike, offset = self._file_source()
+        length = self.headers.get("Content-Length")
+        try:
+            in_fd = filelike.fileno()
+            out_fd = self.stdout.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return False
+        if length is None:
+            length = os.fstat(in_fd).st_size - offset
+        length = int(length)
+
+        if not self.headers_sent:
+            self.send_headers()
+        self._flush()
+        # Sockets with a timeout are non-blocking underneath.
+        timeout = getattr(getattr(self, "request_handler", None), "timeout", None)
+        sent = 0
+        while sent < length:
+            try:
+                count = os.sendfile(out_fd, in_fd, offset + sent, min(length - sent, SENDFILE_CHUNK))
+            except BlockingIOError:
+                if not select.select([], [out_fd], [], timeout)[1]:
+                    raise TimeoutError("Timed out sending file")
+                continue
+            if count == 0:
+                break
+            sent += count
+        self.bytes_sent = sent
+        if sent < length:
+            # The file shrank; the response is shorter than its
+            # Content-Length, so the connection cannot be reused.
+            logger.warning("File ended %d bytes short of the response length", length - sent)
+            request_handler = getattr(self, "request_handler", None)
+            if request_handler is not None:
+                request_handler.close_connection = True
+        return True
+
+
+class SendfileRequestHandler(WSGIRequestHandler):
+    """Request handler using :class:`SendfileServerHandler`."""
+
+    def handle(self):
+        """Handle a single HTTP request"""
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+
+        if not self.parse_request():
+            return
+
+        handler = SendfileServerHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=False,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI server handling connections on a bounded pool of threads."""
+
+    workers = HTTP_WORKERS
+
+    def __init__(self, server_address, RequestHandlerClass, bind_and_activate=True):
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http")
+        self._waiting = 0
+        self._active = 0
+        self._count_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._count_lock:
+            self._waiting += 1
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        with self._count_lock:
+            self._waiting -= 1
+            self._active += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._count_lock:
+                self._active -= 1
+
+    def connections_waiting(self):
+        """Return ``True`` if accepted connections are waiting for a worker."""
+        with self._count_lock:
+            return self._waiting > 0 and self._active >= self.workers
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _RequestBody(io.RawIOBase):
+    """``wsgi.input`` limited to the request's ``Content-Length``.
+
+    Whatever the application leaves unread is drained afterwards, so the
+    next request on the connection starts at the right byte.
+    """
+
+    def __init__(self, rfile, length):
+        self._rfile = rfile
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def readline(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.readline(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def drain(self):
+        while self.remaining and self.read(64 * 1024):
+            pass
+
+
+# Largest unread request body drained to keep a connection open.
+MAX_DRAIN = 1024 * 1024
+
+# Seconds between checks for queued connections while a connection is idle.
+IDLE_POLL_INTERVAL = 0.1
+
+
+class KeepAliveServerHandler(SendfileServerHandler):
+    """Server handler answering with HTTP/1.1 and persistent connections."""
+
+    http_version = "1.1"
+
+    def cleanup_headers(self):
+        super().cleanup_headers()
+        request_handler = self.request_handler
+        status = int(self.status.split(" ", 1)[0])
+        bodyless = (
+            status < 200 or status in (204, 304)
+            or self.environ.get("REQUEST_METHOD") == "HEAD"
+        )
+        # Without a length the end of the body is only marked by closing.
+        if not bodyless and "Content-Length" not in self.headers:
+            request_handler.close_connection = True
+        if request_handler.close_connection:
+            self.headers["Connection"] = "close"
+        elif request_handler.request_version == "HTTP/1.0":
+            self.headers["Connection"] = "keep-alive"
+
+    def handle_error(self):
+        self.request_handler.close_connection = True
+        super().handle_error()
+
+
+class KeepAliveRequestHandler(SendfileRequestHandler):
+    """Request handler serving several requests per connection."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm and delayed ACKs stall every response after the first.
+    disable_nagle_algorithm = True
+    # Bounds each socket read and write once a request has started; idle
+    # time between requests is limited by HTTP_KEEPALIVE_TIMEOUT instead.
+    timeout = HTTP_IO_TIMEOUT
+
+    def handle(self):
+        self.requests_served = 0
+        BaseHTTPRequestHandler.handle(self)
+
+    def _request_pending(self):
+        """Return ``True`` once the next request has started to arrive.
+
+        Waits up to ``HTTP_KEEPALIVE_TIMEOUT`` seconds in short slices and
+        gives up early when other connections are queued for a worker.
+        """
+        try:
+            # Pipelined requests may already sit in the read buffer.
+            self.connection.settimeout(0)
+            try:
+                if self.rfile.peek(1):
+                    return True
+            finally:
+                self.connection.settimeout(self.timeout)
+            deadline = time.monotonic() + HTTP_KEEPALIVE_TIMEOUT
+            while True:
+                wait = min(IDLE_POLL_INTERVAL, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+                if select.select([self.connection], [], [], wait)[0]:
+                    return True
+                if self.server.connections_waiting():
+                    return False
+        except (OSError, ValueError):
+            return False
+
+    def handle_one_request(self):
+        if not self._request_pending():
+            self.close_connection = True
+            return
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except (TimeoutError, ConnectionError):
+            self.close_connection = True
+            return
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+        if not self.parse_request():
+            return
+
+        self.requests_served += 1
+        if (
+            self.requests_served >= HTTP_KEEPALIVE_MAX_REQUESTS
+            or self.server.connections_waiting()
+        ):
+            self.close_connection = True
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # The app reads chunked bodies itself; the next request's
+            # position is unknown afterwards.
+            body = self.rfile
+            self.close_connection = True
+        else:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                self.send_error(400, "Bad Content-Length")
+                return
+            body = _RequestBody(self.rfile, length)
+
+        handler = KeepAliveServerHandler(
+            body, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=True,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+        if not self.close_connection and isinstance(body, _RequestBody):
+            if body.remaining > MAX_DRAIN:
+                self.close_connection = True
+            else:
+                try:
+                    body.drain()
+                except (TimeoutError, ConnectionError):
+                    self.close_connection = True
+
+
+ENGINES = {
+    "threading": (ThreadingWSGIServer, SendfileRequestHandler),
+    "keepalive": (PooledWSGIServer, KeepAliveRequestHandler),
+}
+
+
+def make_http_server(host, port, app, engine="keepalive"):
+    """Create a WSGI server for ``app`` using the named engine."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown server engine: {engine}")
+    server_class, handler_class = ENGINES[engine]
+    logger.info("Using %s server engine", engine)
+    return make_server(host, port, app, server_class=server_class, handler_class=handler_class)
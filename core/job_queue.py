@@ -0,0 +1,257 @@
+"""Background jobs for long-running audio operations.
+
+Time-stretching, transient detection and kit building can take longer than
+a browser or Wi-Fi connection is willing to wait.  :func:`submit_job` runs
+an existing core function on a small worker pool and returns a job id right
+away; :func:`get_job` reports the job's state, progress and result.
+
+A job function may call :func:`report_progress` to update its progress, and
+may return a dict with an ``artifact`` key naming a file (normally inside
+:func:`artifact_dir`).  The artifact is kept until it is collected with
+:func:`collect_artifact` and :func:`discard_job`, or until the job has been
+finished for ``JOB_RETENTION`` seconds.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional
+
+from core.config import JOB_ARTIFACT_DIR, JOB_RETENTION, JOB_WORKERS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_PUBLIC_FIELDS = (
+    "id", "kind", "state", "progress", "message", "result",
+    "created", "started", "finished", "queue_position", "wait_seconds",
+)
+
+_jobs: dict[str, dict] = {}
+_lock = Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_local = threading.local()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+        return _executor
+
+
+def artifact_dir(job_id: str) -> str:
+    """Return (and create) the directory holding ``job_id``'s artifacts."""
+    path = os.path.join(JOB_ARTIFACT_DIR, job_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _remove_artifacts(job_id: str) -> None:
+    shutil.rmtree(os.path.join(JOB_ARTIFACT_DIR, job_id), ignore_errors=True)
+
+
+def current_job_id() -> Optional[str]:
+    """Return the id of the job running on this thread, if any."""
+    job = getattr(_local, "job", None)
+    return job["id"] if job else None
+
+
+def bind_current_job(func):
+    """Return ``func`` wrapped to run as part of the current job.
+
+    Worker threads started by a job (e.g. a ``ThreadPoolExecutor`` fanning
+    out DSP calls) do not inherit the job, so queue positions reported by
+    :func:`core.dsp_pool.run_dsp` would be lost.  Outside a job ``func`` is
+    returned unchanged.
+    """
+    job = getattr(_local, "job", None)
+    if job is None:
+        return func
+
+    def run_in_job(*args, **kwargs):
+        previous = getattr(_local, "job", None)
+        _local.job = job
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.job = previous
+    return run_in_job
+
+
+def report_progress(fraction: float, message: Optional[str] = None) -> None:
+    """Update the progress of the job running on this thread.
+
+    ``fraction`` is clamped to ``0.0``–``1.0``.  Does nothing when called
+    outside a job, so core functions can report progress unconditionally.
+    """
+    job = getattr(_local, "job", None)
+    if job is None:
+        return
+    with _lock:
+        job["progress"] = min(1.0, max(0.0, float(fraction)))
+        if message is not None:
+            job["message"] = message
+
+
+def report_queue_position(position: Optional[int], waited: Optional[float] = None) -> None:
+    """Record the current job's place in the DSP admission queue.
+
+    ``position`` is the 1-based queue position, or ``None`` once the job
+    has been admitted; ``waited`` seconds are added to the job's total
+    ``wait_seconds``.  Does nothing when called outside a job.
+    """
+    job = getattr(_local, "job", None)
+    if job is None:
+        return
+    with _lock:
+        job["queue_position"] = position
+        if waited:
+            job["wait_seconds"] += waited
+        if position is not None:
+            job["message"] = f"Waiting for a free DSP slot (position {position})"
+
+
+def _run(job: dict, func, args, kwargs) -> None:
+    with _lock:
+        job["state"] = RUNNING
+        job["started"] = time.time()
+    _local.job = job
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+        with _lock:
+            job["state"] = FAILED
+            job["message"] = str(e)
+            job["result"] = {"success": False, "message": str(e)}
+    else:
+        artifact = None
+        if isinstance(result, dict) and "artifact" in result:
+            result = dict(result)
+            artifact = result.pop("artifact")
+        failed = isinstance(result, dict) and result.get("success") is False
+        with _lock:
+            job["state"] = FAILED if failed else DONE
+            job["progress"] = 1.0
+            job["result"] = result
+            job["artifact"] = artifact
+            if isinstance(result, dict) and result.get("message"):
+                job["message"] = result["message"]
+    finally:
+        _local.job = None
+        with _lock:
+            job["finished"] = time.time()
+        logger.info("Job %s (%s) %s", job["id"], job["kind"], job["state"])
+
+
+def submit_job(kind: str, func, *args, **kwargs) -> str:
+    """Run ``func(*args, **kwargs)`` in the background and return the job id."""
+    expire_jobs()
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "kind": kind,
+        "state": QUEUED,
+        "progress": 0.0,
+        "message": "",
+        "result": None,
+        "artifact": None,
+        "created": time.time(),
+        "started": None,
+        "finished": None,
+        "queue_position": None,
+        "wait_seconds": 0.0,
+    }
+    with _lock:
+        _jobs[job_id] = job
+    _get_executor().submit(_run, job, func, args, kwargs)
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Return a snapshot of the job's public state, or ``None`` if unknown.
+
+    The snapshot has ``artifact`` set to the artifact's file name when one
+    is waiting to be collected, and ``None`` otherwise.
+    """
+    expire_jobs()
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = {field: job[field] for field in _PUBLIC_FIELDS}
+        artifact = job["artifact"]
+    snapshot["artifact"] = os.path.basename(artifact) if artifact else None
+    return snapshot
+
+
+def collect_artifact(job_id: str) -> Optional[str]:
+    """Return the path of a finished job's artifact, if it still exists."""
+    with _lock:
+        job = _jobs.get(job_id)
+        artifact = job["artifact"] if job else None
+    if artifact and os.path.exists(artifact):
+        return artifact
+    return None
+
+
+def discard_job(job_id: str) -> bool:
+    """Forget a finished job and delete its artifacts.
+
+    Returns ``False`` if the job is unknown or still queued or running.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job["state"] not in (DONE, FAILED):
+            return False
+        del _jobs[job_id]
+    _remove_artifacts(job_id)
+    return True
+
+
+def expire_jobs(now: Optional[float] = None) -> int:
+    """Drop jobs finished more than ``JOB_RETENTION`` seconds ago.
+
+    Artifact folders left behind by a previous server run are removed once
+    they are older than the retention period.  Returns the number of jobs
+    and folders removed.
+    """
+    now = time.time() if now is None else now
+    with _lock:
+        expired = [
+            jid for jid, job in _jobs.items()
+            if job["finished"] is not None and now - job["finished"] > JOB_RETENTION
+        ]
+        for jid in expired:
+            del _jobs[jid]
+        active = set(_jobs)
+    for jid in expired:
+        _remove_artifacts(jid)
+
+    try:
+        names = os.listdir(JOB_ARTIFACT_DIR)
+    except OSError:
+        names = []
+    for name in names:
+        if name in active or name in expired:
+            continue
+        try:
+            if now - os.stat(os.path.join(JOB_ARTIFACT_DIR, name)).st_mtime > JOB_RETENTION:
+                _remove_artifacts(name)
+                expired.append(name)
+        except OSError:
+            continue
+    if expired:
+        logger.debug("Expired %d jobs", len(expired))
+    return len(expired)
@@ -0,0 +1,349 @@
+"""Background watcher that keeps library caches fresh.
+
+Without a watcher, cached directory listings and preset index entries are
+validated with ``stat`` calls on every request.  :class:`LibraryWatcher`
+follows the UserLibrary trees from a daemon thread and pushes targeted
+invalidations instead:
+
+* :func:`core.cache_manager.invalidate_path` for every changed path
+* :func:`core.preset_index.forget` plus the ``presets`` tag for Track Presets
+* :func:`core.list_msets_handler.update_msets_catalogue` for set folders
+
+On Linux the kernel's inotify API is used through ``ctypes``.  Elsewhere, or
+if inotify cannot be initialised, a pure-Python poller compares ``stat``
+snapshots of the trees on an interval.  While a watcher covers a path,
+:func:`is_watched` returns ``True`` and callers may trust their caches.
+
+A listing computed while a change is being applied could be stored after
+the change invalidated it.  Callers read :func:`generation` before touching
+the filesystem and store through :func:`store_if_unchanged`, which refuses
+results that predate the latest batch of changes.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+from typing import Callable, Iterable, Optional
+
+from core.config import MSETS_DIRECTORY, MSET_SAMPLE_PATH, TRACK_PRESETS_DIRECTORY
+from core.cache_manager import invalidate_path, invalidate_tag
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOTS = (MSET_SAMPLE_PATH, TRACK_PRESETS_DIRECTORY, MSETS_DIRECTORY)
+
+# Seconds between snapshots when falling back to polling.
+DEFAULT_POLL_INTERVAL = 5.0
+
+# Seconds to wait for further events before handling a batch.
+DEBOUNCE_SECONDS = 0.1
+
+# inotify event bits from <sys/inotify.h>.
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+_active: Optional["LibraryWatcher"] = None
+_active_lock = threading.Lock()
+
+# Bumped, together with the path invalidations, for every batch of changes.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _load_libc():
+    """Return libc if it exposes the inotify API, otherwise ``None``."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def _is_within(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def generation() -> int:
+    """Return the number of change batches applied so far."""
+    return _generation
+
+
+def store_if_unchanged(seen_generation: int, store: Callable[[], None]) -> bool:
+    """Call ``store()`` unless changes were applied since ``seen_generation``.
+
+    Returns ``True`` if ``store`` was called.
+    """
+    with _generation_lock:
+        if _generation != seen_generation:
+            return False
+        store()
+        return True
+
+
+def apply_changes(paths: Iterable[str]) -> None:
+    """Invalidate every cache that may describe one of ``paths``.
+
+    ``paths`` are absolute paths of files or directories that were created,
+    modified, removed or had their attributes changed.
+    """
+    global _generation
+    from core import preset_index
+    from core.list_msets_handler import update_msets_catalogue
+
+    paths = [os.path.normpath(path) for path in paths]
+    with _generation_lock:
+        _generation += 1
+        for path in paths:
+            invalidate_path(path)
+
+    presets_changed = False
+    set_dirs = set()
+    for path in paths:
+        if _is_within(path, TRACK_PRESETS_DIRECTORY):
+            preset_index.forget(path)
+            presets_changed = True
+        elif path != MSETS_DIRECTORY and _is_within(path, MSETS_DIRECTORY):
+            uuid = os.path.relpath(path, MSETS_DIRECTORY).split(os.sep, 1)[0]
+            set_dirs.add(os.path.join(MSETS_DIRECTORY, uuid))
+    if presets_changed:
+        invalidate_tag("presets")
+    for set_dir in set_dirs:
+        update_msets_catalogue(set_dir)
+
+
+class LibraryWatcher:
+    """Watch ``roots`` recursively and invalidate caches on changes.
+
+    ``use_inotify`` may be set to ``False`` to force the polling fallback.
+    """
+
+    def __init__(self, roots=DEFAULT_ROOTS, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+        self.roots = [os.path.normpath(os.path.abspath(r)) for r in roots if os.path.isdir(r)]
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+        self._libc = _load_libc() if use_inotify else None
+        self._fd: Optional[int] = None
+        self._wds: dict[int, str] = {}
+        # Directories created after start that could not be watched.
+        self._unwatched: set[str] = set()
+        self._snapshot: dict[str, tuple] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- lifecycle -----------------------------------------------------
+
+    def start(self) -> bool:
+        """Start the watcher thread.  Returns ``False`` if nothing is watched."""
+        if not self.roots:
+            logger.info("Library watcher not started: no library directories found")
+            return False
+        if self._libc is not None and self._init_inotify():
+            self.mode = "inotify"
+            target = self._run_inotify
+        else:
+            self.mode = "poll"
+            self._snapshot = self._take_snapshot()
+            target = self._run_poll
+        self._thread = threading.Thread(target=target, name="library-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Library watcher started (%s) on %s", self.mode, ", ".join(self.roots))
+        return True
+
+    def stop(self) -> None:
+        """Stop the watcher thread and release inotify resources."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.poll_interval, 1.0) + 1.0)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._wds.clear()
+        self._unwatched.clear()
+
+    def covers(self, path: str) -> bool:
+        """Return ``True`` while the thread runs and ``path`` is below a root.
+
+        Paths below a directory that could not be watched are not covered.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        path = os.path.normpath(os.path.abspath(path))
+        if any(_is_within(path, d) for d in list(self._unwatched)):
+            return False
+        return any(_is_within(path, root) for root in self.roots)
+
+    # -- inotify -------------------------------------------------------
+
+    def _init_inotify(self) -> bool:
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logger.warning("inotify_init1 failed: %s", os.strerror(ctypes.get_errno()))
+            return False
+        self._fd = fd
+        for root in self.roots:
+            if not self._add_tree(root):
+                os.close(fd)
+                self._fd = None
+                self._wds.clear()
+                return False
+        return True
+
+    def _add_watch(self, path: str) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return True
+            logger.warning("Cannot watch %s: %s", path, os.strerror(err))
+            return False
+        self._wds[wd] = path
+        return True
+
+    def _add_tree(self, root: str) -> bool:
+        """Watch ``root`` and every directory below it."""
+        for dirpath, _, _ in os.walk(root):
+            if not self._add_watch(dirpath):
+                return False
+        return True
+
+    def _read_events(self) -> list[tuple[str, int]]:
+        """Return ``(path, mask)`` pairs for all queued events."""
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.extend((root, mask) for root in self.roots)
+                continue
+            base = self._wds.get(wd)
+            if base is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._wds[wd]
+                continue
+            path = os.path.join(base, os.fsdecode(name)) if name else base
+            events.append((path, mask))
+        return events
+
+    def _run_inotify(self) -> None:
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            events = self._read_events()
+            # Coalesce bursts such as a sample copy or a set restore.
+            while select.select([self._fd], [], [], DEBOUNCE_SECONDS)[0]:
+                events.extend(self._read_events())
+            changed = []
+            for path, mask in events:
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    if self._add_tree(path):
+                        self._unwatched.discard(path)
+                    else:
+                        # Callers go back to validating this subtree.
+                        logger.warning("Not watching %s; its caches are validated on use", path)
+                        self._unwatched.add(path)
+                if path not in changed:
+                    changed.append(path)
+            self._dispatch(changed)
+
+    # -- polling fallback ----------------------------------------------
+
+    def _take_snapshot(self) -> dict[str, tuple]:
+        """Return ``{path: (mtime_ns, ctime_ns, size)}`` for every entry."""
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                for name in [""] + dirnames + filenames:
+                    path = os.path.join(dirpath, name) if name else dirpath
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+        return snapshot
+
+    def poll_once(self) -> list[str]:
+        """Compare a fresh snapshot with the last one and dispatch changes."""
+        current = self._take_snapshot()
+        previous = self._snapshot
+        changed = [p for p, sig in current.items() if previous.get(p) != sig]
+        changed.extend(p for p in previous if p not in current)
+        self._snapshot = current
+        self._dispatch(changed)
+        return changed
+
+    def _run_poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.poll_once()
+
+    # -- dispatch ------------------------------------------------------
+
+    def _dispatch(self, paths: list[str]) -> None:
+        if not paths:
+            return
+        logger.debug("Library watcher saw %d changed paths", len(paths))
+        try:
+            apply_changes(paths)
+        except Exception as e:
+            logger.warning("Library watcher failed to apply changes: %s", e)
+
+
+def start_library_watcher(roots=DEFAULT_ROOTS, **kwargs) -> Optional[LibraryWatcher]:
+    """Start the shared watcher unless one is already running."""
+    global _active
+    with _active_lock:
+        if _active is not None:
+            return _active
+        watcher = LibraryWatcher(roots, **kwargs)
+        if not watcher.start():
+            return None
+        _active = watcher
+        return watcher
+
+
+def stop_library_watcher() -> None:
+    """Stop the shared watcher if it is running."""
+    global _active
+    with _active_lock:
+        watcher, _active = _active, None
+    if watcher is not None:
+        watcher.stop()
+
+
+def is_watched(path: str) -> bool:
+    """Return ``True`` if the running watcher reports changes below ``path``."""
+    watcher = _active
+    return watcher is not None and watcher.covers(path)
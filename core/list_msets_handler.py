@@ -1,31 +1,216 @@
 import os
+import logging
 import subprocess
+from threading import Lock
 from core.config import MSETS_DIRECTORY
+from core.cache_manager import get_cache, set_cache
+
+logger = logging.getLogger(__name__)
+
+_CATALOGUE_PREFIX = "msets_catalogue:"
+_catalogue_lock = Lock()
+
+# Whether ``os.listxattr``/``os.getxattr`` are available (Linux only).
+HAS_NATIVE_XATTR = hasattr(os, "listxattr") and hasattr(os, "getxattr")
+
+
+def _read_xattrs_native(path):
+    """Read all ``user.*`` attributes of ``path`` with ``os.getxattr``."""
+    attrs = {}
+    for name in os.listxattr(path):
+        if name.startswith("user."):
+            try:
+                attrs[name] = os.getxattr(path, name).decode("utf-8", "replace")
+            except OSError:
+                continue
+    return attrs
+
+
+def _read_xattrs_getfattr(path):
+    """Read all ``user.*`` attributes of ``path`` with one ``getfattr`` call."""
+    try:
+        output = subprocess.check_output(
+            ["getfattr", "--absolute-names", "-d", "-e", "text", "-m", r"^user\.", path],
+            encoding="utf-8",
+            stderr=subprocess.DEVNULL,
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return {}
+    attrs = {}
+    for line in output.splitlines():
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        name, value = line.split("=", 1)
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        attrs[name] = value
+    return attrs
+
+
+def read_xattrs(path):
+    """
+    Retrieve every ``user.*`` extended attribute of ``path`` in one pass.
+
+    Uses the ``listxattr``/``getxattr`` syscalls when available and falls
+    back to a single ``getfattr`` subprocess otherwise.
+
+    Args:
+        path (str): Path to the target file or directory.
+
+    Returns:
+        dict: Mapping of attribute names to string values. Missing or
+        unreadable attributes are simply absent.
+    """
+    if HAS_NATIVE_XATTR:
+        try:
+            return _read_xattrs_native(path)
+        except OSError:
+            return {}
+    return _read_xattrs_getfattr(path)
+
 
 def get_xattr_value(relative_path, attr):
     """
     Retrieve the extended attribute value for a given file or directory.
     
     Args:
-        relative_path (str): Path to the target file or directory.
+        relative_path (str): Path to the target file or directory, relative
+            to ``MSETS_DIRECTORY``.
         attr (str): The name of the extended attribute to retrieve.
     
     Returns:
         str: The value of the extended attribute, or "Unknown" if retrieval fails.
     """
+    path = os.path.join(MSETS_DIRECTORY, relative_path)
+    return read_xattrs(path).get(attr, "Unknown").strip()
+
+def _set_signature(uuid_path, mset_name):
+    """
+    Return the stat signature used to validate a cached set entry.
+
+    Extended attribute updates only touch the folder's ``ctime``, so it is
+    recorded next to the folder ``mtime`` and the ``Song.abl`` ``mtime``.
+    """
+    st = os.stat(uuid_path)
     try:
-        output = subprocess.check_output(
-            ["getfattr", "--only-values", "-n", attr, relative_path],
-            cwd=MSETS_DIRECTORY,
-            encoding="utf-8"
-        ).strip()
-        return output
-    except subprocess.CalledProcessError:
-        return "Unknown"
+        song_mtime = os.stat(os.path.join(uuid_path, mset_name, "Song.abl")).st_mtime_ns
+    except OSError:
+        song_mtime = None
+    return [st.st_mtime_ns, st.st_ctime_ns, song_mtime]
+
+
+def _read_mset(uuid, uuid_path):
+    """Read name and extended attributes of a set folder into a catalogue entry."""
+    # Retrieve Move set name (if available)
+    mset_folders = [f for f in os.listdir(uuid_path) if os.path.isdir(os.path.join(uuid_path, f))]
+    mset_name = mset_folders[0] if mset_folders else "Unknown"
+
+    # Retrieve all extended attributes in a single pass
+    attrs = read_xattrs(uuid_path)
+    mset_id = attrs.get("user.song-index", "Unknown").strip()
+    mset_color = attrs.get("user.song-color", "Unknown").strip()
+    mset_cloudstate = attrs.get("user.local-cloud-state", "Unknown").strip()
+    mset_modifiedtime = attrs.get("user.last-modified-time", "Unknown").strip()
+    mset_extmodified = attrs.get("user.was-externally-modified", "Unknown").strip()
+
+    record = {
+        "uuid": uuid,
+        "mset_name": mset_name,
+        "mset_id": int(mset_id) if mset_id.isdigit() else 9999,
+        "mset_color": mset_color if mset_color.isdigit() else "Unknown",
+        "mset_cloudstate": mset_cloudstate,
+        "mset_modifiedtime": mset_modifiedtime,
+        "mset_extmodified": mset_extmodified
+    }
+    return {"signature": _set_signature(uuid_path, mset_name), "record": record}
+
+
+def _catalogue_key():
+    # Deliberately not a bare path: invalidate_path() would drop the whole
+    # catalogue for any change below the Sets directory.  Changes reach it
+    # through update_msets_catalogue() one set at a time instead.
+    return f"{_CATALOGUE_PREFIX}root={MSETS_DIRECTORY}"
+
+
+def _get_mset(catalogue, uuid):
+    """Return the catalogue record for ``uuid``, re-reading it only if changed."""
+    uuid_path = os.path.join(MSETS_DIRECTORY, uuid)
+    entry = catalogue["sets"].get(uuid)
+    try:
+        if entry is not None and entry["signature"] == _set_signature(
+            uuid_path, entry["record"]["mset_name"]
+        ):
+            return entry["record"]
+        entry = _read_mset(uuid, uuid_path)
+    except OSError:
+        catalogue["sets"].pop(uuid, None)
+        return None
+    catalogue["sets"][uuid] = entry
+    return entry["record"]
+
+
+def msets_root_mtime():
+    """Return the ``mtime`` of ``MSETS_DIRECTORY`` in ns, or ``None``."""
+    try:
+        return os.stat(MSETS_DIRECTORY).st_mtime_ns
+    except OSError:
+        return None
+
+
+def update_msets_catalogue(path, root_mtime_before=None):
+    """
+    Refresh the cached catalogue after writing to a set folder.
+
+    Writers such as ``restore_ablbundle`` call this with the folder they
+    created or modified so the next listing does not need to rescan it.
+    Paths that are not set folders only refresh the directory listing.
+
+    The catalogue's directory ``mtime`` is only moved forward when the
+    writer passes the :func:`msets_root_mtime` it saw before writing and
+    the catalogue was current at that point; otherwise another change may
+    have happened in between and the next listing rescans the directory.
+
+    Args:
+        path (str): Path of the set folder (or file) inside ``MSETS_DIRECTORY``.
+        root_mtime_before (int, optional): ``msets_root_mtime()`` taken
+            before the write.
+    """
+    with _catalogue_lock:
+        key = _catalogue_key()
+        catalogue = get_cache(key)
+        if catalogue is None:
+            return
+        recorded_mtime = catalogue["root_mtime"]
+        uuid = os.path.basename(os.path.normpath(path))
+        uuid_path = os.path.join(MSETS_DIRECTORY, uuid)
+        if os.path.isdir(uuid_path):
+            try:
+                catalogue["sets"][uuid] = _read_mset(uuid, uuid_path)
+            except OSError:
+                catalogue["sets"].pop(uuid, None)
+            if uuid not in catalogue["uuids"]:
+                catalogue["uuids"].append(uuid)
+        else:
+            catalogue["sets"].pop(uuid, None)
+            if uuid in catalogue["uuids"]:
+                catalogue["uuids"].remove(uuid)
+        root_mtime = msets_root_mtime()
+        if root_mtime != recorded_mtime:
+            if recorded_mtime is None or recorded_mtime != root_mtime_before:
+                root_mtime = None
+            catalogue["root_mtime"] = root_mtime
+        # Re-store so the cache's size accounting sees the changes.
+        set_cache(key, catalogue)
+    logger.debug("Updated msets catalogue for %s", uuid)
+
 
 def list_msets(return_free_ids=False):
     """
     Retrieve a list of stored Move sets and available IDs.
+
+    Set metadata is kept in a catalogue validated against the Sets
+    directory ``mtime`` and each set folder's stat signature, so unchanged
+    sets are returned without reading their extended attributes.
     
     Args:
         return_free_ids (bool): Whether to also return available IDs.
@@ -43,33 +228,32 @@ def list_msets(return_free_ids=False):
             return msets, {"used": used_ids, "free": free}
         return msets
 
-    for uuid in os.listdir(MSETS_DIRECTORY):
-        uuid_path = os.path.join(MSETS_DIRECTORY, uuid)
-        if os.path.isdir(uuid_path):
-            # Retrieve Move set name (if available)
-            mset_folders = [f for f in os.listdir(uuid_path) if os.path.isdir(os.path.join(uuid_path, f))]
-            mset_name = mset_folders[0] if mset_folders else "Unknown"
-
-            # Retrieve extended attributes
-            mset_id = get_xattr_value(uuid, "user.song-index")
-            mset_color = get_xattr_value(uuid, "user.song-color")
-            mset_cloudstate = get_xattr_value(uuid, "user.local-cloud-state")
-            mset_modifiedtime = get_xattr_value(uuid, "user.last-modified-time")
-            mset_extmodified = get_xattr_value(uuid, "user.was-externally-modified")
-
-            mset_id_value = int(mset_id) if mset_id.isdigit() else 9999
-            msets.append({
-                "uuid": uuid,
-                "mset_name": mset_name,
-                "mset_id": mset_id_value,
-                "mset_color": mset_color if mset_color.isdigit() else "Unknown",
-                "mset_cloudstate": mset_cloudstate,
-                "mset_modifiedtime": mset_modifiedtime,
-                "mset_extmodified": mset_extmodified
-            })
-
-            if 0 <= mset_id_value <= 31:
-                used_ids.add(mset_id_value)
+    with _catalogue_lock:
+        key = _catalogue_key()
+        catalogue = get_cache(key)
+        if catalogue is None:
+            catalogue = {"root_mtime": None, "uuids": [], "sets": {}}
+            set_cache(key, catalogue)
+
+        root_mtime = os.stat(MSETS_DIRECTORY).st_mtime_ns
+        if catalogue["root_mtime"] != root_mtime:
+            catalogue["uuids"] = [
+                uuid for uuid in os.listdir(MSETS_DIRECTORY)
+                if os.path.isdir(os.path.join(MSETS_DIRECTORY, uuid))
+            ]
+            catalogue["root_mtime"] = root_mtime
+            for uuid in list(catalogue["sets"]):
+                if uuid not in catalogue["uuids"]:
+                    del catalogue["sets"][uuid]
+
+        for uuid in catalogue["uuids"]:
+            record = _get_mset(catalogue, uuid)
+            if record is None:
+                continue
+            msets.append(dict(record))
+            if 0 <= record["mset_id"] <= 31:
+                used_ids.add(record["mset_id"])
+        set_cache(key, catalogue)
 
     msets_sorted = sorted(msets, key=lambda x: x["mset_id"])
 
@@ -6,6 +6,8 @@ import os
 import shutil
 import logging
 from core.config import MELODIC_SAMPLER_SAMPLE_DIR
+from core.audio_probe import probe_audio
+from core.utils import sample_uri_to_path
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +56,7 @@ def get_melodic_sampler_sample(preset_path):
             "message": "Found sample",
             "sample_name": sample_name,
             "sample_path": sample_path,
+            "sample_info": probe_audio(sample_uri_to_path(sample_uri)),
         }
 
     except Exception as exc:
@@ -0,0 +1,99 @@
+"""Persistent cache of onset strength envelopes.
+
+Computing the onset envelope (decode, HPSS, spectrogram) dominates transient
+detection, while peak picking is cheap.  Envelopes are stored as ``.npz``
+files in ``ONSET_CACHE_DIR`` keyed by the audio content hash, sample rate
+and detection settings, so re-detecting a file with a different ``delta`` or
+``max_slices`` skips the expensive analysis, even across restarts.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+
+from core.config import ONSET_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Number of envelopes kept on disk; least recently used files are removed.
+MAX_ENTRIES = 64
+
+_CHUNK_SIZE = 1024 * 1024
+
+_lock = Lock()
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 hex digest of the file at ``path``."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(ONSET_CACHE_DIR, f"{key}.npz")
+
+
+def load_envelope(key: str) -> Optional[tuple[np.ndarray, int, float]]:
+    """Return ``(envelope, sr, duration)`` stored under ``key``, if present."""
+    path = _entry_path(key)
+    try:
+        with np.load(path) as data:
+            result = (data["envelope"], int(data["sr"]), float(data["duration"]))
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Discarding unreadable onset cache entry %s: %s", key, e)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    logger.debug("Onset cache hit for %s", key)
+    return result
+
+
+def store_envelope(key: str, envelope: np.ndarray, sr: int, duration: float) -> None:
+    """Save an envelope under ``key`` and prune old entries."""
+    try:
+        os.makedirs(ONSET_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=ONSET_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, envelope=envelope, sr=sr, duration=duration)
+        os.replace(tmp_path, _entry_path(key))
+    except Exception as e:
+        logger.warning("Could not save onset cache entry %s: %s", key, e)
+        return
+    _prune()
+
+
+def _prune() -> None:
+    """Remove the least recently used entries beyond ``MAX_ENTRIES``."""
+    with _lock:
+        try:
+            names = [n for n in os.listdir(ONSET_CACHE_DIR) if n.endswith(".npz")]
+        except OSError:
+            return
+        if len(names) <= MAX_ENTRIES:
+            return
+        entries = []
+        for name in names:
+            path = os.path.join(ONSET_CACHE_DIR, name)
+            try:
+                entries.append((os.stat(path).st_mtime_ns, path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[:len(entries) - MAX_ENTRIES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,253 @@
+"""Persistent on-disk index of Track Presets metadata.
+
+Scanning the preset library used to ``json.load`` every ``.ablpreset`` on each
+cache miss.  This module keeps a compact JSON index next to the server that
+records each preset's ``mtime``, ``size`` and the device kinds it contains.
+Only files whose ``mtime`` or ``size`` changed are parsed again, so refreshes
+after the first scan only cost a directory walk and a ``stat`` per file.
+"""
+
+import os
+import json
+import logging
+from threading import Lock
+from typing import Optional
+
+from core.config import PRESET_INDEX_PATH
+from core.cache_manager import get_cache, set_cache, configure_namespace
+from core import library_watcher
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Device kinds that mark a preset as a synth or a drum kit.
+SYNTH_KINDS = ("drift", "wavetable", "melodicSampler")
+DRUM_KINDS = ("drumRack",)
+
+# Device kinds tracked by the shared classification table.
+CLASSIFIED_KINDS = ("drift", "wavetable", "melodicSampler", "drumRack", "drumCell")
+
+PRESET_EXTENSIONS = (".ablpreset", ".json")
+
+# Classification tables are derived from Track Presets.
+configure_namespace("preset_kinds", tags=("presets",))
+
+_entries: dict[str, dict] = {}
+# Paths whose entries were checked against the file since the process started.
+_verified: set[str] = set()
+_loaded = False
+_dirty = False
+_lock = Lock()
+
+
+def _collect_kinds(data, kinds: list) -> None:
+    """Append every ``kind`` value in ``data`` in depth-first order."""
+    if isinstance(data, dict):
+        kind = data.get("kind")
+        if isinstance(kind, str) and kind not in kinds:
+            kinds.append(kind)
+        for value in data.values():
+            _collect_kinds(value, kinds)
+    elif isinstance(data, list):
+        for item in data:
+            _collect_kinds(item, kinds)
+
+
+def _build_entry(path: str, st: os.stat_result) -> dict:
+    """Parse ``path`` and return its index entry."""
+    kinds: list[str] = []
+    valid = True
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        _collect_kinds(data, kinds)
+    except Exception as e:
+        logger.warning("Could not parse preset %s: %s", os.path.basename(path), e)
+        valid = False
+    return {
+        "mtime": st.st_mtime_ns,
+        "size": st.st_size,
+        "kinds": kinds,
+        "synth": any(k in SYNTH_KINDS for k in kinds),
+        "drum": any(k in DRUM_KINDS for k in kinds),
+        "valid": valid,
+    }
+
+
+def _ensure_loaded() -> None:
+    """Load the index file once.  Must be called with ``_lock`` held."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    try:
+        with open(PRESET_INDEX_PATH, "r") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION:
+            _entries.update(data.get("presets", {}))
+            logger.debug("Loaded %d preset index entries", len(_entries))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Ignoring unreadable preset index %s: %s", PRESET_INDEX_PATH, e)
+
+
+def _lookup(path: str, st: os.stat_result) -> dict:
+    """Return a fresh entry for ``path``.  Must be called with ``_lock`` held."""
+    global _dirty
+    entry = _entries.get(path)
+    if entry is not None and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+        return entry
+    entry = _build_entry(path, st)
+    _entries[path] = entry
+    _dirty = True
+    return entry
+
+
+def _checked(path: str, st: os.stat_result, generation: int) -> dict:
+    """Like :func:`_lookup` but records ``path`` as verified.
+
+    ``path`` is not recorded if the watcher applied changes since
+    ``generation`` was read, as ``st`` may predate them.
+    """
+    entry = _lookup(path, st)
+    if library_watcher.generation() == generation:
+        _verified.add(path)
+    return entry
+
+
+def get_entry(path: str) -> Optional[dict]:
+    """Return the index entry for ``path``, re-reading it only when changed.
+
+    Returns ``None`` if the file does not exist.  While the library watcher
+    covers ``path``, verified entries are returned without a ``stat``.
+    """
+    global _dirty
+    if path in _verified and library_watcher.is_watched(path):
+        with _lock:
+            entry = _entries.get(path)
+        if entry is not None:
+            return entry
+    generation = library_watcher.generation()
+    try:
+        st = os.stat(path)
+    except OSError:
+        with _lock:
+            if _entries.pop(path, None) is not None:
+                _dirty = True
+            _verified.discard(path)
+        return None
+    with _lock:
+        _ensure_loaded()
+        return _checked(path, st, generation)
+
+
+def has_kind(path: str, kind: str) -> bool:
+    """Return ``True`` if the preset at ``path`` contains a device of ``kind``."""
+    entry = get_entry(path)
+    return bool(entry and kind in entry["kinds"])
+
+
+def scan_presets(presets_dir: str, extensions=PRESET_EXTENSIONS) -> list[tuple[str, dict]]:
+    """Walk ``presets_dir`` and return ``(path, entry)`` pairs for valid presets.
+
+    Entries below ``presets_dir`` whose files disappeared are dropped and the
+    index is written back to disk if anything changed.
+    """
+    global _dirty
+    found: list[tuple[str, dict]] = []
+    seen: set[str] = set()
+    generation = library_watcher.generation()
+    with _lock:
+        _ensure_loaded()
+        for root, _, files in os.walk(presets_dir):
+            for filename in files:
+                if not filename.lower().endswith(extensions):
+                    continue
+                filepath = os.path.join(root, filename)
+                try:
+                    st = os.stat(filepath)
+                except OSError:
+                    continue
+                seen.add(filepath)
+                entry = _checked(filepath, st, generation)
+                if entry["valid"]:
+                    found.append((filepath, entry))
+
+        prefix = os.path.join(presets_dir, "")
+        stale = [
+            p for p in _entries
+            if p.startswith(prefix) and p not in seen
+            and p.lower().endswith(extensions)
+        ]
+        for p in stale:
+            del _entries[p]
+            _verified.discard(p)
+        if stale:
+            _dirty = True
+    flush_index()
+    return found
+
+
+def classify_presets(presets_dir: str) -> dict[str, list[tuple[str, dict]]]:
+    """Return ``{kind: [(path, entry), ...]}`` for every kind in ``CLASSIFIED_KINDS``.
+
+    A single pass over ``presets_dir`` classifies each preset by all device
+    kinds it contains.  The table is cached so every editor shares one scan.
+    """
+    cache_key = f"preset_kinds:{presets_dir}"
+    cached = get_cache(cache_key)
+    if cached is not None:
+        return cached
+
+    by_kind: dict[str, list[tuple[str, dict]]] = {k: [] for k in CLASSIFIED_KINDS}
+    for path, entry in scan_presets(presets_dir):
+        for kind in entry["kinds"]:
+            if kind in by_kind:
+                by_kind[kind].append((path, entry))
+
+    set_cache(cache_key, by_kind)
+    return by_kind
+
+
+def flush_index() -> None:
+    """Write the index to ``PRESET_INDEX_PATH`` if it has unsaved changes."""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        payload = {"version": INDEX_VERSION, "presets": dict(_entries)}
+        _dirty = False
+    tmp_path = PRESET_INDEX_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, PRESET_INDEX_PATH)
+        logger.debug("Saved %d preset index entries", len(payload["presets"]))
+    except Exception as e:
+        logger.warning("Could not save preset index %s: %s", PRESET_INDEX_PATH, e)
+        with _lock:
+            _dirty = True
+
+
+def forget(path: str) -> None:
+    """Mark ``path`` and anything below it as needing a fresh ``stat``.
+
+    Called by the library watcher when a preset or folder changes.
+    """
+    path = os.path.normpath(path)
+    prefix = os.path.join(path, "")
+    with _lock:
+        for p in [p for p in _verified if p == path or p.startswith(prefix)]:
+            _verified.discard(p)
+
+
+def reset_index() -> None:
+    """Forget in-memory entries so the index is reloaded from disk."""
+    global _loaded, _dirty
+    with _lock:
+        _entries.clear()
+        _verified.clear()
+        _loaded = False
+        _dirty = False
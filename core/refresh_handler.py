@@ -1,29 +1,66 @@
 import subprocess
 import logging
-from core.cache_manager import invalidate_cache
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional
+
+from core.config import LIBRARY_REFRESH_WINDOW
+from core.cache_manager import invalidate_cache, invalidate_path, invalidate_tag
 
 logger = logging.getLogger(__name__)
 
-def refresh_library():
+# D-Bus command line tool; tests point this at a local stand-in.
+DBUS_SEND = "dbus-send"
+
+_lock = threading.Lock()
+# Serialises refreshCache calls so batches never overlap.
+_run_lock = threading.Lock()
+_pending: Optional[Future] = None
+_timer: Optional[threading.Timer] = None
+# Outcome of recent batches by refresh id, oldest first.
+_batches: "OrderedDict[int, dict]" = OrderedDict()
+_next_id = 1
+MAX_BATCHES = 64
+_status = {
+    "requests": 0,
+    "dbus_calls": 0,
+    "coalesced": 0,
+    "last_success": None,
+    "last_message": None,
+    "last_finished": None,
+}
+
+
+def _invalidate_local(paths, tags):
+    """Drop server-side cache entries for the changed locations."""
+    if paths is None and tags is None:
+        invalidate_cache()
+    else:
+        for path in paths or ():
+            invalidate_path(path)
+        for tag in tags or ():
+            invalidate_tag(tag)
+
+
+def _send_refresh():
     """
     Executes the dbus-send command to refresh the Move library cache.
-    This is required after adding or modifying files in the library to make them visible in Move.
-    
+
     The command uses the system D-Bus to communicate with Move's browser service:
     - Uses system bus (--system)
     - Calls method refreshCache on com.ableton.move.Browser interface
     - Destination is com.ableton.move
     - Object path is /com/ableton/move/browser
-    
+
     Returns:
         tuple: (success: bool, message: str)
-        - success: True if refresh succeeded, False otherwise
-        - message: Success or error message describing the result
     """
     try:
         # Construct D-Bus command to refresh Move's library cache
         cmd = [
-            "dbus-send",          # D-Bus command line tool
+            DBUS_SEND,            # D-Bus command line tool
             "--system",           # Use system bus (not session bus)
             "--type=method_call", # This is a method call (not a signal)
             "--dest=com.ableton.move",  # Target service
@@ -33,7 +70,6 @@ def refresh_library():
         ]
         # Execute command and capture output
         subprocess.check_output(cmd, stderr=subprocess.STDOUT)
-        invalidate_cache()
         logger.info("Library refreshed successfully.")
         return True, "Library refreshed successfully."
     except subprocess.CalledProcessError as e:
@@ -45,3 +81,127 @@ def refresh_library():
         # Handle any other unexpected errors
         logger.error("An error occurred while refreshing library: %s", e)
         return False, f"An error occurred while refreshing library: {e}"
+
+
+def _fire():
+    """Run the pending batch, if any, on the timer thread."""
+    global _pending, _timer
+    with _lock:
+        future, _pending, _timer = _pending, None, None
+    if future is None or not future.set_running_or_notify_cancel():
+        return
+    with _run_lock:
+        result = _send_refresh()
+    with _lock:
+        _status["dbus_calls"] += 1
+        _status["last_success"], _status["last_message"] = result
+        _status["last_finished"] = time.time()
+        batch = _batches.get(future.refresh_id)
+        if batch is not None:
+            batch.update(
+                state="done", success=result[0], message=result[1],
+                finished=_status["last_finished"],
+            )
+    future.set_result(result)
+
+
+def schedule_refresh(paths=None, tags=None, delay=None) -> Future:
+    """
+    Queue a Move library refresh and return a future for its result.
+
+    Local cache entries are invalidated immediately.  Requests arriving
+    within ``LIBRARY_REFRESH_WINDOW`` seconds of the first pending one share
+    a single ``refreshCache`` call, run on a background thread.  ``delay``
+    overrides the window; ``0`` sends the pending batch right away.
+
+    The future resolves to ``(success, message)`` as returned by
+    :func:`refresh_library`.  Its ``refresh_id`` attribute identifies the
+    batch for :func:`get_refresh_status`; coalesced requests share one id.
+    """
+    global _pending, _timer, _next_id
+    _invalidate_local(paths, tags)
+    delay = LIBRARY_REFRESH_WINDOW if delay is None else delay
+    with _lock:
+        _status["requests"] += 1
+        if _pending is None:
+            _pending = Future()
+            _pending.refresh_id = _next_id
+            _batches[_next_id] = {"id": _next_id, "state": "pending", "success": None,
+                                  "message": None, "finished": None}
+            _next_id += 1
+            while len(_batches) > MAX_BATCHES:
+                _batches.popitem(last=False)
+        else:
+            _status["coalesced"] += 1
+            if delay == 0 and _timer is not None:
+                _timer.cancel()
+                _timer = None
+        future = _pending
+        if _timer is None:
+            _timer = threading.Timer(delay, _fire)
+            _timer.daemon = True
+            _timer.start()
+    return future
+
+
+def get_refresh_status(refresh_id=None):
+    """Return counters and the outcome of the last ``refreshCache`` call.
+
+    With ``refresh_id`` the state of that batch is returned instead, or
+    ``None`` if it is unknown (or too old to be remembered).
+    """
+    with _lock:
+        if refresh_id is not None:
+            batch = _batches.get(refresh_id)
+            return dict(batch) if batch is not None else None
+        status = dict(_status)
+        status["pending"] = _pending is not None
+    return status
+
+
+def refresh_library(paths=None, tags=None, wait=True):
+    """
+    Refresh the Move library cache.
+    This is required after adding or modifying files in the library to make them visible in Move.
+
+    Args:
+        paths: Optional iterable of files or directories that were changed.
+            Only cache entries for these locations are invalidated.
+        tags: Optional iterable of cache tags to invalidate (e.g. ``"presets"``).
+        wait: When ``False`` the refresh is queued with :func:`schedule_refresh`
+            and its future is returned immediately.
+
+    When neither ``paths`` nor ``tags`` is given the entire local cache is
+    cleared.
+
+    Returns:
+        tuple: (success: bool, message: str)
+        - success: True if refresh succeeded, False otherwise
+        - message: Success or error message describing the result
+
+        With ``wait=False`` the :class:`~concurrent.futures.Future` of the
+        queued batch is returned instead; see :func:`refresh_summary`.
+    """
+    if not wait:
+        return schedule_refresh(paths, tags)
+    return schedule_refresh(paths, tags, delay=0).result()
+
+
+def refresh_summary(future):
+    """
+    Describe a queued refresh for a response message.
+
+    Returns:
+        tuple: (success: bool, message: str).  A refresh that has not run yet
+        counts as successful; its message names the id to pass to
+        ``/refresh/status?id=`` to learn the outcome.  If the previous
+        ``refreshCache`` call failed, that failure is reported instead so
+        it does not go unnoticed.
+    """
+    if future.done():
+        return future.result()
+    with _lock:
+        last_success, last_message = _status["last_success"], _status["last_message"]
+    if last_success is False:
+        return False, f"{last_message} (refresh {future.refresh_id} queued)"
+    return True, f"Library refresh {future.refresh_id} scheduled."
@@ -7,7 +7,7 @@ import uuid
 import logging
 import urllib.parse
 from datetime import datetime, timezone
-from core.list_msets_handler import list_msets_free
+from core.list_msets_handler import list_msets_free, msets_root_mtime, update_msets_catalogue
 from core.config import MSETS_DIRECTORY, MSET_INDEX_RANGE, MSET_COLOR_RANGE, MSET_SAMPLE_PATH, MSET_ABLETON_URI
 
 
@@ -55,6 +55,7 @@ def restore_ablbundle(ablbundle_path, mset_restoreid, mset_restorecolor):
     # Generate unique directory for set storage (UUIDv4)
     mset_uuid = str(uuid.uuid4())
     uuid_dir = os.path.join(MSETS_DIRECTORY, mset_uuid)
+    root_mtime_before = msets_root_mtime()
     os.makedirs(uuid_dir, exist_ok=True)
     
     # Extract Move set name from filename
@@ -105,6 +106,7 @@ def restore_ablbundle(ablbundle_path, mset_restoreid, mset_restorecolor):
         subprocess.run(["setfattr", "-n", "user.local-cloud-state", "-v", "notSynced", uuid_dir], check=True)
     except subprocess.CalledProcessError as e:
         return {"success": False, "message": f"Error setting attributes: {e}"}
+    update_msets_catalogue(uuid_dir, root_mtime_before)
     
     logging.info(f"Successfully restored {ablbundle_path} to {uuid_dir}")
     return {"success": True, "message": f"Successfully restored {mset_name} to pad {mset_restoreid}"} # with color {mset_restorecolor}"}
@@ -129,6 +131,7 @@ def restore_abl(abl_path, mset_restoreid, mset_restorecolor):
 
     mset_uuid = str(uuid.uuid4())
     uuid_dir = os.path.join(MSETS_DIRECTORY, mset_uuid)
+    root_mtime_before = msets_root_mtime()
     os.makedirs(uuid_dir, exist_ok=True)
 
     abl_filename = os.path.basename(abl_path)
@@ -171,6 +174,7 @@ def restore_abl(abl_path, mset_restoreid, mset_restorecolor):
         subprocess.run(["setfattr", "-n", "user.local-cloud-state", "-v", "notSynced", uuid_dir], check=True)
     except subprocess.CalledProcessError as e:
         return {"success": False, "message": f"Error setting attributes: {e}"}
+    update_msets_catalogue(uuid_dir, root_mtime_before)
 
     logging.info(f"Successfully restored {abl_path} to {uuid_dir}")
     return {"success": True, "message": f"Successfully restored {mset_name} to pad {mset_restoreid}"}
@@ -1,8 +1,16 @@
 import os
+import shutil
 import logging
+import tempfile
 import soundfile as sf
-from core.refresh_handler import refresh_library
-from core.cache_manager import get_cache, set_cache
+from core.refresh_handler import refresh_library, refresh_summary
+from core.cache_manager import get_cache, set_cache, configure_namespace
+
+# Recursive WAV listings can be large; only keep a few directories.
+configure_namespace("wav", max_entries=8)
+
+# Frames per block when reversing; ~1.5 MB for 24-bit stereo as int32.
+REVERSE_BLOCK_FRAMES = 1 << 16
 
 def get_wav_files(directory):
     """Retrieve WAV/AIFF files from ``directory`` using a cached result."""
@@ -22,6 +30,34 @@ def get_wav_files(directory):
     return audio_files
 
 
+def reverse_audio_file(src_path, dst_path, write_format, block_frames=REVERSE_BLOCK_FRAMES):
+    """
+    Write ``src_path`` reversed in time to ``dst_path``.
+
+    Blocks of ``block_frames`` frames are read from the end of the source
+    with ``SoundFile.seek`` and written reversed, so memory use is bounded by
+    the block size rather than the file length.  Samples are copied as
+    32-bit integers and the source subtype is kept, giving the same output
+    as reversing the whole file in memory.
+    """
+    with sf.SoundFile(src_path) as src:
+        with sf.SoundFile(
+            dst_path,
+            "w",
+            samplerate=src.samplerate,
+            channels=src.channels,
+            format=write_format,
+            subtype=src.subtype,
+        ) as dst:
+            position = src.frames
+            while position > 0:
+                count = min(block_frames, position)
+                position -= count
+                src.seek(position)
+                block = src.read(count, dtype="int32", always_2d=True)
+                dst.write(block[::-1])
+
+
 def reverse_wav_file(filename, directory):
     """
     Handles reversing and un-reversing of PCM audio files (WAV, AIFF), including 24-bit.
@@ -65,29 +101,29 @@ def reverse_wav_file(filename, directory):
         return False, f"Unsupported file extension: {ext_lower}", None
 
     try:
-        # Read audio using SoundFile as 32-bit integer data
-        info = sf.info(filepath)
-        data, samplerate = sf.read(filepath, dtype="int32")
-
-        # Reverse in time
-        reversed_data = data[::-1]
-
         # Ensure the output directory exists
         os.makedirs(os.path.dirname(new_filepath), exist_ok=True)
 
-        # Write out with correct format and subtype
-        sf.write(
-            new_filepath,
-            reversed_data,
-            samplerate,
-            format=write_format,
-            subtype=info.subtype,
+        # Reverse block by block into a temporary file, then move it into place
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(new_filepath), prefix=".reverse-", suffix=ext_lower
         )
+        os.close(fd)
+        try:
+            reverse_audio_file(filepath, tmp_path, write_format)
+            # mkstemp creates the file 0600; give it the source's permissions.
+            shutil.copymode(filepath, tmp_path)
+            os.replace(tmp_path, new_filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
         # Refresh library
-        refresh_success, refresh_message = refresh_library()
+        refresh_success, refresh_message = refresh_summary(refresh_library(
+            paths=[os.path.dirname(new_filepath)], wait=False
+        ))
         if refresh_success:
-            msg = f"Successfully created reversed file: {new_filename}. Library refreshed."
+            msg = f"Successfully created reversed file: {new_filename}. {refresh_message}"
         else:
             msg = f"Created reversed file: {new_filename}. Library refresh failed: {refresh_message}"
 
@@ -0,0 +1,149 @@
+"""Rubber Band time-stretching and pitch-shifting backed by RAM scratch files.
+
+``pyrubberband`` creates two temp files on the default temp directory (the
+Move's flash storage) for every call, and callers had to reassign its
+module-level binary path each time.  This backend resolves the bundled
+binary once and exchanges audio through a per-process scratch directory on
+tmpfs (``/dev/shm``) as 32-bit float WAV, so samples never hit the disk and
+need no format conversion.
+
+The bundled command line tool studies its whole input before processing
+and seeks back to the start, so it cannot read from a pipe; a RAM-backed
+file is the closest to streaming that it supports.
+"""
+
+import atexit
+import itertools
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+RUBBERBAND_BINARY = str(
+    Path(__file__).resolve().parents[1] / "bin" / "rubberband" / "rubberband"
+)
+
+# Candidate RAM-backed directories for exchange files, in order of preference.
+SCRATCH_ROOTS = ("/dev/shm",)
+
+_lock = Lock()
+_scratch = None  # (pid, path); re-created in forked worker processes
+_counter = itertools.count()
+
+
+def _remove_scratch(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_stale_scratch(root: str) -> None:
+    """Remove ``rubberband-<pid>`` directories of processes that have exited.
+
+    DSP workers killed by the pool never run their ``atexit`` handlers, so
+    their directories are collected here instead.
+    """
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        prefix, _, pid = name.partition("-")
+        if prefix != "rubberband" or not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        if not _pid_alive(int(pid)):
+            logger.debug("Removing stale scratch directory %s", name)
+            _remove_scratch(os.path.join(root, name))
+
+
+def scratch_dir() -> str:
+    """Return this process's scratch directory, creating it on first use.
+
+    The directory is named after the process id, so leftovers from dead
+    processes can be recognised and removed.
+    """
+    global _scratch
+    with _lock:
+        if _scratch is None or _scratch[0] != os.getpid():
+            root = next(
+                (r for r in SCRATCH_ROOTS if os.path.isdir(r) and os.access(r, os.W_OK)),
+                tempfile.gettempdir(),
+            )
+            _remove_stale_scratch(root)
+            path = os.path.join(root, f"rubberband-{os.getpid()}")
+            # A reused pid may have left files behind.
+            _remove_scratch(path)
+            os.mkdir(path, 0o700)
+            atexit.register(_remove_scratch, path)
+            _scratch = (os.getpid(), path)
+        return _scratch[1]
+
+
+def run_rubberband(y: np.ndarray, sr: int, options) -> np.ndarray:
+    """
+    Process ``y`` with the Rubber Band tool using command line ``options``.
+
+    ``y`` has shape ``(n,)`` or ``(n, channels)``; the result has the same
+    number of dimensions and dtype.
+
+    Raises:
+        RuntimeError: if the tool cannot be run or fails.
+    """
+    assert sr > 0
+    base = os.path.join(scratch_dir(), str(next(_counter)))
+    infile, outfile = base + "-in.wav", base + "-out.wav"
+    try:
+        sf.write(infile, y, sr, subtype="FLOAT")
+        subprocess.run(
+            [RUBBERBAND_BINARY, "-q", *[str(o) for o in options], infile, outfile],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        y_out, _ = sf.read(outfile, always_2d=True, dtype=y.dtype)
+    except OSError as exc:
+        raise RuntimeError(f"Failed to execute rubberband: {exc}") from exc
+    except subprocess.CalledProcessError as exc:
+        detail = exc.stderr.decode(errors="replace").strip() if exc.stderr else ""
+        raise RuntimeError(f"rubberband failed: {detail or exc}") from exc
+    finally:
+        for path in (infile, outfile):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    if y.ndim == 1:
+        y_out = np.squeeze(y_out, axis=1)
+    return y_out
+
+
+def time_stretch(y: np.ndarray, sr: int, rate: float) -> np.ndarray:
+    """Change the tempo of ``y`` by ``rate`` (> 1 is faster), keeping pitch."""
+    if rate <= 0:
+        raise ValueError("rate must be strictly positive")
+    if rate == 1.0:
+        return y
+    return run_rubberband(y, sr, ["--tempo", rate])
+
+
+def pitch_shift(y: np.ndarray, sr: int, n_steps: float) -> np.ndarray:
+    """Shift the pitch of ``y`` by ``n_steps`` semitones, keeping length."""
+    if n_steps == 0:
+        return y
+    return run_rubberband(y, sr, ["--pitch", n_steps])
@@ -3,6 +3,7 @@ import os
 from typing import Any, Dict, List, Tuple
 
 from core.set_backup_handler import backup_set, write_latest_timestamp
+from core.list_msets_handler import update_msets_catalogue
 from core.synth_preset_inspector_handler import (
     load_drift_schema,
     load_wavetable_schema,
@@ -310,6 +311,7 @@ def set_read_only(set_path: str, read_only: bool) -> Dict[str, Any]:
                     os.chmod(fpath, file_mode)
                 except Exception:
                     pass
+        update_msets_catalogue(root_dir)
 
         return {
             "success": True,
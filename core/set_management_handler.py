@@ -5,6 +5,7 @@ import mido
 from typing import Dict, List, Any, Optional
 
 from core.utils import load_set_template
+from core.list_msets_handler import msets_root_mtime, update_msets_catalogue
 
 def create_set(set_name):
     """
@@ -14,7 +15,9 @@ def create_set(set_name):
     os.makedirs(directory, exist_ok=True)
     path = os.path.join(directory, set_name)
     try:
+        root_mtime_before = msets_root_mtime()
         open(path, 'w').close()
+        update_msets_catalogue(path, root_mtime_before)
         return {'success': True, 'message': f"Set '{set_name}' created successfully", 'path': path}
     except Exception as e:
         return {'success': False, 'message': str(e)}
@@ -4,7 +4,10 @@ import json
 import shutil
 import zipfile
 import soundfile as sf
-from core.refresh_handler import refresh_library
+from core.refresh_handler import refresh_library, refresh_summary
+from core import onset_cache
+from core.audio_probe import probe_audio
+from core.dsp_pool import run_dsp
 
 import librosa
 import numpy as np
@@ -12,40 +15,91 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def detect_transients(filepath, max_slices=16, delta=0.07):
+# Onset detection engines.  ``hpss`` isolates the percussive component of
+# the full-rate signal first; ``fast`` takes a plain spectral-flux envelope of
+# a downsampled mono signal, skipping HPSS entirely.
+ONSET_ENGINES = ("hpss", "fast")
+
+# Hop size of the onset envelope per engine.  Both give ~2.9 ms frames at the
+# analysis rates below, so peak-picking windows cover the same time span.
+ONSET_HOPS = {"hpss": 128, "fast": 32}
+
+# Analysis sample rate of the fast engine.
+FAST_ONSET_SR = 11025
+
+
+def compute_onset_envelope(filepath, engine="hpss"):
+    """
+    Decode ``filepath`` and compute its onset strength envelope.
+
+    ``hpss`` isolates the percussive component with HPSS before taking the
+    Mel onset strength, for tighter drum transients.  ``fast`` resamples to
+    ``FAST_ONSET_SR`` and takes the spectral flux of a small Mel spectrogram.
+
+    Returns: (envelope, sr, duration)
+    """
+    hop = ONSET_HOPS[engine]
+    if engine == "fast":
+        y, sr = librosa.load(filepath, sr=FAST_ONSET_SR, mono=True, res_type="soxr_qq")
+        envelope = librosa.onset.onset_strength(
+            y=y, sr=sr, hop_length=hop, n_fft=512, n_mels=40
+        )
+        return envelope, sr, librosa.get_duration(path=filepath)
+    y, sr = librosa.load(filepath, sr=None, mono=True)
+    _, y_perc = librosa.effects.hpss(y)
+    envelope = librosa.onset.onset_strength(y=y_perc, sr=sr, hop_length=hop)
+    return envelope, sr, librosa.get_duration(y=y, sr=sr)
+
+
+def get_onset_envelope(filepath, engine="hpss", digest=None):
+    """
+    Return ``(envelope, sr, duration)`` for ``filepath`` using the onset cache.
+
+    Entries are keyed by engine, the file's content hash and sample rate, so
+    renamed or re-uploaded copies of the same audio reuse one analysis.
+    ``digest`` may be passed when the content hash is already known.
+    """
+    if engine not in ONSET_ENGINES:
+        raise ValueError(f"Unknown onset engine: {engine}")
+    try:
+        sr = sf.info(filepath).samplerate
+    except Exception:
+        sr = "native"
+    digest = digest or onset_cache.file_digest(filepath)
+    key = f"{engine}-{ONSET_HOPS[engine]}-{sr}-{digest}"
+    cached = onset_cache.load_envelope(key)
+    if cached is not None:
+        return cached
+    envelope, sr, duration = run_dsp(compute_onset_envelope, filepath, engine)
+    onset_cache.store_envelope(key, envelope, sr, duration)
+    return envelope, sr, duration
+
+
+def detect_transients(filepath, max_slices=16, delta=0.07, engine="hpss"):
     """
     Detect transient points (onsets) in the audio file.
+
+    The onset envelope is cached on disk, so calling again with a different
+    ``delta`` or ``max_slices`` only repeats the peak picking.
+
     Args:
         filepath: path to audio
         max_slices: maximum number of regions to return
         delta: sensitivity threshold for onset detection
+        engine: one of ``ONSET_ENGINES``
     Returns: regions list [{start, end}, ...] (in seconds, up to max_slices)
     """
-    # 1) Load audio and isolate percussive component for tighter drum transients
-    y, sr = librosa.load(filepath, sr=None, mono=True)
-    _, y_perc = librosa.effects.hpss(y)
+    o_env, sr, duration = get_onset_envelope(filepath, engine)
+    return regions_from_envelope(o_env, sr, duration, ONSET_HOPS[engine], max_slices, delta)
 
-    # 2) Compute Mel-based onset strength envelope
-    # higher time resolution for drum hits
-    hop_s = 128
-    o_env = librosa.onset.onset_strength(
-        y=y_perc,
-        sr=sr,
-        hop_length=hop_s,
-        n_mels=64,
-        fmax=sr // 2,
-        aggregate=np.median
-    )
 
-    # 3) Normalize envelope for consistent delta threshold
-    if o_env.max() > 0:
-        o_env = o_env / o_env.max()
-
-    # 4) Detect onsets with tuned parameters and backtracking
+def regions_from_envelope(o_env, sr, duration, hop_length, max_slices=16, delta=0.07):
+    """Peak-pick an onset envelope and return regions as ``detect_transients`` does."""
+    # Detect onsets with tuned parameters and backtracking
     onsets = librosa.onset.onset_detect(
-        y=y_perc,
+        onset_envelope=o_env,
         sr=sr,
-        hop_length=hop_s,
+        hop_length=hop_length,
         units='time',
         backtrack=True,
         pre_max=2,
@@ -55,11 +109,9 @@ def detect_transients(filepath, max_slices=16, delta=0.07):
         delta=delta
     ).tolist()
     if len(onsets) == 0:
-        duration = librosa.get_duration(y=y, sr=sr)
         return [{"start": 0.0, "end": duration}]
     # Start slices at the first detected transient rather than the file start
     slice_points = list(onsets)
-    duration = librosa.get_duration(y=y, sr=sr)
     if slice_points[-1] < duration:
         slice_points.append(duration)
     regions = []
@@ -304,12 +356,8 @@ def update_drumcell_sample_uris(data, slices_info, sliced_filename, current_inde
     """
     # Compute total_duration once
     if total_duration is None:
-        try:
-            import soundfile as sf
-            samples, samplerate = sf.read(sliced_filename, dtype='int32')
-            total_duration = len(samples) / samplerate
-        except Exception:
-            total_duration = 1.0  # fallback to prevent division by zero
+        info = probe_audio(sliced_filename)
+        total_duration = info["duration"] if info else 1.0  # fallback to prevent division by zero
     from urllib.parse import quote
     if isinstance(data, dict):
         if data.get("kind") == "drumCell" and "deviceData" in data and "sampleUri" in data["deviceData"]:
@@ -437,9 +485,8 @@ def process_kit(input_wav, preset_name=None, regions=None, num_slices=None, keep
             sliced_list = slice_wav(input_wav, regions=regions, num_slices=num_slices, target_directory=samples_folder)
             sliced_wav = sliced_list[0]
 
-            # Compute total duration of the audio file using SoundFile
-            data, samplerate = sf.read(sliced_wav, dtype='int32')
-            total_duration = len(data) / samplerate
+            # Compute total duration of the audio file from its header
+            total_duration = probe_audio(sliced_wav)["duration"]
 
             if regions:
                 slices_info = []
@@ -489,9 +536,8 @@ def process_kit(input_wav, preset_name=None, regions=None, num_slices=None, keep
             sliced_list = slice_wav(input_wav, regions=regions, num_slices=num_slices, target_directory=samples_target_dir)
             sliced_wav = sliced_list[0]
 
-            # Compute total duration of the audio file using SoundFile
-            data, samplerate = sf.read(sliced_wav, dtype='int32')
-            total_duration = len(data) / samplerate
+            # Compute total duration of the audio file from its header
+            total_duration = probe_audio(sliced_wav)["duration"]
 
             if regions:
                 slices_info = []
@@ -521,11 +567,16 @@ def process_kit(input_wav, preset_name=None, regions=None, num_slices=None, keep
                 return {'success': False, 'message': f"Could not write preset file: {e}"}
 
             # Refresh the library to show new files
-            refresh_success, refresh_message = refresh_library()
+            refresh = refresh_library(
+                paths=[samples_target_dir, presets_target_dir], tags=["presets"], wait=False
+            )
+            refresh_success, refresh_message = refresh_summary(refresh)
             if refresh_success:
-                return {'success': True, 'message': f"Preset {preset} automatically placed successfully. {refresh_message}"}
+                return {'success': True, 'refresh_id': refresh.refresh_id,
+                        'message': f"Preset {preset} automatically placed successfully. {refresh_message}"}
             else:
-                return {'success': True, 'message': f"Preset {preset} placed, but library refresh failed: {refresh_message}"}
+                return {'success': True, 'refresh_id': refresh.refresh_id,
+                        'message': f"Preset {preset} placed, but library refresh failed: {refresh_message}"}
 
         else:
             return {'success': False, 'message': "Invalid mode. Must be 'download' or 'auto_place'."}
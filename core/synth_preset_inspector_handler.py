@@ -2,10 +2,13 @@
 import os
 import json
 import logging
-from core.cache_manager import get_cache, set_cache
+from core.cache_manager import get_cache, set_cache, configure_namespace
+from core.preset_index import classify_presets
 
 logger = logging.getLogger(__name__)
 
+configure_namespace("synth_presets", tags=("presets",))
+
 # Paths to the instrument parameter schemas relative to the project root
 SCHEMA_PATH = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
@@ -835,8 +838,12 @@ def delete_parameter_mapping(preset_path, param_path):
         }
 
 def scan_for_synth_presets(device_types=("drift",)):
-    """Scan ``Track Presets`` for synth presets using a cache."""
-    cache_key = "synth_presets"
+    """Scan ``Track Presets`` for synth presets using a cache.
+
+    Results are cached per combination of ``device_types`` so the Drift,
+    Wavetable and melodicSampler editors never see each other's lists.
+    """
+    cache_key = "synth_presets:" + ",".join(sorted(device_types))
     cached = get_cache(cache_key)
     if cached is not None:
         return {
@@ -852,46 +859,31 @@ def scan_for_synth_presets(device_types=("drift",)):
 
         synth_presets = []
 
-        # Function to recursively search for specific device types
-        def has_device_type(data, device_types):
-            if isinstance(data, dict):
-                if data.get('kind') in device_types:
-                    return data.get('kind')
-                for v in data.values():
-                    result = has_device_type(v, device_types)
-                    if result:
-                        return result
-            elif isinstance(data, list):
-                for item in data:
-                    result = has_device_type(item, device_types)
-                    if result:
-                        return result
-            return None
-
-        # Scan all .ablpreset files in all subdirectories
-        for root, dirs, files in os.walk(presets_dir):
-            for filename in files:
-                if filename.endswith('.ablpreset'):
-                    filepath = os.path.join(root, filename)
-                    try:
-                        with open(filepath, 'r') as f:
-                            preset_data = json.load(f)
-
-                        # Check if preset contains one of the requested devices
-                        device_type = has_device_type(preset_data, device_types)
-                        if device_type:
-                            preset_name = os.path.splitext(filename)[0]
-                            rel = os.path.relpath(filepath, presets_dir)
-                            rel_no_ext = os.path.splitext(rel)[0]
-                            synth_presets.append({
-                                'name': preset_name,
-                                'path': filepath,
-                                'display_path': rel_no_ext,
-                                'type': device_type
-                            })
-                    except Exception as e:
-                        logger.warning("Could not parse preset %s: %s", filename, e)
-                        continue
+        # Look up the requested kinds in the shared classification table
+        by_kind = classify_presets(presets_dir)
+        matches = {}
+        for kind in device_types:
+            for filepath, entry in by_kind.get(kind, []):
+                if filepath.endswith('.ablpreset'):
+                    matches[filepath] = entry
+
+        for filepath in sorted(matches):
+            entry = matches[filepath]
+            # Report the first requested device found in the preset
+            device_type = next(
+                (k for k in entry["kinds"] if k in device_types), None
+            )
+            if device_type:
+                filename = os.path.basename(filepath)
+                preset_name = os.path.splitext(filename)[0]
+                rel = os.path.relpath(filepath, presets_dir)
+                rel_no_ext = os.path.splitext(rel)[0]
+                synth_presets.append({
+                    'name': preset_name,
+                    'path': filepath,
+                    'display_path': rel_no_ext,
+                    'type': device_type
+                })
 
         set_cache(cache_key, synth_presets)
         return {
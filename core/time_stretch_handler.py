@@ -1,26 +1,152 @@
+import io
 import os
 from pathlib import Path
 import soundfile as sf
-import pyrubberband.pyrb as pyrb
 import librosa
 import numpy as np
 from audiotsm.io.array import ArrayReader, ArrayWriter
 from audiotsm import wsola
 
-from core.refresh_handler import refresh_library
+from core.refresh_handler import refresh_library, refresh_summary
+from core.audio_probe import probe_audio
+from core.dsp_pool import run_dsp
+from core import derived_audio
+from core import rubberband
+
+TIME_STRETCH_ALGORITHMS = ("rubberband", "wsola", "phase")
+
+# Algorithms fast enough to audition a stretch before committing to it.
+PREVIEW_ALGORITHMS = ("wsola", "phase")
 
 
 def get_rubberband_binary():
     """Return path to the bundled Rubber Band binary."""
-    return (
-        Path(__file__).resolve().parents[1] / "bin" / "rubberband" / "rubberband"
-    )
+    return Path(rubberband.RUBBERBAND_BINARY)
 
 
 def pitch_shift_array(data, sr, semitones):
     """Pitch-shift audio using Rubber Band while preserving length."""
-    pyrb.__RUBBERBAND_UTIL = str(get_rubberband_binary())
-    return pyrb.pitch_shift(data, sr, semitones)
+    return rubberband.pitch_shift(data, sr, semitones)
+
+def _stretch_array(y, sr, rate, preserve_pitch=True, algorithm='rubberband'):
+    """Return ``(audio, samplerate)`` with ``y`` sped up by ``rate``."""
+    if not preserve_pitch:
+        # Repitch by adjusting sample rate
+        return y, int(sr * rate)
+    if algorithm == 'rubberband':
+        try:
+            return rubberband.time_stretch(y, sr, rate), sr
+        except Exception:
+            if y.ndim > 1:
+                y_mono = np.mean(y, axis=1)
+            else:
+                y_mono = y
+            return librosa.effects.time_stretch(y_mono, rate=rate), sr
+    elif algorithm == 'wsola':
+        data = y if y.ndim == 1 else y.T
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+        reader = ArrayReader(data)
+        writer = ArrayWriter(data.shape[0])
+        tsm = wsola(data.shape[0])
+        tsm.set_speed(rate)
+        tsm.run(reader, writer)
+        y_stretched = writer.data
+        y_stretched = y_stretched.flatten() if y_stretched.shape[0] == 1 else y_stretched.T
+        return y_stretched, sr
+    elif algorithm == 'phase':
+        if y.ndim > 1:
+            y_mono = np.mean(y, axis=1)
+        else:
+            y_mono = y
+        return librosa.effects.time_stretch(y_mono, rate=rate), sr
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+
+def render_time_stretch(
+    input_path,
+    rate,
+    output_path,
+    preserve_pitch=True,
+    algorithm='rubberband',
+    write_format=None,
+    subtype=None,
+):
+    """
+    Decode ``input_path``, change its speed by ``rate`` and write ``output_path``.
+
+    This is the CPU-heavy part of :func:`time_stretch_wav` and runs in a DSP
+    worker process, so it must not touch server state such as caches.
+    """
+    # Load audio (preserve channels)
+    y, sr = sf.read(input_path, dtype='float32')
+    y_stretched, out_sr = _stretch_array(y, sr, rate, preserve_pitch, algorithm)
+    sf.write(output_path, y_stretched, out_sr, format=write_format, subtype=subtype)
+
+
+def render_stretch_preview(input_path, start, frames, rate, preserve_pitch=True,
+                           algorithm='wsola', mono=True):
+    """
+    Stretch ``frames`` frames of ``input_path`` from ``start`` and return WAV bytes.
+
+    Only the requested region is decoded.  Runs in a DSP worker process.
+    """
+    y, sr = sf.read(input_path, start=start, frames=frames, dtype='float32')
+    if mono and y.ndim > 1:
+        y = np.mean(y, axis=1)
+    y_stretched, out_sr = _stretch_array(y, sr, rate, preserve_pitch, algorithm)
+    buf = io.BytesIO()
+    sf.write(buf, y_stretched, out_sr, format='WAV', subtype='PCM_16')
+    return buf.getvalue()
+
+
+def time_stretch_preview(
+    input_path,
+    target_duration,
+    playback_start=0.0,
+    playback_length=1.0,
+    preserve_pitch=True,
+    algorithm='wsola',
+    mono=True,
+):
+    """
+    Render a quick preview of a pad's slice stretched to ``target_duration``.
+
+    ``playback_start`` and ``playback_length`` select the slice as fractions
+    of the file, as stored in drum cell presets.  Only ``PREVIEW_ALGORITHMS``
+    are accepted since Rubber Band is too slow for auditioning.  Nothing is
+    written to disk.
+
+    Returns:
+        tuple: (success: bool, message: str, wav_bytes: bytes or None)
+    """
+    if preserve_pitch and algorithm not in PREVIEW_ALGORITHMS:
+        return False, f"Unsupported preview algorithm: {algorithm}", None
+    info = probe_audio(input_path)
+    if info is None:
+        return False, "Could not read source file", None
+    start = int(max(0.0, playback_start) * info["frames"])
+    frames = min(int(playback_length * info["frames"]), info["frames"] - start)
+    if frames <= 0:
+        return False, "Slice is empty", None
+    if target_duration <= 0:
+        return False, "Invalid target duration.", None
+    rate = (frames / info["samplerate"]) / target_duration
+    try:
+        data = run_dsp(
+            render_stretch_preview,
+            input_path,
+            start,
+            frames,
+            rate,
+            preserve_pitch=preserve_pitch,
+            algorithm=algorithm,
+            mono=mono,
+        )
+    except Exception as e:
+        return False, f"Error rendering preview: {e}", None
+    return True, f"Preview stretched to {target_duration:.2f}s.", data
+
 
 def time_stretch_wav(
     input_path,
@@ -28,22 +154,31 @@ def time_stretch_wav(
     output_path,
     preserve_pitch=True,
     algorithm='rubberband',
+    refresh=True,
 ):
     """
     Time-stretch a WAV file to a target duration, keeping pitch constant.
 
+    If the same audio was already rendered with the same target duration,
+    pitch mode and algorithm, and that file is unchanged, its path is
+    returned instead of rendering ``output_path``.
+
     Args:
         input_path (str): Source WAV file path.
         target_duration (float): Desired output length in seconds.
         output_path (str): Path to save new file.
+        refresh (bool): Schedule a library refresh for the new file.  Batch
+            callers pass ``False`` and refresh once when done.
 
     Returns:
         tuple: (success: bool, message: str, output_path: str)
     """
     try:
         # Preserve original file format and subtype for writing (e.g., 24-bit WAV)
-        info = sf.info(input_path)
-        subtype = info.subtype
+        info = probe_audio(input_path)
+        if info is None:
+            return False, "Could not read source file", None
+        subtype = info["subtype"]
         # Determine format based on extension
         ext_lower = os.path.splitext(input_path)[1].lower()
         format_map = {
@@ -53,68 +188,55 @@ def time_stretch_wav(
         }
         write_format = format_map.get(ext_lower)
 
-        # Load audio (preserve channels)
-        y, sr = sf.read(input_path, dtype='float32')
-        if y.size == 0:
+        # Validate lengths from the header before decoding anything
+        if info["frames"] == 0:
             return False, "Source file duration is zero", None
-        if y.ndim == 1:
-            original_duration = len(y) / sr
-        else:
-            original_duration = y.shape[0] / sr
+        original_duration = info["duration"]
 
         # Compute stretch ratio
         rate = original_duration / target_duration
         if rate <= 0:
             return False, "Invalid target duration.", None
 
-        if preserve_pitch:
-            if algorithm == 'rubberband':
-                pyrb.__RUBBERBAND_UTIL = str(get_rubberband_binary())
-                try:
-                    y_stretched = pyrb.time_stretch(y, sr, rate)
-                except Exception:
-                    if y.ndim > 1:
-                        y_mono = np.mean(y, axis=1)
-                    else:
-                        y_mono = y
-                    y_stretched = librosa.effects.time_stretch(y_mono, rate=rate)
-                sf.write(output_path, y_stretched, sr, format=write_format, subtype=subtype)
-            elif algorithm == 'wsola':
-                data = y if y.ndim == 1 else y.T
-                if data.ndim == 1:
-                    data = data[np.newaxis, :]
-                reader = ArrayReader(data)
-                writer = ArrayWriter(data.shape[0])
-                tsm = wsola(data.shape[0])
-                tsm.set_speed(rate)
-                tsm.run(reader, writer)
-                y_stretched = writer.data
-                y_stretched = y_stretched.flatten() if y_stretched.shape[0] == 1 else y_stretched.T
-                sf.write(output_path, y_stretched, sr, format=write_format, subtype=subtype)
-            elif algorithm == 'phase':
-                if y.ndim > 1:
-                    y_mono = np.mean(y, axis=1)
-                else:
-                    y_mono = y
-                y_stretched = librosa.effects.time_stretch(y_mono, rate=rate)
-                sf.write(output_path, y_stretched, sr, format=write_format, subtype=subtype)
-            else:
-                return False, f"Unknown algorithm: {algorithm}", None
-        else:
-            # Repitch by adjusting sample rate
-            new_sr = int(sr * rate)
-            sf.write(
-                output_path,
-                y,
-                new_sr,
-                format=write_format,
-                subtype=subtype
-            )
+        if preserve_pitch and algorithm not in TIME_STRETCH_ALGORITHMS:
+            return False, f"Unknown algorithm: {algorithm}", None
+
+        # Reuse a file already rendered from the same audio and settings
+        params = {
+            "op": "time_stretch",
+            "duration": target_duration,
+            "preserve_pitch": bool(preserve_pitch),
+            "algorithm": algorithm if preserve_pitch else None,
+        }
+        digest = derived_audio.source_digest(input_path)
+        existing = derived_audio.find_derived(digest, params) if digest else None
+        if existing:
+            return True, f"Stretched to {target_duration:.2f}s (reused {os.path.basename(existing)}).", existing
+
+        # Decode and stretch in a DSP worker process
+        run_dsp(
+            render_time_stretch,
+            input_path,
+            rate,
+            output_path,
+            preserve_pitch=preserve_pitch,
+            algorithm=algorithm,
+            write_format=write_format,
+            subtype=subtype,
+        )
+
+        if digest:
+            derived_audio.record_derived(digest, params, output_path, source=input_path)
+
+        if not refresh:
+            return True, f"Stretched to {target_duration:.2f}s.", output_path
 
         # Refresh library
-        refresh_success, refresh_message = refresh_library()
+        refresh_success, refresh_message = refresh_summary(refresh_library(
+            paths=[os.path.dirname(os.path.abspath(output_path))], wait=False
+        ))
         if refresh_success:
-            msg = f"Stretched to {target_duration:.2f}s. Library refreshed."
+            msg = f"Stretched to {target_duration:.2f}s. {refresh_message}"
         else:
             msg = f"Stretched to {target_duration:.2f}s. Library refresh failed: {refresh_message}"
 
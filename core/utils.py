@@ -1,4 +1,5 @@
 import json
+import urllib.parse
 from typing import Any, Dict
 
 
@@ -10,3 +11,27 @@ def load_set_template(template_path: str) -> Dict[str, Any]:
     except Exception as e:
         raise Exception(f"Failed to load template: {str(e)}")
 
+
+
+def sample_uri_to_path(sample_uri: str) -> str:
+    """Translate a preset ``sampleUri`` into a decoded filesystem path.
+
+    ``ableton:/user-library/Samples/`` maps to the UserLibrary Samples folder,
+    ``ableton:/packs/<pack>/`` to ``/data/CoreLibrary/`` and ``file://`` URIs
+    to their path.
+    """
+    if sample_uri.startswith('ableton:/user-library/Samples/'):
+        sample_path = sample_uri.replace(
+            'ableton:/user-library/Samples/',
+            '/data/UserData/UserLibrary/Samples/',
+        )
+    elif sample_uri.startswith('ableton:/packs/'):
+        # Strip the 'ableton:/packs/<pack>/' prefix
+        parts = sample_uri.split('/', 3)
+        if len(parts) >= 4:
+            sample_path = '/data/CoreLibrary/' + parts[3]
+        else:
+            sample_path = sample_uri.split('file://')[-1]
+    else:
+        sample_path = sample_uri.split('file://')[-1]
+    return urllib.parse.unquote(sample_path)
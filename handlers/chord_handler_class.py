@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import logging
+import tempfile
+import soundfile as sf
+from handlers.base_handler import BaseHandler
+from core.chord_handler import build_chord_kit
+from core.job_queue import submit_job, artifact_dir, current_job_id
+
+logger = logging.getLogger(__name__)
+
+
+class ChordHandler(BaseHandler):
+    def _read_request(self, form):
+        """Validate the form and decode the uploaded source.
+
+        Returns ``(params, error_message)``; ``params`` holds the keyword
+        arguments for :func:`core.chord_handler.build_chord_kit`.
+        """
+        valid, error_response = self.validate_action(form, "chord_kit")
+        if not valid:
+            return None, error_response['message']
+        mode = form.getvalue('mode')
+        if mode not in ["download", "auto_place"]:
+            return None, "Bad Request: Invalid mode"
+        if not form.getvalue('chords'):
+            return None, "No chords given."
+        file_field = form.get('file')
+        if not getattr(file_field, 'filename', None):
+            return None, "No file provided."
+        try:
+            y, sr = sf.read(file_field.file, dtype="float32", always_2d=True)
+        except Exception as e:
+            return None, f"Could not read audio file: {e}"
+        return {
+            'y': y,
+            'sr': sr,
+            'source_name': os.path.basename(file_field.filename),
+            'chords': form.getvalue('chords'),
+            'preset_name': form.getvalue('preset_name'),
+            'mode': mode,
+            'keep_length': form.getvalue('keep_length') in ('1', 'on', 'true'),
+        }, None
+
+    def handle_post(self, form):
+        """Render a chord kit during the request.
+
+        In download mode the response carries the bundle as ``bundle_data``
+        together with its ``bundle_name``.
+        """
+        params, error = self._read_request(form)
+        if error:
+            return self.format_error_response(error)
+        if params['mode'] != "download":
+            result = build_chord_kit(**params)
+            if not result['success']:
+                return self.format_error_response(result['message'])
+            return self.format_success_response(result['message'])
+
+        work_dir = tempfile.mkdtemp(dir=self.upload_dir)
+        try:
+            result = build_chord_kit(**params, output_dir=work_dir)
+            if not result['success']:
+                return self.format_error_response(result['message'])
+            with open(result['bundle_path'], 'rb') as f:
+                data = f.read()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return self.format_success_response(
+            result['message'],
+            download=True,
+            bundle_name=os.path.basename(result['bundle_path']),
+            bundle_data=data,
+        )
+
+    def handle_submit_job(self, form):
+        """Render the chord kit in a background job and return the job id.
+
+        The upload is decoded before the job starts, so the job does not
+        depend on the request's file stream.
+        """
+        params, error = self._read_request(form)
+        if error:
+            return self.format_json_response({'success': False, 'message': error}, status=400)
+        job_id = submit_job('chord_kit', self._run_kit_job, params)
+        return self.format_json_response({'success': True, 'job_id': job_id})
+
+    def _run_kit_job(self, params):
+        """Job body for :meth:`handle_submit_job`."""
+        if params['mode'] == "download":
+            result = build_chord_kit(**params, output_dir=artifact_dir(current_job_id()))
+            if result['success']:
+                result['artifact'] = result.pop('bundle_path')
+            return result
+        return build_chord_kit(**params)
@@ -11,16 +11,23 @@ from core.drum_rack_inspector_handler import (
     get_drum_cell_samples,
     update_drum_cell_sample,
     find_original_sample,
+    batch_time_stretch,
+    stretched_sample_path,
 )
 from core.reverse_handler import reverse_wav_file
 from core.refresh_handler import refresh_library
-from core.time_stretch_handler import time_stretch_wav
+from core.time_stretch_handler import time_stretch_wav, time_stretch_preview, PREVIEW_ALGORITHMS
+from core.job_queue import submit_job, report_progress
 
 logger = logging.getLogger(__name__)
 
 class DrumRackInspectorHandler(BaseHandler):
-    def handle_get(self):
-        """Return file browser HTML for drum rack presets."""
+    def _browser_html(self):
+        """Return ``(base_dir, html)`` for the preset browser.
+
+        The browser lists the user's Track Presets (or the bundled examples
+        when they are missing) and ends with the read-only Core Library.
+        """
         base_dir = "/data/UserData/UserLibrary/Track Presets"
         if not os.path.exists(base_dir) and os.path.exists("examples/Track Presets"):
             base_dir = "examples/Track Presets"
@@ -39,6 +46,11 @@ class DrumRackInspectorHandler(BaseHandler):
         )
         if browser_html.endswith('</ul>'):
             browser_html = browser_html[:-5] + core_li + '</ul>'
+        return base_dir, browser_html
+
+    def handle_get(self):
+        """Return file browser HTML for drum rack presets."""
+        base_dir, browser_html = self._browser_html()
         return {
             'file_browser_html': browser_html,
             'message': '',
@@ -59,6 +71,8 @@ class DrumRackInspectorHandler(BaseHandler):
             return self.handle_reverse_sample(form)
         if action == 'time_stretch_sample':
             return self.handle_time_stretch_sample(form)
+        if action == 'time_stretch_kit':
+            return self.handle_time_stretch_kit(form)
         if action == 'revert_sample':
             return self.handle_revert_sample(form)
         # Validate preset selection action
@@ -82,24 +96,7 @@ class DrumRackInspectorHandler(BaseHandler):
                 result['samples'], preset_path, editable=not is_core
             )
 
-            base_dir = "/data/UserData/UserLibrary/Track Presets"
-            if not os.path.exists(base_dir) and os.path.exists("examples/Track Presets"):
-                base_dir = "examples/Track Presets"
-            browser_html = generate_dir_html(
-                base_dir,
-                "",
-                '/drum-rack-inspector',
-                'preset_select',
-                'select_preset',
-                filter_key='drumrack'
-            )
-            core_li = (
-                '<li class="dir closed" data-path="Core Library">'
-                '<span>📁 Core Library</span>'
-                '<ul class="hidden"></ul></li>'
-            )
-            if browser_html.endswith('</ul>'):
-                browser_html = browser_html[:-5] + core_li + '</ul>'
+            base_dir, browser_html = self._browser_html()
 
             msg = result['message']
             if is_core:
@@ -117,6 +114,86 @@ class DrumRackInspectorHandler(BaseHandler):
         except Exception as e:
             return self.format_error_response(f"Error processing preset: {str(e)}")
 
+    def handle_submit_job(self, form):
+        """Start a time-stretch in the background and return its job id."""
+        action = form.getvalue('action')
+        if action not in ('time_stretch_sample', 'time_stretch_kit'):
+            return self.format_json_response(
+                {'success': False, 'message': 'Only time stretching runs as a job.'}, status=400
+            )
+        preset_path = form.getvalue('preset_path')
+        if preset_path and preset_path.startswith(CORE_LIBRARY_DIR):
+            return self.format_json_response(
+                {'success': False, 'message': 'Core Library presets are read-only'}, status=400
+            )
+        if not form.getvalue('bpm') or not form.getvalue('measures'):
+            return self.format_json_response(
+                {'success': False, 'message': 'Missing BPM or measures'}, status=400
+            )
+        job_id = submit_job(action, self._run_time_stretch_job, form)
+        return self.format_json_response({'success': True, 'job_id': job_id})
+
+    def _run_time_stretch_job(self, form):
+        """Job body for :meth:`handle_submit_job`; returns the updated grid."""
+        if form.getvalue('action') == 'time_stretch_kit':
+            result = self.handle_time_stretch_kit(form)
+        else:
+            result = self.handle_time_stretch_sample(form)
+        return {
+            'success': result.get('message_type') != 'error',
+            'message': result.get('message', ''),
+            'message_type': result.get('message_type'),
+            'samples_html': result.get('samples_html', ''),
+        }
+
+    def handle_preview(self, form):
+        """Render a pad's slice stretched to BPM/measures and return WAV data.
+
+        The preview uses a fast algorithm and is not written to the library.
+        """
+        sample_path = form.getvalue('sample_path')
+        preset_path = form.getvalue('preset_path')
+        pad_number = form.getvalue('pad_number')
+        if not sample_path or not preset_path or not pad_number:
+            return self.format_json_response(
+                {'success': False, 'message': 'Missing sample, preset or pad'}, status=400
+            )
+        try:
+            target_duration = (60.0 / float(form.getvalue('bpm'))) * 4 * float(form.getvalue('measures'))
+        except (TypeError, ValueError, ZeroDivisionError):
+            return self.format_json_response(
+                {'success': False, 'message': 'Invalid BPM or measures values'}, status=400
+            )
+        preserve_pitch = form.getvalue('preserve_pitch') is not None
+        algorithm = form.getvalue('algorithm')
+        if algorithm not in PREVIEW_ALGORITHMS:
+            algorithm = 'wsola'
+        mono = form.getvalue('stereo') is None
+
+        samples_info = get_drum_cell_samples(preset_path)
+        if not samples_info['success']:
+            return self.format_json_response({'success': False, 'message': samples_info['message']}, status=400)
+        orig = next((s for s in samples_info['samples'] if int(s['pad']) == int(pad_number)), None)
+        playback_start = float(orig.get('playback_start', 0.0)) if orig else 0.0
+        playback_length = float(orig.get('playback_length', 1.0)) if orig else 1.0
+
+        success, message, wav_data = time_stretch_preview(
+            sample_path,
+            target_duration,
+            playback_start=playback_start,
+            playback_length=playback_length,
+            preserve_pitch=preserve_pitch,
+            algorithm=algorithm,
+            mono=mono,
+        )
+        if not success:
+            return self.format_json_response({'success': False, 'message': message}, status=400)
+        return {
+            'status': 200,
+            'headers': [('Content-Type', 'audio/wav'), ('Cache-Control', 'no-store')],
+            'content': wav_data,
+        }
+
     def get_preset_options(self):
         """Deprecated dropdown helper."""
         return ''
@@ -226,24 +303,7 @@ class DrumRackInspectorHandler(BaseHandler):
                     </form>
                 </div>
             '''
-            base_dir = "/data/UserData/UserLibrary/Track Presets"
-            if not os.path.exists(base_dir) and os.path.exists("examples/Track Presets"):
-                base_dir = "examples/Track Presets"
-            browser_html = generate_dir_html(
-                base_dir,
-                "",
-                '/drum-rack-inspector',
-                'preset_select',
-                'select_preset',
-                filter_key='drumrack'
-            )
-            core_li = (
-                '<li class="dir closed" data-path="Core Library">'
-                '<span>📁 Core Library</span>'
-                '<ul class="hidden"></ul></li>'
-            )
-            if browser_html.endswith('</ul>'):
-                browser_html = browser_html[:-5] + core_li + '</ul>'
+            base_dir, browser_html = self._browser_html()
             return {
                 'file_browser_html': browser_html,
                 'message': '',
@@ -275,16 +335,11 @@ class DrumRackInspectorHandler(BaseHandler):
             return self.format_error_response("Invalid BPM or measures values")
 
         # Step 3: Time-stretch the file and update the preset
-        import os
-        sample_dir = os.path.dirname(sample_path)
-        sample_basename = os.path.splitext(os.path.basename(sample_path))[0]
-        # Format BPM and measures as strings preserving decimals
-        bpm_str = f"{bpm_val:g}"
-        measures_str = f"{measures_val:g}"
-        suffix = 'stretched' if preserve_pitch else 'repitched'
-        output_filename = f"{sample_basename}-slice{pad_number}-{suffix}-{bpm_str}-{measures_str}.wav"
-        output_path = os.path.join(sample_dir, output_filename)
+        output_path = stretched_sample_path(
+            sample_path, pad_number, bpm_val, measures_val, preserve_pitch
+        )
 
+        report_progress(0.1, f"Time-stretching pad {pad_number}")
         success, ts_message, new_path = time_stretch_wav(
             sample_path,
             full_stretch_duration,
@@ -296,6 +351,7 @@ class DrumRackInspectorHandler(BaseHandler):
             return self.format_error_response(f"Failed to time-stretch sample: {ts_message}")
 
         # Update the preset to use the new time-stretched sample
+        report_progress(0.8, "Updating preset")
         update_success, update_message = update_drum_cell_sample(preset_path, pad_number, new_path)
         if not update_success:
             return self.format_error_response(f"Failed to update preset: {update_message}")
@@ -310,24 +366,7 @@ class DrumRackInspectorHandler(BaseHandler):
             result['samples'], preset_path, editable=not is_core
         )
 
-        base_dir = "/data/UserData/UserLibrary/Track Presets"
-        if not os.path.exists(base_dir) and os.path.exists("examples/Track Presets"):
-            base_dir = "examples/Track Presets"
-        browser_html = generate_dir_html(
-            base_dir,
-            "",
-            '/drum-rack-inspector',
-            'preset_select',
-            'select_preset',
-            filter_key='drumrack'
-        )
-        core_li = (
-            '<li class="dir closed" data-path="Core Library">'
-            '<span>📁 Core Library</span>'
-            '<ul class="hidden"></ul></li>'
-        )
-        if browser_html.endswith('</ul>'):
-            browser_html = browser_html[:-5] + core_li + '</ul>'
+        base_dir, browser_html = self._browser_html()
         return {
             'file_browser_html': browser_html,
             'message': f"Time-stretched sample created and loaded for pad {pad_number}! {ts_message} {update_message}",
@@ -337,6 +376,66 @@ class DrumRackInspectorHandler(BaseHandler):
             'browser_filter': 'drumrack',
             'message_type': 'success',
         }
+
+    def handle_time_stretch_kit(self, form):
+        """Stretch every pad, or the pads listed in ``pads``, to BPM/measures."""
+        preset_path = form.getvalue('preset_path')
+        if not preset_path:
+            return self.format_error_response("Missing preset path")
+        if preset_path.startswith(CORE_LIBRARY_DIR):
+            return self.format_error_response('Core Library presets are read-only')
+        try:
+            bpm_val = float(form.getvalue('bpm'))
+            measures_val = float(form.getvalue('measures'))
+            pads = self._parse_pads(form.getvalue('pads') or '')
+        except (TypeError, ValueError):
+            return self.format_error_response("Invalid BPM, measures or pad list")
+        if bpm_val <= 0 or measures_val <= 0:
+            return self.format_error_response("Invalid BPM or measures values")
+
+        result = batch_time_stretch(
+            preset_path,
+            bpm_val,
+            measures_val,
+            pads=pads or None,
+            preserve_pitch=form.getvalue('preserve_pitch') is not None,
+            algorithm=form.getvalue('algorithm') or 'rubberband',
+        )
+        if not result['success']:
+            return self.format_error_response(result['message'])
+
+        samples_info = get_drum_cell_samples(preset_path)
+        if not samples_info['success']:
+            return self.format_error_response(samples_info['message'])
+        samples_html = self.generate_samples_html(samples_info['samples'], preset_path)
+
+        base_dir, browser_html = self._browser_html()
+        return {
+            'file_browser_html': browser_html,
+            'message': result['message'],
+            'samples_html': samples_html,
+            'selected_preset': preset_path,
+            'browser_root': base_dir,
+            'browser_filter': 'drumrack',
+            'message_type': 'success' if not result['failed'] else 'info',
+        }
+
+    @staticmethod
+    def _parse_pads(text):
+        """Parse a pad list such as ``"1-4, 9"`` into a sorted list of pads."""
+        pads = set()
+        for part in text.replace(' ', '').split(','):
+            if not part:
+                continue
+            if '-' in part:
+                first, last = (int(p) for p in part.split('-', 1))
+                pads.update(range(first, last + 1))
+            else:
+                pads.add(int(part))
+        if any(not 1 <= p <= 16 for p in pads):
+            raise ValueError("Pads must be between 1 and 16")
+        return sorted(pads)
+
     def handle_reverse_sample(self, form):
         """Handle reversing a sample."""
         sample_path = form.getvalue('sample_path')
@@ -396,24 +495,7 @@ class DrumRackInspectorHandler(BaseHandler):
                 result['samples'], preset_path, editable=not is_core
             )
 
-            base_dir = "/data/UserData/UserLibrary/Track Presets"
-            if not os.path.exists(base_dir) and os.path.exists("examples/Track Presets"):
-                base_dir = "examples/Track Presets"
-            browser_html = generate_dir_html(
-                base_dir,
-                "",
-                '/drum-rack-inspector',
-                'preset_select',
-                'select_preset',
-                filter_key='drumrack'
-            )
-            core_li = (
-                '<li class="dir closed" data-path="Core Library">'
-                '<span>📁 Core Library</span>'
-                '<ul class="hidden"></ul></li>'
-            )
-            if browser_html.endswith('</ul>'):
-                browser_html = browser_html[:-5] + core_li + '</ul>'
+            base_dir, browser_html = self._browser_html()
             return {
                 'file_browser_html': browser_html,
                 'message': message,
@@ -454,24 +536,7 @@ class DrumRackInspectorHandler(BaseHandler):
             result['samples'], preset_path, editable=not is_core
         )
 
-        base_dir = "/data/UserData/UserLibrary/Track Presets"
-        if not os.path.exists(base_dir) and os.path.exists("examples/Track Presets"):
-            base_dir = "examples/Track Presets"
-        browser_html = generate_dir_html(
-            base_dir,
-            "",
-            '/drum-rack-inspector',
-            'preset_select',
-            'select_preset',
-            filter_key='drumrack'
-        )
-        core_li = (
-            '<li class="dir closed" data-path="Core Library">'
-            '<span>📁 Core Library</span>'
-            '<ul class="hidden"></ul></li>'
-        )
-        if browser_html.endswith('</ul>'):
-            browser_html = browser_html[:-5] + core_li + '</ul>'
+        base_dir, browser_html = self._browser_html()
         return {
             'file_browser_html': browser_html,
             'message': 'Reverted to original sample',
@@ -225,6 +225,7 @@ class MelodicSamplerParamEditorHandler(BaseHandler):
             # Handle optional sample replacement
             replace_flag = form.getvalue('replace_sample') in ('on', 'true', '1')
             sample_msg = ''
+            touched_dirs = [os.path.dirname(os.path.abspath(preset_path))]
             if replace_flag and 'new_sample_file' in form:
                 success, new_path, err = self.handle_file_upload(form, 'new_sample_file')
                 if not success:
@@ -236,6 +237,7 @@ class MelodicSamplerParamEditorHandler(BaseHandler):
                 if not res.get('success'):
                     return self.format_error_response(res.get('message', 'Sample replace failed'))
                 sample_msg = ' ' + res['message']
+                touched_dirs.append(os.path.dirname(res['sample_path']))
 
             # Melodic Sampler presets do not use macros. Skip macro name updates
             # and parameter mapping to avoid writing macroMapping entries.
@@ -243,7 +245,9 @@ class MelodicSamplerParamEditorHandler(BaseHandler):
             message = result['message'] + sample_msg
             if output_path:
                 message += f" Saved to {output_path}"
-            refresh_success, refresh_message = refresh_library()
+            refresh_success, refresh_message = refresh_library(
+                paths=touched_dirs, tags=["presets"]
+            )
             if refresh_success:
                 message += " Library refreshed."
             else:
@@ -350,6 +354,7 @@ class MelodicSamplerParamEditorHandler(BaseHandler):
             'param_paths_json': param_paths_json,
             'sample_name': sample_name or '',
             'sample_path': sample_info.get('sample_path', '') if sample_info.get('success', False) else '',
+            'sample_info': sample_info.get('sample_info') if sample_info.get('success', False) else None,
         }
 
     def _build_param_item(self, idx, name, value, meta, label=None, hide_label=False, slider=False, extra_classes=""):
@@ -2,10 +2,17 @@
 import os
 import json
 import logging
+import shutil
+from threading import Lock
 from handlers.base_handler import BaseHandler
 
 logger = logging.getLogger(__name__)
 from core.slice_handler import process_kit
+from core.job_queue import submit_job, report_progress, artifact_dir, current_job_id
+
+# Download bundles are assembled in the working directory under fixed names,
+# so only one may be built at a time.
+_bundle_lock = Lock()
 
 class SliceHandler(BaseHandler):
     def __init__(self):
@@ -13,16 +20,109 @@ class SliceHandler(BaseHandler):
         # Create uploads directory if it doesn't exist
         os.makedirs(self.upload_dir, exist_ok=True)
 
-    def handle_detect_transients(self, form):
-        import json
-        from core.slice_handler import detect_transients
+    def handle_create_session(self, form):
+        """Store an uploaded file as an analysis session and return its id."""
+        from core.analysis_sessions import create_session
 
-        # Accept file upload from form as 'file'
         if 'file' not in form:
             return self.format_json_response({'success': False, 'message': 'No file provided.'}, status=400)
-        success, filepath, error_response = self.handle_file_upload(form)
-        if not success:
-            return self.format_json_response({'success': False, 'message': 'File upload failed.'}, status=400)
+        file_field = form['file']
+        if not getattr(file_field, 'filename', None):
+            return self.format_json_response({'success': False, 'message': 'Invalid file.'}, status=400)
+        try:
+            session = create_session(file_field.filename, file_field.file)
+        except ValueError as e:
+            return self.format_json_response({'success': False, 'message': str(e)}, status=400)
+        return self.format_json_response({
+            'success': True,
+            'session_id': session['id'],
+            'filename': session['filename'],
+            'duration': session['duration'],
+        })
+
+    def handle_close_session(self, session_id):
+        """Discard an analysis session and its stored audio."""
+        from core.analysis_sessions import close_session
+
+        if not close_session(session_id):
+            return self.format_json_response({'success': False, 'message': 'Unknown session.'}, status=404)
+        return self.format_json_response({'success': True})
+
+    def handle_submit_job(self, form):
+        """Build the kit in a background job and return the job id.
+
+        A direct upload is stored as a temporary analysis session first, so
+        the job does not depend on the request's file stream.
+        """
+        from core.analysis_sessions import create_session
+
+        valid, error_response = self.validate_action(form, "slice")
+        if not valid:
+            return self.format_json_response({'success': False, 'message': error_response['message']}, status=400)
+        if form.getvalue('mode') not in ["download", "auto_place"]:
+            return self.format_json_response({'success': False, 'message': 'Bad Request: Invalid mode'}, status=400)
+
+        fields = {k: v for k, v in form.items() if k != 'file'}
+        temp_session = None
+        if not fields.get('session_id'):
+            file_field = form.get('file')
+            if not getattr(file_field, 'filename', None):
+                return self.format_json_response({'success': False, 'message': 'No file provided.'}, status=400)
+            try:
+                session = create_session(file_field.filename, file_field.file)
+            except ValueError as e:
+                return self.format_json_response({'success': False, 'message': str(e)}, status=400)
+            fields['session_id'] = temp_session = session['id']
+
+        # Same form type as the request, minus the upload stream
+        job_form = type(form)(fields)
+        job_id = submit_job('slice_kit', self._run_kit_job, job_form, temp_session)
+        return self.format_json_response({'success': True, 'job_id': job_id})
+
+    def _run_kit_job(self, form, temp_session=None):
+        """Job body for :meth:`handle_submit_job`."""
+        from core.analysis_sessions import close_session
+
+        report_progress(0.1, "Building kit")
+        try:
+            if form.getvalue('mode') == "download":
+                with _bundle_lock:
+                    result = self.handle_post(form)
+                    bundle_path = result.get('bundle_path')
+                    if result.get('download') and bundle_path:
+                        report_progress(0.9, "Preparing download")
+                        target = os.path.join(artifact_dir(current_job_id()), os.path.basename(bundle_path))
+                        shutil.move(bundle_path, target)
+                        return {
+                            'success': True,
+                            'download': True,
+                            'message': result.get('message'),
+                            'artifact': target,
+                        }
+            else:
+                result = self.handle_post(form)
+        finally:
+            if temp_session:
+                close_session(temp_session)
+        return {
+            'success': result.get('message_type') != 'error',
+            'message': result.get('message', ''),
+            'message_html': result.get('message_html'),
+        }
+
+    def handle_detect_transients(self, form):
+        from core.slice_handler import detect_transients, ONSET_ENGINES
+        from core.analysis_sessions import detect_session_transients
+
+        # Accept either an analysis session id or a file upload as 'file'
+        session_id = form.getvalue('session_id')
+        filepath = None
+        if not session_id:
+            if 'file' not in form:
+                return self.format_json_response({'success': False, 'message': 'No file provided.'}, status=400)
+            success, filepath, error_response = self.handle_file_upload(form)
+            if not success:
+                return self.format_json_response({'success': False, 'message': 'File upload failed.'}, status=400)
         try:
             # --- Sensitivity support ---
             delta = 0.07  # default
@@ -31,8 +131,23 @@ class SliceHandler(BaseHandler):
                     delta = float(form.getvalue("sensitivity"))
                 except Exception:
                     pass
+            engine = form.getvalue("engine", "hpss")
+            if engine not in ONSET_ENGINES:
+                engine = "hpss"
             # Detect all transients to determine total count
-            all_regions = detect_transients(filepath, max_slices=None, delta=delta)
+            if session_id:
+                try:
+                    all_regions = detect_session_transients(
+                        session_id, max_slices=None, delta=delta, engine=engine
+                    )
+                except KeyError:
+                    return self.format_json_response(
+                        {'success': False, 'session_expired': True,
+                         'message': 'Analysis session expired. Please choose the file again.'},
+                        status=404,
+                    )
+            else:
+                all_regions = detect_transients(filepath, max_slices=None, delta=delta, engine=engine)
             total_detected = len(all_regions) if all_regions else 0
             # Use only the first 16 regions for mapping
             regions = all_regions[:16] if all_regions else []
@@ -50,7 +165,8 @@ class SliceHandler(BaseHandler):
         except Exception as e:
             return self.format_json_response({'success': False, 'message': str(e)}, status=500)
         finally:
-            self.cleanup_upload(filepath)
+            if filepath:
+                self.cleanup_upload(filepath)
 
 
     def cleanup_directory(self, directory):
@@ -75,6 +191,11 @@ class SliceHandler(BaseHandler):
         except Exception as e:
             logger.warning("Error cleaning directory %s: %s", directory, e)
 
+    def _cleanup_input(self, filepath, session_id):
+        """Remove an uploaded input file; session files outlive the request."""
+        if not session_id:
+            self.cleanup_upload(filepath)
+
     def handle_post(self, form, response_handler=None):
         """
         Handle POST request for slice processing.
@@ -96,17 +217,28 @@ class SliceHandler(BaseHandler):
         # Get kit type from form
         kit_type = form.getvalue('kit_type', 'choke')
 
-        # Handle file upload
-        success, filepath, error_response = self.handle_file_upload(form)
-        if not success:
-            return error_response
+        # Use the file of an analysis session, or handle a file upload
+        session_id = form.getvalue('session_id')
+        if session_id:
+            from core.analysis_sessions import get_session
+
+            session = get_session(session_id)
+            if session is None:
+                return self.format_error_response(
+                    "Analysis session expired. Please choose the file again."
+                )
+            filepath = session['path']
+        else:
+            success, filepath, error_response = self.handle_file_upload(form)
+            if not success:
+                return error_response
 
         try:
             # Process form data
             preset_name = os.path.splitext(os.path.basename(filepath))[0]
             num_slices = int(form.getvalue('num_slices', 16))
             if not (1 <= num_slices <= 16):
-                self.cleanup_upload(filepath)
+                self._cleanup_input(filepath, session_id)
                 return self.format_error_response("Number of slices must be between 1 and 16")
 
             # Detect transient mode
@@ -119,7 +251,7 @@ class SliceHandler(BaseHandler):
                     regions = json.loads(form.getvalue('regions'))
                     num_slices = None
                 except json.JSONDecodeError:
-                    self.cleanup_upload(filepath)
+                    self._cleanup_input(filepath, session_id)
                     return self.format_error_response("Invalid regions format")
 
             # Process the kit
@@ -136,7 +268,7 @@ class SliceHandler(BaseHandler):
 
             if not result.get('success'):
                 # Clean up only if processing failed
-                self.cleanup_upload(filepath)
+                self._cleanup_input(filepath, session_id)
                 message = result.get('message', 'Kit processing failed')
                 if not isinstance(message, str):
                     message = str(message)
@@ -189,7 +321,7 @@ class SliceHandler(BaseHandler):
                             bundle_data = f.read()
 
                         # Clean up uploaded file and uploads directory after reading bundle
-                        self.cleanup_upload(filepath)
+                        self._cleanup_input(filepath, session_id)
                         self.cleanup_directory(self.upload_dir)
 
                         # If response_handler is provided, use it to send the response
@@ -221,7 +353,7 @@ class SliceHandler(BaseHandler):
                     return self.format_error_response(message)
             else:
                 # For auto_place mode, clean up after successful processing
-                self.cleanup_upload(filepath)
+                self._cleanup_input(filepath, session_id)
                 self.cleanup_directory(self.upload_dir)
                 message = result.get('message', 'Kit processed successfully')
                 if not isinstance(message, str):
@@ -230,6 +362,6 @@ class SliceHandler(BaseHandler):
 
         except Exception as e:
             # Clean up in case of any error
-            self.cleanup_upload(filepath)
+            self._cleanup_input(filepath, session_id)
             self.cleanup_directory(self.upload_dir)
             return self.format_error_response(f"Error processing kit in class: {str(e)}")
@@ -21,12 +21,10 @@ import time
 import json
 import io
 import soundfile as sf
-import pyrubberband.pyrb as pyrb
-from core.time_stretch_handler import get_rubberband_binary
-from wsgiref.simple_server import make_server, WSGIServer
 from handlers.reverse_handler_class import ReverseHandler
 from handlers.restore_handler_class import RestoreHandler
 from handlers.slice_handler_class import SliceHandler
+from handlers.chord_handler_class import ChordHandler
 from handlers.set_management_handler_class import SetManagementHandler
 from handlers.synth_preset_inspector_handler_class import (
     SynthPresetInspectorHandler,
@@ -47,8 +45,15 @@ from handlers.adsr_handler_class import AdsrHandler
 from handlers.cyc_env_handler_class import CycEnvHandler
 from handlers.lfo_handler_class import LfoHandler
 from handlers.set_inspector_handler_class import SetInspectorHandler
-from core.refresh_handler import refresh_library
+from core.refresh_handler import refresh_library, get_refresh_status
 from core.file_browser import generate_dir_html
+from core.cache_manager import get_cache_stats
+from core.compression import compress_response, get_compression_stats
+from core.library_watcher import start_library_watcher, stop_library_watcher
+from core.job_queue import get_job, collect_artifact, discard_job
+from core.dsp_pool import run_dsp, start_dsp_pool, stop_dsp_pool, get_dsp_status
+from core.http_server import make_http_server
+from core.config import HTTP_SERVER_ENGINE
 
 logging.basicConfig(
     level=logging.INFO,
@@ -110,19 +115,11 @@ def handle_exit(signum, frame):
     sys.exit(0)
 
 
-from socketserver import ThreadingMixIn
-
-
-class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
-    """Simple threading-capable WSGI server."""
-
-    daemon_threads = True
-
-
 app = Flask(__name__, template_folder="templates_jinja")
 reverse_handler = ReverseHandler()
 restore_handler = RestoreHandler()
 slice_handler = SliceHandler()
+chord_handler = ChordHandler()
 set_management_handler = SetManagementHandler()
 synth_handler = SynthPresetInspectorHandler()
 synth_param_handler = SynthParamEditorHandler()
@@ -147,11 +144,31 @@ def record_start_time():
 
 @app.after_request
 def log_request_time(response):
-    """Log how long the request took."""
+    """Log how long the request took and the bytes saved by compression."""
     start = getattr(g, "_start_time", None)
     if start is not None:
         elapsed = time.perf_counter() - start
-        logger.info("%s %s took %.3fs", request.method, request.path, elapsed)
+        compressed = getattr(g, "_compression", None)
+        if compressed:
+            encoding, original, sent = compressed
+            logger.info(
+                "%s %s took %.3fs (%s %d -> %d bytes, %.0f%% saved)",
+                request.method, request.path, elapsed, encoding, original, sent,
+                100.0 * (original - sent) / original,
+            )
+        else:
+            logger.info("%s %s took %.3fs", request.method, request.path, elapsed)
+    return response
+
+
+# Registered after log_request_time so it runs first.
+@app.after_request
+def compress_text_response(response):
+    """Compress HTML and JSON responses for clients that accept it."""
+    route = request.url_rule.rule if request.url_rule else request.path
+    g._compression = compress_response(
+        response, request.headers.get("Accept-Encoding"), route=route
+    )
     return response
 
 
@@ -187,19 +204,18 @@ def warm_up_modules():
     except Exception as exc:
         logger.error("Error during librosa time_stretch warm-up: %s", exc)
 
-    # Warm-up pyrubberband
+    # Warm-up Rubber Band
     try:
         start = time.perf_counter()
-        import pyrubberband.pyrb as pyrb
+        from core import rubberband
 
-        pyrb.__RUBBERBAND_UTIL = str(get_rubberband_binary())
-        pyrb.time_stretch(np.zeros(22050, dtype=np.float32), 22050, 1.0)
+        rubberband.time_stretch(np.zeros(22050, dtype=np.float32), 22050, 1.01)
         logger.info(
-            "Pyrubberband warm-up complete in %.3fs",
+            "Rubber Band warm-up complete in %.3fs",
             time.perf_counter() - start,
         )
     except Exception as exc:
-        logger.error("Error during pyrubberband warm-up: %s", exc)
+        logger.error("Error during Rubber Band warm-up: %s", exc)
 
     # Warm-up audiotsm WSOLA
     try:
@@ -471,6 +487,13 @@ def slice_tool():
         if "file" in request.files:
             form_data["file"] = FileField(request.files["file"])
         form = SimpleForm(form_data)
+        if form.getvalue("background"):
+            resp = slice_handler.handle_submit_job(form)
+            return (
+                resp["content"],
+                resp.get("status", 200),
+                resp.get("headers", [("Content-Type", "application/json")]),
+            )
         result = slice_handler.handle_post(form)
         if result is not None:
             if result.get("download") and result.get("bundle_path"):
@@ -738,6 +761,7 @@ def melodic_sampler_params():
     schema_json = result.get("schema_json", "{}")
     sample_name = result.get("sample_name", "")
     sample_path = result.get("sample_path", "")
+    sample_info = result.get("sample_info")
     preset_selected = bool(selected_preset)
     return render_template(
         "melodic_sampler_params.html",
@@ -760,15 +784,67 @@ def melodic_sampler_params():
         schema_json=schema_json,
         sample_name=sample_name,
         sample_path=sample_path,
+        sample_info=sample_info,
         active_tab="melodic-sampler",
     )
 
 
-@app.route("/chord", methods=["GET"])
+@app.route("/chord", methods=["GET", "POST"])
 def chord():
+    if request.method == "POST":
+        form_data = request.form.to_dict()
+        if "file" in request.files:
+            form_data["file"] = FileField(request.files["file"])
+        form = SimpleForm(form_data)
+        if form.getvalue("background"):
+            resp = chord_handler.handle_submit_job(form)
+            return (
+                resp["content"],
+                resp.get("status", 200),
+                resp.get("headers", [("Content-Type", "application/json")]),
+            )
+        result = chord_handler.handle_post(form)
+        if result.get("download"):
+            return send_file(
+                io.BytesIO(result["bundle_data"]),
+                as_attachment=True,
+                download_name=result["bundle_name"],
+                mimetype="application/zip",
+            )
+        status = 400 if result.get("message_type") == "error" else 200
+        return jsonify(
+            success=status == 200, message=result.get("message")
+        ), status
     return render_template("chord.html", active_tab="chord")
 
 
+# Cross-origin players need to send range and validator headers and to
+# read the range and validator headers of the response.
+LIBRARY_FILE_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Range, If-None-Match, If-Modified-Since, If-Range",
+    "Access-Control-Expose-Headers": "Accept-Ranges, Content-Range, Content-Length, ETag, Last-Modified",
+}
+
+
+def send_library_file(path):
+    """Send a library file with validators and byte-range support.
+
+    The strong ETag is built from the file's size and modification time, so
+    an unchanged file is answered with ``304 Not Modified`` and ``Range``
+    requests get ``206 Partial Content``.  Browsers still revalidate on
+    every use because library files can be rewritten in place.
+    """
+    st = os.stat(path)
+    return send_file(
+        path,
+        etag=f"{st.st_size:x}-{st.st_mtime_ns:x}",
+        last_modified=st.st_mtime,
+        conditional=True,
+    )
+
+
 @app.route("/samples/<path:sample_path>", methods=["GET", "OPTIONS"])
 def serve_sample(sample_path):
     """Serve sample audio files with CORS headers."""
@@ -790,11 +866,9 @@ def serve_sample(sample_path):
     if request.method == "OPTIONS":
         resp = app.make_response("")
     else:
-        resp = send_file(file_real)
+        resp = send_library_file(file_real)
 
-    resp.headers["Access-Control-Allow-Origin"] = "*"
-    resp.headers["Access-Control-Allow-Methods"] = "GET, OPTIONS"
-    resp.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    resp.headers.update(LIBRARY_FILE_CORS_HEADERS)
     return resp
 
 
@@ -828,11 +902,9 @@ def serve_file(file_path):
     if request.method == "OPTIONS":
         resp = app.make_response("")
     else:
-        resp = send_file(file_real)
+        resp = send_library_file(file_real)
 
-    resp.headers["Access-Control-Allow-Origin"] = "*"
-    resp.headers["Access-Control-Allow-Methods"] = "GET, OPTIONS"
-    resp.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    resp.headers.update(LIBRARY_FILE_CORS_HEADERS)
     return resp
 
 
@@ -840,6 +912,13 @@ def serve_file(file_path):
 def drum_rack_inspector():
     if request.method == "POST":
         form = SimpleForm(request.form.to_dict())
+        if form.getvalue("background"):
+            resp = drum_rack_handler.handle_submit_job(form)
+            return (
+                resp["content"],
+                resp.get("status", 200),
+                resp.get("headers", [("Content-Type", "application/json")]),
+            )
         result = drum_rack_handler.handle_post(form)
     else:
         result = drum_rack_handler.handle_get()
@@ -866,6 +945,18 @@ def drum_rack_inspector():
     )
 
 
+@app.route("/drum-rack-inspector/preview", methods=["POST"])
+def drum_rack_preview_route():
+    """Stream a quick time-stretch preview of one pad's slice."""
+    form = SimpleForm(request.form.to_dict())
+    resp = drum_rack_handler.handle_preview(form)
+    return (
+        resp["content"],
+        resp.get("status", 200),
+        resp.get("headers", [("Content-Type", "application/json")]),
+    )
+
+
 @app.route("/place-files", methods=["POST"])
 def place_files_route():
     form_data = request.form.to_dict()
@@ -893,6 +984,65 @@ def refresh_get_route():
     return resp
 
 
+@app.route("/refresh/status", methods=["GET"])
+def refresh_status_route():
+    """Return coalescing counters and the last ``refreshCache`` outcome.
+
+    With ``?id=`` the state of that queued refresh is returned instead.
+    """
+    refresh_id = request.args.get("id", type=int)
+    if refresh_id is None:
+        return jsonify(get_refresh_status())
+    status = get_refresh_status(refresh_id)
+    if status is None:
+        return jsonify({"error": "Unknown refresh id"}), 404
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status_route(job_id):
+    """Return the state, progress and result of a background job."""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown job."}), 404
+    if job["artifact"]:
+        job["artifact_url"] = f"/jobs/{job_id}/artifact"
+    job["dsp"] = get_dsp_status()
+    return jsonify(job)
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def discard_job_route(job_id):
+    if not discard_job(job_id):
+        return jsonify({"success": False, "message": "Unknown or unfinished job."}), 404
+    return jsonify({"success": True})
+
+
+@app.route("/jobs/<job_id>/artifact", methods=["GET"])
+def job_artifact_route(job_id):
+    """Download a finished job's artifact.
+
+    The artifact stays available until the job expires (``JOB_RETENTION``)
+    or is deleted, so interrupted, retried and resumed downloads work.
+    """
+    path = collect_artifact(job_id)
+    if path is None:
+        return ("Artifact not found", 404)
+    return send_file(path, as_attachment=True)
+
+
+@app.route("/debug/cache", methods=["GET"])
+def debug_cache_route():
+    """Return cache usage and hit/miss/eviction counters as JSON."""
+    return jsonify(get_cache_stats())
+
+
+@app.route("/debug/compression", methods=["GET"])
+def debug_compression_route():
+    """Return per-route compressed response counts and byte totals as JSON."""
+    return jsonify(get_compression_stats())
+
+
 @app.route("/pitch-shift", methods=["POST"])
 def pitch_shift_route():
     """Pitch-shift uploaded audio using Rubber Band."""
@@ -908,7 +1058,7 @@ def pitch_shift_route():
     try:
         from core.time_stretch_handler import pitch_shift_array
 
-        shifted = pitch_shift_array(data, sr, semitones)
+        shifted = run_dsp(pitch_shift_array, data, sr, semitones)
     except Exception as exc:
         logger.error("Pitch shift error: %s", exc)
         return (f"Error: {exc}", 500)
@@ -922,6 +1072,30 @@ def pitch_shift_route():
     return resp
 
 
+@app.route("/analysis-session", methods=["POST"])
+def create_analysis_session_route():
+    """Upload audio once for repeated transient detection and slicing."""
+    form_data = request.form.to_dict()
+    if "file" in request.files:
+        form_data["file"] = FileField(request.files["file"])
+    resp = slice_handler.handle_create_session(SimpleForm(form_data))
+    return (
+        resp["content"],
+        resp.get("status", 200),
+        resp.get("headers", [("Content-Type", "application/json")]),
+    )
+
+
+@app.route("/analysis-session/<session_id>", methods=["DELETE"])
+def close_analysis_session_route(session_id):
+    resp = slice_handler.handle_close_session(session_id)
+    return (
+        resp["content"],
+        resp.get("status", 200),
+        resp.get("headers", [("Content-Type", "application/json")]),
+    )
+
+
 @app.route("/detect-transients", methods=["POST"])
 def detect_transients_route():
     form_data = request.form.to_dict()
@@ -989,15 +1163,23 @@ if __name__ == "__main__":
 
     warm_up_modules()
 
+    if os.environ.get("DISABLE_LIBRARY_WATCHER"):
+        logger.info("DISABLE_LIBRARY_WATCHER set; library caches use stat checks")
+    else:
+        start_library_watcher()
+        atexit.register(stop_library_watcher)
+
+    if os.environ.get("DISABLE_DSP_POOL"):
+        logger.info("DISABLE_DSP_POOL set; DSP work runs on request threads")
+    else:
+        start_dsp_pool()
+        atexit.register(stop_dsp_pool)
+
     host = "0.0.0.0"
     port = read_port()
     logger.info("Starting webserver")
-    with make_server(
-        host,
-        port,
-        app,
-        server_class=ThreadingWSGIServer,
-    ) as httpd:
+    engine = os.environ.get("HTTP_SERVER_ENGINE", HTTP_SERVER_ENGINE)
+    with make_http_server(host, port, app, engine=engine) as httpd:
         logger.info("Server started http://%s:%s", host, port)
         try:
             httpd.serve_forever()
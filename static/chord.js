@@ -284,42 +284,6 @@ async function regenerateChordPreview(padNumber, showOverlay = false) {
     }
 }
 
-/**
- * Generates a Chord preset using the shared base preset and drum cell chains.
- * @param {string} presetName - The preset name.
- * @param {Array} sampleFilenames - Array of sample filenames for each chord.
- * @returns {Object} - The generated preset object.
- */
-function generatePlacementChordPreset(presetName, sampleFilenames) {
-  const preset = generateBasePreset(presetName);
-  for (let i = 0; i < window.selectedChords.length; i++) {
-    const chordName = window.selectedChords[i];
-    const chain = createDrumCellChain(
-      36 + i,
-      chordName,
-      {"Voice_Envelope_Hold": 60.0},
-      encodeURI("ableton:/user-library/Samples/Preset Samples/" + sampleFilenames[i]).replace(/#/g, '%23')
-    );
-    preset.chains[0].devices[0].chains.push(chain);
-  }
-  return preset;
-}
-
-function generateChordPreset(presetName, sampleFilenames) {
-  const preset = generateBasePreset(presetName);
-  for (let i = 0; i < window.selectedChords.length; i++) {
-    const chordName = window.selectedChords[i];
-    const chain = createDrumCellChain(
-      36 + i,
-      chordName,
-      {"Voice_Envelope_Hold": 60.0},
-      "Samples/" + encodeURIComponent(sampleFilenames[i])
-    );
-    preset.chains[0].devices[0].chains.push(chain);
-  }
-  return preset;
-}
-
 function toWav(buffer, opt) {
   opt = opt || {};
   var numChannels = buffer.numberOfChannels;
@@ -488,191 +452,65 @@ function showChordMessage(text, type = 'info') {
   }
 }
 
+/**
+ * Renders the chord kit on the server as a background job.
+ * The source is uploaded once; the server pitches every distinct note,
+ * mixes the chords and writes the preset and samples.
+ * @param {string} mode - 'download' or 'auto_place'.
+ */
+async function buildChordKit(mode) {
+  const fileInput = document.getElementById('wavFileInput');
+  if (!fileInput.files || fileInput.files.length === 0) {
+    showChordMessage('Please select a WAV file.', 'error');
+    return;
+  }
+  const chords = window.selectedChords.map((name, i) => ({
+    name: name,
+    intervals: name ? getChordIntervals(name, window.selectedVoicings[i] || 0, window.selectedOctaves[i] || 0) : []
+  }));
+  const form = new FormData();
+  form.append('action', 'chord_kit');
+  form.append('mode', mode);
+  form.append('background', '1');
+  form.append('file', fileInput.files[0]);
+  form.append('preset_name', document.getElementById('presetName').value.trim());
+  form.append('keep_length', keepLengthSame ? '1' : '0');
+  form.append('chords', JSON.stringify(chords));
+
+  const indicator = document.getElementById('loadingIndicator');
+  const percent = document.getElementById('progressPercent');
+  indicator.style.display = 'block';
+  percent.textContent = '0%';
+  try {
+    const submitted = await fetch('http://' + location.host + '/chord', { method: 'POST', body: form }).then(r => r.json());
+    if (!submitted.success) throw new Error(submitted.message);
+    const job = await waitForJob(submitted.job_id, status => {
+      percent.textContent = Math.round((status.progress || 0) * 100) + '%';
+    });
+    const result = job.result || {};
+    if (job.state !== 'done') throw new Error(result.message || job.message);
+    percent.textContent = '100%';
+    if (job.artifact_url) {
+      window.location = 'http://' + location.host + job.artifact_url;
+    }
+    showChordMessage(result.message || 'Chord kit created.', 'success');
+  } catch (err) {
+    console.error('Error building chord kit', err);
+    showChordMessage('Failed to build chord kit: ' + err.message, 'error');
+  } finally {
+    indicator.style.display = 'none';
+  }
+}
+
 function initChordTab() {
-  // Attach event listener for generatePreset
   const presetBtn = document.getElementById('generatePreset');
   if (presetBtn) {
-    presetBtn.addEventListener('click', async () => {
-    document.getElementById('loadingIndicator').style.display = 'block';
-    document.getElementById('progressPercent').textContent = '0%';
-    
-    let totalChords = window.selectedChords.length;
-    let processedCount = 0;
-    
-    const fileInput = document.getElementById('wavFileInput');
-    const presetNameInput = document.getElementById('presetName');
-    if (!fileInput.files || fileInput.files.length === 0) {
-      showChordMessage('Please select a WAV file.', 'error');
-      return;
-    }
-    const file = fileInput.files[0];
-    let baseName = file.name.replace(/\.[^/.]+$/, "");
-    let presetName = presetNameInput.value.trim() || baseName;
-    
-    const arrayBuffer = await file.arrayBuffer();
-    const audioCtx = new (window.AudioContext || window.webkitAudioContext)();
-    const decodedBuffer = await audioCtx.decodeAudioData(arrayBuffer);
-    if (!window.processedChordSamples) {
-      window.processedChordSamples = new Array(16).fill(null);
-    }
-    
-    const chordNames = window.selectedChords;
-    let sampleFilenames = [];
-    let processedSamples = {};
-    for (let i = 0; i < chordNames.length; i++) {
-      const chordName = chordNames[i];
-      let blob = window.processedChordSamples[i];
-      if (!blob) {
-        const intervals = getChordIntervals(
-          chordName,
-          window.selectedVoicings[i] || 0,
-          window.selectedOctaves[i] || 0
-        );
-        blob = await processChordSample(decodedBuffer, intervals);
-        window.processedChordSamples[i] = blob;
-      }
-      let safeChordName = chordName.replace(/\s+/g, '');
-      let filename = `${baseName}_chord_${safeChordName}.wav`;
-      sampleFilenames.push(filename);
-      processedSamples[chordName] = blob;
-      
-      processedCount++;
-      let progressPercent = Math.round((processedCount / totalChords) * 50); // first 50% for chord processing
-      document.getElementById('progressPercent').textContent = progressPercent + "%";
-    }
-    
-    const preset = generateChordPreset(presetName, sampleFilenames);
-    const presetJson = JSON.stringify(preset, null, 2);
-    
-    const zip = new JSZip();
-    zip.file("Preset.ablpreset", presetJson);
-    const samplesFolder = zip.folder("Samples");
-    for (let chordName of chordNames) {
-      let safeChordName = chordName.replace(/\s+/g, '');
-      let filename = `${baseName}_chord_${safeChordName}.wav`;
-      const blob = processedSamples[chordName];
-      samplesFolder.file(filename, blob);
-    }
-    zip.generateAsync({ type: "blob" }, function(metadata) {
-      let zipProgress = 50 + Math.round(metadata.percent / 2);
-      document.getElementById('progressPercent').textContent = zipProgress + "%";
-    }).then(function(content) {
-      document.getElementById('progressPercent').textContent = '100%';
-      document.getElementById('loadingIndicator').style.display = 'none';
-      const a = document.createElement("a");
-      a.href = URL.createObjectURL(content);
-      a.download = presetName + ".ablpresetbundle";
-      document.body.appendChild(a);
-      a.click();
-      document.body.removeChild(a);
-    }).catch(function(err) {
-      console.error('Error generating bundle', err);
-      document.getElementById('loadingIndicator').style.display = 'none';
-      showChordMessage('Failed to generate bundle', 'error');
-    });
-    });
+    presetBtn.addEventListener('click', () => buildChordKit('download'));
+  }
+  const placeBtn = document.getElementById('placePreset');
+  if (placeBtn) {
+    placeBtn.addEventListener('click', () => buildChordKit('auto_place'));
   }
-
-  // Attach event listener for place preset button
-  document.getElementById('placePreset').addEventListener('click', async () => {
-    document.getElementById('loadingIndicator').style.display = 'block';
-    document.getElementById('progressPercent').textContent = '0%';
-    
-    const fileInput = document.getElementById('wavFileInput');
-    const presetNameInput = document.getElementById('presetName');
-    if (!fileInput.files || fileInput.files.length === 0) {
-      showChordMessage('Please select a WAV file.', 'error');
-      return;
-    }
-    const file = fileInput.files[0];
-    let baseName = file.name.replace(/\.[^/.]+$/, "");
-    let presetName = presetNameInput.value.trim() || baseName;
-    
-    const arrayBuffer = await file.arrayBuffer();
-    const audioCtx = new (window.AudioContext || window.webkitAudioContext)();
-    const decodedBuffer = await audioCtx.decodeAudioData(arrayBuffer);
-    if (!window.processedChordSamples) {
-      window.processedChordSamples = new Array(16).fill(null);
-    }
-
-    const chordNames = window.selectedChords;
-    let sampleFilenames = [];
-    let processedSamples = {};
-    for (let i = 0; i < chordNames.length; i++) {
-      const chordName = chordNames[i];
-      let blob = window.processedChordSamples[i];
-      if (!blob) {
-        const intervals = getChordIntervals(
-          chordName,
-          window.selectedVoicings[i] || 0,
-          window.selectedOctaves[i] || 0
-        );
-        blob = await processChordSample(decodedBuffer, intervals);
-        window.processedChordSamples[i] = blob;
-      }
-      let safeChordName = chordName.replace(/\s+/g, '');
-      let filename = `${baseName}_chord_${safeChordName}.wav`;
-      sampleFilenames.push(filename);
-      processedSamples[chordName] = blob;
-    }
-    
-    // Generate preset using the new helper (with updated sample URIs)
-    const preset = generatePlacementChordPreset(presetName, sampleFilenames);
-    const presetJson = JSON.stringify(preset, null, 2);
-    
-    // Bundle chord sample WAV files into a zip
-    const zip = new JSZip();
-    for (let chordName of chordNames) {
-      let safeChordName = chordName.replace(/\s+/g, '');
-      let filename = `${baseName}_chord_${safeChordName}.wav`;
-      const blob = processedSamples[chordName];
-      zip.file(filename, blob);
-    }
-    let samplesZipBlob;
-    try {
-      samplesZipBlob = await zip.generateAsync({ type: "blob" }, meta => {
-        let zipProg = Math.round(meta.percent / 2) + 50;
-        document.getElementById('progressPercent').textContent = zipProg + "%";
-      });
-    } catch (err) {
-      console.error('Error zipping samples', err);
-      document.getElementById('loadingIndicator').style.display = 'none';
-      showChordMessage('Failed to package samples', 'error');
-      return;
-    }
-
-    try {
-      const samplesForm = new FormData();
-      samplesForm.append("mode", "zip");
-      samplesForm.append("file", samplesZipBlob);
-      samplesForm.append("destination", "/data/UserData/UserLibrary/Samples/Preset Samples");
-      const resp1 = await fetch('http://' + location.host + '/place-files', { method: 'POST', body: samplesForm });
-      if (!resp1.ok) throw new Error('sample placement failed');
-
-      const presetForm = new FormData();
-      presetForm.append("mode", "place");
-      presetForm.append("file", new Blob([presetJson], { type: "application/json" }), presetName + ".ablpreset");
-      presetForm.append("destination", "/data/UserData/UserLibrary/Track Presets");
-      const resp2 = await fetch('http://' + location.host + '/place-files', { method: 'POST', body: presetForm });
-      if (!resp2.ok) throw new Error('preset placement failed');
-
-      const resp3 = await fetch('http://' + location.host + '/refresh', {
-        method: "POST",
-        headers: { "Content-Type": "application/x-www-form-urlencoded" },
-        body: "action=refresh_library"
-      });
-      if (!resp3.ok) throw new Error('refresh failed');
-    } catch (err) {
-      console.error('Error placing preset', err);
-      document.getElementById('loadingIndicator').style.display = 'none';
-      showChordMessage('Failed to place preset', 'error');
-      return;
-    }
-
-    document.getElementById('progressPercent').textContent = '100%';
-    document.getElementById('loadingIndicator').style.display = 'none';
-    showChordMessage('Preset and samples placed successfully.', 'success');
-  });
 
   // Attach event listener for file input
   const fileInput = document.getElementById('wavFileInput');
@@ -106,14 +106,25 @@ function initializeTimeStretchModal() {
     const modal = document.getElementById('timeStretchModal');
     if (!modal) return;
     const closeBtn = modal.querySelector('.modal-close');
-    document.querySelectorAll('.time-stretch-button').forEach(btn => {
-        btn.addEventListener('click', function(e) {
-            e.preventDefault();
-            document.getElementById('ts_sample_path').value = btn.getAttribute('data-sample-path');
-            document.getElementById('ts_preset_path').value = btn.getAttribute('data-preset-path');
-            document.getElementById('ts_pad_number').value = btn.getAttribute('data-pad-number');
-            modal.classList.remove('hidden');
-        });
+    const padsContainer = document.getElementById('ts_pads_container');
+    const previewButton = document.getElementById('ts_preview');
+    function openModal(kitMode, btn) {
+        // One pad, or the whole kit (optionally a subset of pads)
+        document.getElementById('ts_action').value = kitMode ? 'time_stretch_kit' : 'time_stretch_sample';
+        document.getElementById('ts_sample_path').value = kitMode ? '' : btn.getAttribute('data-sample-path');
+        document.getElementById('ts_preset_path').value = btn.getAttribute('data-preset-path');
+        document.getElementById('ts_pad_number').value = kitMode ? '' : btn.getAttribute('data-pad-number');
+        if (padsContainer) padsContainer.classList.toggle('hidden', !kitMode);
+        if (previewButton) previewButton.classList.toggle('hidden', kitMode);
+        modal.classList.remove('hidden');
+    }
+    // Delegated so buttons in a re-rendered pad grid keep working
+    document.addEventListener('click', e => {
+        const padBtn = e.target.closest('.time-stretch-button');
+        const kitBtn = e.target.closest('.time-stretch-kit-button');
+        if (!padBtn && !kitBtn) return;
+        e.preventDefault();
+        openModal(Boolean(kitBtn), padBtn || kitBtn);
     });
     closeBtn.addEventListener('click', () => modal.classList.add('hidden'));
     window.addEventListener('click', e => { if (e.target === modal) modal.classList.add('hidden'); });
@@ -125,9 +136,95 @@ function initializeTimeStretchModal() {
 
     const tsForm = document.getElementById('timeStretchForm');
     const loadingOverlay = document.getElementById('ts_loading');
-    tsForm.addEventListener('submit', () => {
-        if (loadingOverlay) loadingOverlay.classList.remove('hidden');
+    initializeTimeStretchPreview(tsForm, modal);
+    tsForm.addEventListener('submit', e => {
+        e.preventDefault();
+        stopPreview();
+        if (loadingOverlay) {
+            loadingOverlay.textContent = 'Time stretching…';
+            loadingOverlay.classList.remove('hidden');
+        }
+        // Run the stretch as a background job and swap in the updated grid.
+        const formData = new FormData(tsForm);
+        formData.set('background', '1');
+        const messageEl = document.getElementById('drum-rack-job-message');
+        fetch(tsForm.action, { method: 'POST', body: formData })
+            .then(r => r.json())
+            .then(submitted => {
+                if (!submitted.success) throw new Error(submitted.message);
+                return waitForJob(submitted.job_id, job => {
+                    if (loadingOverlay && job.state === 'running') {
+                        loadingOverlay.textContent = `${job.message || 'Time stretching'}… ${Math.round(job.progress * 100)}%`;
+                    }
+                });
+            })
+            .then(job => {
+                const result = job.result || {};
+                if (job.state === 'done' && result.samples_html) {
+                    const container = document.querySelector('.samples-container');
+                    if (container) container.innerHTML = result.samples_html;
+                    initializeDrumRackWaveforms();
+                }
+                showJobMessage(messageEl, result.message || job.message, job.state === 'done');
+            })
+            .catch(err => {
+                console.error(err);
+                showJobMessage(messageEl, 'Time stretch failed: ' + err.message, false);
+            })
+            .finally(() => {
+                if (loadingOverlay) loadingOverlay.classList.add('hidden');
+                modal.classList.add('hidden');
+            });
+    });
+}
+
+let previewAudio = null;
+
+function stopPreview() {
+    if (previewAudio) {
+        previewAudio.pause();
+        URL.revokeObjectURL(previewAudio.src);
+        previewAudio = null;
+    }
+}
+
+function initializeTimeStretchPreview(tsForm, modal) {
+    const previewBtn = document.getElementById('ts_preview');
+    const messageEl = document.getElementById('ts_preview_message');
+    if (!previewBtn) return;
+    previewBtn.addEventListener('click', () => {
+        if (!tsForm.reportValidity()) return;
+        stopPreview();
+        // Render only this pad's slice with a fast algorithm; nothing is saved.
+        const formData = new FormData(tsForm);
+        previewBtn.disabled = true;
+        messageEl.textContent = 'Rendering preview…';
+        fetch(tsForm.action + '/preview', { method: 'POST', body: formData })
+            .then(async r => {
+                if (!r.ok) {
+                    const data = await r.json().catch(() => ({}));
+                    throw new Error(data.message || r.statusText);
+                }
+                return r.blob();
+            })
+            .then(blob => {
+                previewAudio = new Audio(URL.createObjectURL(blob));
+                messageEl.textContent = '';
+                return previewAudio.play();
+            })
+            .catch(err => {
+                console.error(err);
+                messageEl.textContent = 'Preview failed: ' + err.message;
+            })
+            .finally(() => { previewBtn.disabled = false; });
     });
+    modal.querySelector('.modal-close').addEventListener('click', stopPreview);
+}
+
+function showJobMessage(el, message, success) {
+    if (!el) return;
+    el.className = success ? 'success' : 'error';
+    el.textContent = message;
 }
 
 function initDrumRackTab() {
@@ -189,3 +189,32 @@ if (typeof window !== 'undefined') {
   window.getPercentStep = getPercentStep;
   window.getPercentDecimals = getPercentDecimals;
 }
+
+/**
+ * Polls a background job until it finishes.
+ * @param {string} jobId - Id returned when the job was submitted.
+ * @param {Function} [onProgress] - Called with the job status on every poll.
+ * @param {number} [interval=500] - Milliseconds between polls.
+ * @returns {Promise<Object>} - Resolves with the final job status.
+ */
+function waitForJob(jobId, onProgress, interval = 500) {
+  const url = 'http://' + location.host + '/jobs/' + jobId;
+  return new Promise((resolve, reject) => {
+    function poll() {
+      fetch(url)
+        .then(r => r.json())
+        .then(job => {
+          if (onProgress) onProgress(job);
+          if (job.state === 'done' || job.state === 'failed') {
+            resolve(job);
+          } else if (job.state) {
+            setTimeout(poll, interval);
+          } else {
+            reject(new Error(job.message || 'Unknown job'));
+          }
+        })
+        .catch(reject);
+    }
+    poll();
+  });
+}
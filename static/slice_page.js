@@ -1,5 +1,37 @@
 let wavesurfer;
 let audioReady = false;
+// Analysis session holding the uploaded file server-side, so transient
+// detection and the final kit build do not re-upload the audio.
+let sessionId = null;
+let sessionUpload = null;
+
+function closeSession() {
+  if (sessionId) {
+    fetch('http://' + location.host + '/analysis-session/' + sessionId, { method: 'DELETE' }).catch(() => {});
+  }
+  sessionId = null;
+  sessionUpload = null;
+}
+
+function startSession(file) {
+  closeSession();
+  const formData = new FormData();
+  formData.append('file', file);
+  const upload = fetch('http://' + location.host + '/analysis-session', { method: 'POST', body: formData })
+    .then(r => r.json())
+    .then(data => {
+      if (sessionUpload === upload && data.success) {
+        sessionId = data.session_id;
+      }
+      return sessionId;
+    })
+    .catch(e => {
+      console.error(e);
+      return null;
+    });
+  sessionUpload = upload;
+  return upload;
+}
 
 function createWaveSurfer() {
   wavesurfer = WaveSurfer.create({
@@ -55,7 +87,7 @@ function keepRegionsContiguous(updated) {
   }
 }
 
-function detectTransients() {
+function detectTransients(event, retried = false) {
   const fileInput = document.getElementById('file');
   const msg = document.getElementById('transient-detect-message');
   if (!fileInput.files[0]) {
@@ -65,11 +97,20 @@ function detectTransients() {
   }
   msg.textContent = 'Detecting transients...';
   msg.style.color = '#337ab7';
-  const formData = new FormData();
-  formData.append('file', fileInput.files[0]);
-  const sens = document.getElementById('sensitivity');
-  formData.append('sensitivity', sens ? sens.value : 0.07);
-  fetch('http://' + location.host + '/detect-transients', { method: 'POST', body: formData })
+  const pending = sessionUpload || startSession(fileInput.files[0]);
+  pending.then(id => {
+    const formData = new FormData();
+    if (id) {
+      formData.append('session_id', id);
+    } else {
+      formData.append('file', fileInput.files[0]);
+    }
+    const sens = document.getElementById('sensitivity');
+    formData.append('sensitivity', sens ? sens.value : 0.07);
+    const engine = document.getElementById('detect-engine');
+    formData.append('engine', engine ? engine.value : 'hpss');
+    return fetch('http://' + location.host + '/detect-transients', { method: 'POST', body: formData });
+  })
     .then(r => r.json())
     .then(data => {
       if (data.success && data.regions) {
@@ -79,6 +120,10 @@ function detectTransients() {
         data.regions.forEach(r => {
           wavesurfer.addRegion({ start: r.start, end: r.end, color: 'rgba(0, 255, 0, 0.2)', drag: false });
         });
+      } else if (data.session_expired && !retried) {
+        sessionId = null;
+        sessionUpload = null;
+        detectTransients(null, true);
       } else {
         msg.textContent = data.message || 'No transients detected.';
         msg.style.color = 'orange';
@@ -100,6 +145,9 @@ document.addEventListener('DOMContentLoaded', () => {
       audioReady = false;
       wavesurfer.clearRegions();
       wavesurfer.loadBlob(file);
+      startSession(file);
+    } else {
+      closeSession();
     }
   });
 
@@ -114,10 +162,56 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 
   const form = document.getElementById('slice-form');
-  form.addEventListener('submit', () => {
+  form.addEventListener('submit', async e => {
+    e.preventDefault();
     if (wavesurfer && audioReady) {
       const regions = Object.values(wavesurfer.regions.list).map(r => ({ start: r.start, end: r.end }));
       document.getElementById('regions-input').value = JSON.stringify(regions);
     }
+    if (sessionUpload) await sessionUpload;
+    document.getElementById('session-id-input').value = sessionId || '';
+
+    // Build the kit as a background job and poll for the result.
+    const formData = new FormData(form);
+    if (sessionId) {
+      // The server already has the audio; skip re-uploading it.
+      formData.delete('file');
+    }
+    const mode = e.submitter ? e.submitter.value : 'download';
+    formData.set('mode', mode);
+    formData.set('background', '1');
+
+    const messageEl = document.getElementById('slice-message');
+    const buttons = form.querySelectorAll('button[type="submit"]');
+    buttons.forEach(b => { b.disabled = true; });
+    messageEl.className = 'info';
+    messageEl.textContent = 'Building kit…';
+    try {
+      const submitted = await fetch(form.action, { method: 'POST', body: formData }).then(r => r.json());
+      if (!submitted.success) throw new Error(submitted.message);
+      const job = await waitForJob(submitted.job_id, status => {
+        if (status.state === 'running' && status.message) {
+          messageEl.textContent = status.message + '…';
+        }
+      });
+      const result = job.result || {};
+      if (job.state === 'done' && job.artifact_url) {
+        messageEl.className = 'success';
+        messageEl.textContent = result.message || 'Preset bundle created.';
+        window.location = 'http://' + location.host + job.artifact_url;
+      } else if (result.message_html) {
+        messageEl.className = '';
+        messageEl.innerHTML = result.message_html;
+      } else {
+        messageEl.className = job.state === 'done' ? 'success' : 'error';
+        messageEl.textContent = result.message || job.message;
+      }
+    } catch (err) {
+      console.error(err);
+      messageEl.className = 'error';
+      messageEl.textContent = 'Kit processing failed: ' + err.message;
+    } finally {
+      buttons.forEach(b => { b.disabled = false; });
+    }
   });
 });
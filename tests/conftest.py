@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import derived_audio, onset_cache, preset_index
+
+
+@pytest.fixture(autouse=True)
+def isolated_preset_index(monkeypatch, tmp_path):
+    """Keep preset scans from writing the real ``preset_index.json``."""
+    monkeypatch.setattr(preset_index, "PRESET_INDEX_PATH", str(tmp_path / "preset_index.json"))
+    preset_index.reset_index()
+    yield
+    preset_index.reset_index()
+
+
+@pytest.fixture(autouse=True)
+def isolated_onset_cache(monkeypatch, tmp_path):
+    """Keep transient detection from writing ``onset_cache/`` into the repo."""
+    monkeypatch.setattr(onset_cache, "ONSET_CACHE_DIR", str(tmp_path / "onset_cache"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_derived_audio_index(monkeypatch, tmp_path):
+    """Keep time-stretch renders out of the real ``derived_audio_index.json``."""
+    monkeypatch.setattr(derived_audio, "DERIVED_AUDIO_INDEX_PATH", str(tmp_path / "derived_audio_index.json"))
+    derived_audio.reset_index()
+    yield
+    derived_audio.reset_index()
@@ -0,0 +1,124 @@
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import analysis_sessions as sessions
+from core import onset_cache, slice_handler
+
+
+@pytest.fixture
+def session_dirs(monkeypatch, tmp_path):
+    monkeypatch.setattr(sessions, "ANALYSIS_SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(onset_cache, "ONSET_CACHE_DIR", str(tmp_path / "onsets"))
+    monkeypatch.setattr(sessions, "_sessions", {})
+    return tmp_path
+
+
+def _impulses():
+    sr = 22050
+    data = np.zeros(sr)
+    data[int(0.1 * sr):int(0.1 * sr) + 100] = 1.0
+    data[int(0.6 * sr):int(0.6 * sr) + 100] = 1.0
+    buf = io.BytesIO()
+    sf.write(buf, data, sr, format="WAV")
+    buf.seek(0)
+    return buf
+
+
+def test_session_reuses_analysis(session_dirs, monkeypatch):
+    session = sessions.create_session("loop.wav", _impulses())
+    assert os.path.exists(session["path"])
+    assert session["duration"] == pytest.approx(1.0)
+
+    first = sessions.detect_session_transients(session["id"], delta=0.2)
+    assert len(first) >= 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError("analysis should be reused")
+    monkeypatch.setattr(sessions, "get_onset_envelope", fail)
+    assert sessions.detect_session_transients(session["id"], delta=0.2) == first
+    assert len(sessions.detect_session_transients(session["id"], max_slices=1)) == 1
+
+
+def test_invalid_upload_rejected(session_dirs):
+    with pytest.raises(ValueError):
+        sessions.create_session("bad.wav", io.BytesIO(b"not audio"))
+    assert os.listdir(session_dirs / "sessions") == []
+
+
+def test_idle_sessions_expire(session_dirs):
+    session = sessions.create_session("loop.wav", _impulses())
+    session_dir = os.path.dirname(session["path"])
+    assert sessions.expire_sessions(time.monotonic()) == 0
+
+    assert sessions.expire_sessions(time.monotonic() + sessions.ANALYSIS_SESSION_TIMEOUT + 1) == 1
+    assert not os.path.exists(session_dir)
+    assert sessions.get_session(session["id"]) is None
+    with pytest.raises(KeyError):
+        sessions.detect_session_transients(session["id"])
+
+
+def test_close_session(session_dirs):
+    session = sessions.create_session("loop.wav", _impulses())
+    assert sessions.close_session(session["id"])
+    assert not os.path.exists(session["path"])
+    assert not sessions.close_session(session["id"])
+
+
+def test_slice_handler_uses_session_file(session_dirs, monkeypatch):
+    from handlers import slice_handler_class
+    session = sessions.create_session("loop.wav", _impulses())
+    seen = {}
+
+    def fake_process_kit(input_wav, preset_name=None, **kwargs):
+        seen["input"] = input_wav
+        seen["name"] = preset_name
+        return {"success": True, "message": "placed"}
+    monkeypatch.setattr(slice_handler_class, "process_kit", fake_process_kit)
+
+    handler = slice_handler_class.SliceHandler()
+    form = {"action": "slice", "mode": "auto_place", "session_id": session["id"]}
+
+    class Form(dict):
+        def getvalue(self, name, default=None):
+            return self.get(name, default)
+
+    result = handler.handle_post(Form(form))
+    assert result["message_type"] == "success"
+    assert seen == {"input": session["path"], "name": "loop"}
+    assert os.path.exists(session["path"])
+
+
+def test_least_recently_used_sessions_are_evicted(session_dirs, monkeypatch):
+    monkeypatch.setattr(sessions, "ANALYSIS_SESSION_MAX", 2)
+    first = sessions.create_session("a.wav", _impulses())
+    second = sessions.create_session("b.wav", _impulses())
+    assert sessions.get_session(first["id"]) is not None
+
+    third = sessions.create_session("c.wav", _impulses())
+    assert sessions.get_session(second["id"]) is None
+    assert not os.path.exists(second["path"])
+    assert sessions.get_session(first["id"]) is not None
+    assert sessions.get_session(third["id"]) is not None
+
+
+def test_sessions_are_evicted_over_the_byte_limit(session_dirs, monkeypatch):
+    first = sessions.create_session("a.wav", _impulses())
+    monkeypatch.setattr(sessions, "ANALYSIS_SESSION_MAX_BYTES", first["bytes"] + 1)
+
+    size = first["bytes"]
+    sessions.detect_session_transients(first["id"], delta=0.2)
+    # The session in use is kept even though its envelope exceeds the limit
+    assert sessions.get_session(first["id"])["bytes"] > size + 1
+    second = sessions.create_session("b.wav", _impulses())
+    assert sessions.get_session(first["id"]) is None
+    assert not os.path.exists(first["path"])
+    assert sessions.get_session(second["id"]) is not None
@@ -0,0 +1,46 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import audio_probe
+from core.cache_manager import invalidate_cache
+
+
+def test_probe_reads_header_and_caches(monkeypatch, tmp_path):
+    invalidate_cache()
+    path = tmp_path / "tone.wav"
+    sf.write(path, np.zeros((22050, 2), dtype=np.float32), 22050, subtype="PCM_24")
+
+    info = audio_probe.probe_audio(str(path))
+    assert info == {
+        "frames": 22050,
+        "samplerate": 22050,
+        "channels": 2,
+        "duration": 1.0,
+        "format": "WAV",
+        "subtype": "PCM_24",
+    }
+
+    def fail(p):
+        raise AssertionError("header should come from the cache")
+    monkeypatch.setattr(audio_probe.sf, "info", fail)
+    assert audio_probe.probe_audio(str(path)) == info
+    monkeypatch.undo()
+
+    sf.write(path, np.zeros(11025, dtype=np.float32), 22050)
+    os.utime(path, ns=(1, 1))
+    info = audio_probe.probe_audio(str(path))
+    assert info["frames"] == 11025
+    assert info["channels"] == 1
+
+
+def test_probe_missing_or_invalid(tmp_path):
+    assert audio_probe.probe_audio(str(tmp_path / "missing.wav")) is None
+    bad = tmp_path / "bad.wav"
+    bad.write_bytes(b"not audio")
+    assert audio_probe.probe_audio(str(bad)) is None
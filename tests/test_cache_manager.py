@@ -16,3 +16,66 @@ def test_set_get_invalidate():
     cm.set_cache("b", 2)
     cm.invalidate_cache()
     assert cm.get_cache("b") is None
+
+
+def test_namespace_lru_eviction():
+    cm.configure_namespace("lru_test", max_entries=2)
+    cm.set_cache("lru_test:a", 1)
+    cm.set_cache("lru_test:b", 2)
+    assert cm.get_cache("lru_test:a") == 1  # a is now most recent
+    cm.set_cache("lru_test:c", 3)
+    assert cm.get_cache("lru_test:b") is None
+    assert cm.get_cache("lru_test:a") == 1
+    stats = cm.get_cache_stats()["namespaces"]["lru_test"]
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_namespace_byte_cap():
+    cm.configure_namespace("bytes_test", max_entries=None, max_bytes=2000)
+    cm.set_cache("bytes_test:a", "x" * 1500)
+    cm.set_cache("bytes_test:b", "y" * 1500)
+    assert cm.get_cache("bytes_test:a") is None
+    stats = cm.get_cache_stats()["namespaces"]["bytes_test"]
+    assert stats["entries"] == 1
+    assert 1500 <= stats["bytes"] <= 2000
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cm.time, "monotonic", lambda: now[0])
+    cm.set_cache("ttl_test:a", 1, ttl=5)
+    assert cm.get_cache("ttl_test:a") == 1
+    now[0] += 6
+    assert cm.get_cache("ttl_test:a") is None
+    assert cm.get_cache_stats()["namespaces"]["ttl_test"]["expirations"] == 1
+
+
+def test_invalidate_path_drops_related_entries():
+    cm.set_cache("wav:/lib/Samples", ["a.wav"])
+    cm.set_cache("file_browser:/lib/Samples/Drums", {"dirs": []})
+    cm.set_cache("file_browser:/lib/Samples/Keys", {"dirs": []})
+    cm.set_cache("file_browser:/lib/Samples/Drums/Kick", {"dirs": []})
+    cm.set_cache("synth_presets:drift", [1])
+
+    cm.invalidate_path("/lib/Samples/Drums")
+
+    # ancestors and descendants of the touched directory are dropped
+    assert cm.get_cache("wav:/lib/Samples") is None
+    assert cm.get_cache("file_browser:/lib/Samples/Drums") is None
+    assert cm.get_cache("file_browser:/lib/Samples/Drums/Kick") is None
+    # unrelated directories and non-path keys survive
+    assert cm.get_cache("file_browser:/lib/Samples/Keys") == {"dirs": []}
+    assert cm.get_cache("synth_presets:drift") == [1]
+
+
+def test_invalidate_tag():
+    cm.configure_namespace("tagged_ns", tags=("presets",))
+    cm.set_cache("tagged_ns:a", 1)
+    cm.set_cache("other_ns:b", 2, tags=["presets"])
+    cm.set_cache("other_ns:c", 3)
+    cm.invalidate_tag("presets")
+    assert cm.get_cache("tagged_ns:a") is None
+    assert cm.get_cache("other_ns:b") is None
+    assert cm.get_cache("other_ns:c") == 3
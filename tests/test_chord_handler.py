@@ -0,0 +1,99 @@
+import json
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import core.chord_handler as ch
+
+
+def test_parse_chords_and_unique_offsets():
+    chords = ch.parse_chords(json.dumps([
+        {"name": "C", "intervals": [-12, 0, 4, 7, 12]},
+        {"name": "Cm", "intervals": [-12, 0, 3, 7, 12]},
+        {"name": "", "intervals": []},
+    ]))
+    assert chords[2] == ("", ())
+    assert ch.unique_offsets(chords) == [-12, 0, 3, 4, 7, 12]
+    with pytest.raises(ValueError):
+        ch.parse_chords([{"name": "X", "intervals": [99]}])
+    with pytest.raises(ValueError):
+        ch.parse_chords([{"name": "", "intervals": []}])
+
+
+def test_resample_shift_changes_length_and_pitch():
+    sr = 8000
+    t = np.arange(sr) / sr
+    y = np.sin(2 * np.pi * 200 * t).astype(np.float32)[:, None]
+    up = ch.resample_shift(y, 12)
+    assert up.shape == (sr // 2, 1)
+    # An octave up doubles the frequency: one cycle spans half the frames
+    np.testing.assert_allclose(up[:, 0], np.sin(2 * np.pi * 400 * t[:sr // 2]), atol=1e-2)
+    assert len(ch.resample_shift(y, -12)) == 2 * sr
+    assert ch.resample_shift(y, 0) is y
+
+
+def test_mix_voices_pads_and_normalises():
+    a = np.ones((4, 2), dtype=np.float32)
+    b = np.ones((2, 2), dtype=np.float32)
+    mixed = ch.mix_voices([a, b])
+    assert mixed.shape == (4, 2)
+    assert np.max(np.abs(mixed)) == pytest.approx(ch.TARGET_PEAK)
+    np.testing.assert_allclose(mixed[:, 0], [0.9, 0.9, 0.45, 0.45])
+
+
+def test_build_chord_kit_download_renders_each_offset_once(tmp_path, monkeypatch):
+    calls = []
+    real_shift = ch.resample_shift
+    monkeypatch.setattr(ch, "resample_shift", lambda y, s: calls.append(s) or real_shift(y, s))
+    y = np.random.default_rng(0).uniform(-0.5, 0.5, 4000).astype(np.float32)
+    chords = [
+        {"name": "C", "intervals": [0, 4, 7]},
+        {"name": "C", "intervals": [0, 4, 7]},
+        {"name": "C", "intervals": [-12, 0, 4, 7]},
+        {"name": "", "intervals": []},
+        {"name": "Am", "intervals": [-3, 0, 4]},
+    ]
+    result = ch.build_chord_kit(y, 8000, "piano.wav", chords, output_dir=str(tmp_path))
+    assert result["success"], result["message"]
+    assert sorted(calls) == [-12, -3, 4, 7]
+
+    with zipfile.ZipFile(result["bundle_path"]) as zf:
+        names = sorted(zf.namelist())
+        preset = json.loads(zf.read("Preset.ablpreset"))
+    assert Path(result["bundle_path"]).name == "piano.ablpresetbundle"
+    assert names == [
+        "Preset.ablpreset",
+        "Samples/piano_chord_Am.wav",
+        "Samples/piano_chord_C.wav",
+        "Samples/piano_chord_C_3.wav",
+    ]
+    cells = preset["chains"][0]["devices"][0]["chains"]
+    assert [c["drumZoneSettings"]["receivingNote"] for c in cells] == [36, 37, 38, 40]
+    assert [c["devices"][0]["deviceData"]["sampleUri"] for c in cells] == [
+        "Samples/piano_chord_C.wav",
+        "Samples/piano_chord_C.wav",
+        "Samples/piano_chord_C_3.wav",
+        "Samples/piano_chord_Am.wav",
+    ]
+
+
+def test_build_chord_kit_keep_length_uses_pitch_shift(tmp_path, monkeypatch):
+    shifts = []
+
+    def fake_pitch_shift(y, sr, semitones):
+        shifts.append(semitones)
+        return y * 0.5
+
+    monkeypatch.setattr(ch, "pitch_shift_array", fake_pitch_shift)
+    y = np.ones((100, 2), dtype=np.float32)
+    chords = [{"name": "C", "intervals": [0, 4, 7]}, {"name": "F", "intervals": [5, 9, 12]}]
+    result = ch.build_chord_kit(y, 8000, "pad.wav", chords, preset_name="Pads",
+                                keep_length=True, output_dir=str(tmp_path))
+    assert result["success"], result["message"]
+    assert sorted(shifts) == [4, 5, 7, 9, 12]
+    assert Path(result["bundle_path"]).name == "Pads.ablpresetbundle"
@@ -0,0 +1,53 @@
+import gzip
+import io
+import sys
+from pathlib import Path
+
+from flask import Response, send_file
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import compression
+
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.choose_encoding("gzip, deflate, br") == "gzip"
+    assert compression.choose_encoding("gzip;q=0, deflate") is None
+    assert compression.choose_encoding("*") == "gzip"
+    assert compression.choose_encoding(None) is None
+    monkeypatch.setattr(compression, "brotli", object())
+    assert compression.choose_encoding("gzip, br") == "br"
+    assert compression.choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_compress_json_response_and_stats(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    compression.reset_compression_stats()
+    body = b'{"values": [' + b", ".join(b"0.5" for _ in range(2000)) + b"]}"
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag("abc")
+    result = compression.compress_response(resp, "gzip", route="/data")
+    assert result[0] == "gzip" and result[1] == len(body) and result[2] < len(body) // 10
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert resp.get_etag() == ("abc", True)
+    assert gzip.decompress(resp.get_data()) == body
+    assert int(resp.headers["Content-Length"]) == result[2]
+    assert compression.get_compression_stats() == {
+        "/data": {"responses": 1, "original_bytes": len(body), "sent_bytes": result[2]}
+    }
+
+
+def test_skips_small_binary_and_file_responses():
+    small = Response("x" * 10, mimetype="text/html")
+    assert compression.compress_response(small, "gzip") is None
+    assert "Content-Encoding" not in small.headers
+
+    audio = Response(b"\0" * 5000, mimetype="audio/wav")
+    assert compression.compress_response(audio, "gzip") is None
+
+    from flask import Flask
+    with Flask(__name__).test_request_context():
+        download = send_file(io.BytesIO(b"a" * 5000), mimetype="text/plain")
+    assert compression.compress_response(download, "gzip") is None
@@ -1,6 +1,7 @@
 import os
 import json
 import sys
+from concurrent.futures import Future
 from pathlib import Path
 import numpy as np
 import soundfile as sf
@@ -19,21 +20,47 @@ from core.midi_pattern_generator import (
 from core.synth_param_editor_handler import update_parameter_values
 
 
+def fake_refresh(**kwargs):
+    """Stand-in for ``refresh_library(wait=False)``."""
+    future = Future()
+    future.refresh_id = 1
+    future.set_result((True, "ok"))
+    return future
+
+
 def test_reverse_wav_file(tmp_path):
     sr = 22050
     t = np.linspace(0, 1, sr, endpoint=False)
     data = np.sin(2 * np.pi * 440 * t).astype(np.float32)
     orig_path = tmp_path / "orig.wav"
     sf.write(orig_path, data, sr)
+    os.chmod(orig_path, 0o644)
 
     success, message, new_path = reverse_wav_file(orig_path.name, tmp_path)
     assert success, message
     assert os.path.exists(new_path)
+    assert os.stat(new_path).st_mode & 0o777 == 0o644
     reversed_data, _ = sf.read(new_path, dtype="float32")
     assert np.isclose(reversed_data[0], data[-1], atol=1e-3)
     assert np.isclose(reversed_data[-1], data[0], atol=1e-3)
 
 
+def test_reverse_audio_file_blockwise(tmp_path):
+    from core.reverse_handler import reverse_audio_file
+    rng = np.random.default_rng(0)
+    data = rng.integers(-2**23, 2**23, size=(1001, 2)) * 256
+    src = tmp_path / "src.wav"
+    sf.write(src, data.astype(np.int32), 44100, subtype="PCM_24")
+
+    dst = tmp_path / "dst.wav"
+    reverse_audio_file(str(src), str(dst), "WAV", block_frames=64)
+
+    assert sf.info(dst).subtype == "PCM_24"
+    out, _ = sf.read(dst, dtype="int32")
+    original, _ = sf.read(src, dtype="int32")
+    assert np.array_equal(out, original[::-1])
+
+
 def test_detect_transients(tmp_path):
     sr = 22050
     data = np.zeros(sr)
@@ -47,6 +74,44 @@ def test_detect_transients(tmp_path):
     assert regions[0]['start'] <= regions[0]['end']
 
 
+def test_detect_transients_reuses_cached_envelope(tmp_path, monkeypatch):
+    from core import slice_handler, onset_cache
+    monkeypatch.setattr(onset_cache, "ONSET_CACHE_DIR", str(tmp_path / "cache"))
+    sr = 22050
+    data = np.zeros(sr)
+    data[int(0.1 * sr):int(0.1 * sr) + 100] = 1.0
+    data[int(0.6 * sr):int(0.6 * sr) + 100] = 1.0
+    wav_path = tmp_path / "impulses.wav"
+    sf.write(wav_path, data, sr)
+
+    first = detect_transients(str(wav_path), max_slices=None, delta=0.2)
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+    def fail(path):
+        raise AssertionError("envelope should come from the cache")
+    monkeypatch.setattr(slice_handler, "compute_onset_envelope", fail)
+    copy_path = tmp_path / "copy.wav"
+    copy_path.write_bytes(wav_path.read_bytes())
+    assert detect_transients(str(copy_path), max_slices=None, delta=0.2) == first
+    assert len(detect_transients(str(wav_path), max_slices=1, delta=0.05)) == 1
+
+
+def test_detect_transients_fast_engine(tmp_path, monkeypatch):
+    from core import onset_cache
+    monkeypatch.setattr(onset_cache, "ONSET_CACHE_DIR", str(tmp_path / "cache"))
+    sr = 22050
+    data = np.zeros(sr)
+    data[int(0.1 * sr):int(0.1 * sr) + 100] = 1.0
+    data[int(0.6 * sr):int(0.6 * sr) + 100] = 1.0
+    wav_path = tmp_path / "impulses.wav"
+    sf.write(wav_path, data, sr)
+
+    regions = detect_transients(str(wav_path), max_slices=None, delta=0.2, engine="fast")
+    assert len(regions) >= 2
+    assert abs(regions[0]["start"] - 0.1) < 0.02
+    assert regions[-1]["end"] == 1.0
+
+
 def test_generate_pattern_set(tmp_path):
     pattern = create_c_major_downbeats(1)
 
@@ -100,7 +165,7 @@ def test_time_stretch_wav(tmp_path, monkeypatch):
     sf.write(inp, data, sr)
 
     from core import time_stretch_handler
-    monkeypatch.setattr(time_stretch_handler, "refresh_library", lambda: (True, "ok"))
+    monkeypatch.setattr(time_stretch_handler, "refresh_library", fake_refresh)
 
     success, msg, path = time_stretch_wav(str(inp), 2.0, str(outp))
     assert success
@@ -374,3 +439,69 @@ def test_save_clip(tmp_path):
     assert data["loop_start"] == 0.0
     assert data["loop_end"] == 4.0
 
+
+
+def test_time_stretch_wav_reuses_derived_file(tmp_path, monkeypatch):
+    from core import time_stretch_handler, derived_audio
+    monkeypatch.setattr(derived_audio, "DERIVED_AUDIO_INDEX_PATH", str(tmp_path / "derived.json"))
+    derived_audio.reset_index()
+    monkeypatch.setattr(time_stretch_handler, "refresh_library", fake_refresh)
+
+    sr = 22050
+    data = np.sin(np.linspace(0, 880 * np.pi, sr)).astype(np.float32)
+    inp = tmp_path / "src.wav"
+    sf.write(inp, data, sr)
+    # A copy has the same content, so it resolves to the same render
+    copy = tmp_path / "copy.wav"
+    sf.write(copy, data, sr)
+
+    ok, _, first = time_stretch_wav(str(inp), 2.0, str(tmp_path / "a.wav"), algorithm="wsola")
+    assert ok
+
+    def fail(*args, **kwargs):
+        raise AssertionError("render should be reused")
+    monkeypatch.setattr(time_stretch_handler, "render_time_stretch", fail)
+    ok, msg, second = time_stretch_wav(str(copy), 2.0, str(tmp_path / "b.wav"), algorithm="wsola")
+    assert ok and second == first
+    assert "reused" in msg
+    assert not (tmp_path / "b.wav").exists()
+
+    digest = derived_audio.source_digest(str(inp))
+    assert [d["path"] for d in derived_audio.derived_files(digest)] == [first]
+
+    # Different settings, or a deleted render, need a fresh render
+    ok, msg, _ = time_stretch_wav(str(inp), 3.0, str(tmp_path / "c.wav"), algorithm="wsola")
+    assert not ok and "render should be reused" in msg
+    os.remove(first)
+    assert derived_audio.find_derived(digest, {
+        "op": "time_stretch", "duration": 2.0, "preserve_pitch": True, "algorithm": "wsola",
+    }) is None
+    derived_audio.reset_index()
+
+
+def test_derived_audio_index_is_pruned(tmp_path, monkeypatch):
+    from core import derived_audio
+    monkeypatch.setattr(derived_audio, "MAX_ENTRIES", 2)
+    source = tmp_path / "src.wav"
+    source.write_bytes(b"source")
+    renders = []
+    for i in range(3):
+        render = tmp_path / f"render{i}.wav"
+        render.write_bytes(b"render")
+        renders.append(str(render))
+
+    derived_audio.record_derived("d1", {"n": 0}, renders[0], source=str(source))
+    derived_audio.record_derived("d1", {"n": 1}, renders[1], source=str(source))
+    assert derived_audio.find_derived("d1", {"n": 0}) == renders[0]
+    # The least recently used entry goes once the bound is exceeded
+    derived_audio.record_derived("d2", {"n": 2}, renders[2])
+    assert derived_audio.find_derived("d1", {"n": 1}) is None
+    assert derived_audio.find_derived("d1", {"n": 0}) == renders[0]
+    assert os.path.exists(renders[1])
+
+    # Entries whose source is gone are dropped on the next write
+    os.remove(source)
+    derived_audio.record_derived("d2", {"n": 2}, renders[2])
+    assert derived_audio.find_derived("d1", {"n": 0}) is None
+    derived_audio.reset_index()
+    assert derived_audio.find_derived("d2", {"n": 2}) == renders[2]
@@ -1,6 +1,7 @@
 import json
 import os
 import sys
+from concurrent.futures import Future
 from pathlib import Path
 
 import pytest
@@ -9,6 +10,15 @@ import pytest
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from core import drum_rack_inspector_handler as drih
+from core import preset_index as pi
+
+
+def fake_refresh(**kwargs):
+    """Stand-in for ``refresh_library(wait=False)``."""
+    future = Future()
+    future.refresh_id = 1
+    future.set_result((True, "ok"))
+    return future
 
 
 def create_simple_preset(path, sample_uri="file:///orig.wav"):
@@ -103,6 +113,7 @@ def test_scan_for_drum_rack_presets(monkeypatch, tmp_path):
     monkeypatch.setattr(drih.os.path, "exists", fake_exists)
     monkeypatch.setattr(drih.os, "walk", fake_walk)
     monkeypatch.setattr(drih, "get_cache", lambda k: None)
+    monkeypatch.setattr(pi, "get_cache", lambda k: None)
     captured = {}
     monkeypatch.setattr(drih, "set_cache", lambda k, v: captured.setdefault("data", v))
 
@@ -147,3 +158,72 @@ def test_generate_samples_html_core_preview():
     html = handler.generate_samples_html([sample], "/data/CoreLibrary/Track Presets/Kit.ablpreset", editable=False)
     assert "reverse-button" not in html
     assert "time-stretch-button" not in html
+
+
+def test_batch_time_stretch_single_write_and_refresh(tmp_path, monkeypatch):
+    import numpy as np
+    import soundfile as sf
+    from core import derived_audio
+
+    monkeypatch.setattr(derived_audio, "DERIVED_AUDIO_INDEX_PATH", str(tmp_path / "derived.json"))
+    derived_audio.reset_index()
+    sr = 22050
+    kick = tmp_path / "kick.wav"
+    snare = tmp_path / "snare.wav"
+    sf.write(kick, np.sin(np.linspace(0, 440 * np.pi, sr)).astype(np.float32), sr)
+    sf.write(snare, np.sin(np.linspace(0, 220 * np.pi, sr // 2)).astype(np.float32), sr)
+
+    preset = tmp_path / "kit.json"
+    create_simple_preset(preset)
+    data = json.loads(preset.read_text())
+    chains = data["chains"][0]["devices"][0]["chains"]
+    chains.extend(json.loads(json.dumps(chains * 3)))
+    preset.write_text(json.dumps(data))
+    ok, msg = drih.update_drum_cell_samples(str(preset), {
+        1: {"path": str(kick)},
+        2: {"path": str(kick)},
+        3: {"path": str(snare), "playback_length": 0.5},
+        4: {"path": str(snare)},
+    })
+    assert ok, msg
+
+    renders, writes, refreshes = [], [], []
+    real_stretch = drih.time_stretch_wav
+    real_update = drih.update_drum_cell_samples
+
+    def counting_stretch(*args, **kwargs):
+        assert kwargs["refresh"] is False
+        renders.append(args[0])
+        return real_stretch(*args, **kwargs)
+
+    def counting_update(*args, **kwargs):
+        writes.append(args)
+        return real_update(*args, **kwargs)
+
+    monkeypatch.setattr(drih, "time_stretch_wav", counting_stretch)
+    monkeypatch.setattr(drih, "update_drum_cell_samples", counting_update)
+    monkeypatch.setattr(drih, "refresh_library", lambda **kw: refreshes.append(kw) or fake_refresh())
+
+    result = drih.batch_time_stretch(str(preset), 120, 1, pads=[1, 2, 3], algorithm="wsola")
+    assert result["success"], result["message"]
+    assert result["failed"] == {}
+    # Pads 1 and 2 share a sample and slice length, so they share a render
+    assert sorted(renders) == sorted([str(kick), str(snare)])
+    assert result["stretched"][1] == result["stretched"][2]
+    assert len(writes) == 1
+    assert len(refreshes) == 1
+
+    samples = {s["pad"]: s for s in drih.get_drum_cell_samples(str(preset))["samples"]}
+    assert samples[1]["duration"] == pytest.approx(2.0, abs=0.2)
+    # Only half the snare plays, so the whole file is stretched to ~4 seconds
+    assert samples[3]["duration"] == pytest.approx(4.0, rel=0.2)
+    assert samples[4]["path"] == str(snare)
+    derived_audio.reset_index()
+
+
+def test_batch_time_stretch_reports_missing_pads(tmp_path):
+    preset = tmp_path / "kit.json"
+    create_simple_preset(preset, sample_uri="")
+    result = drih.batch_time_stretch(str(preset), 120, 1, pads=[1, 16])
+    assert not result["success"]
+    assert result["failed"] == {1: "No readable sample", 16: "No drum cell on this pad"}
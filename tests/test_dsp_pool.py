@@ -0,0 +1,198 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import dsp_pool
+
+
+def fake_refresh(**kwargs):
+    """Stand-in for ``refresh_library(wait=False)``."""
+    future = Future()
+    future.refresh_id = 1
+    future.set_result((True, "ok"))
+    return future
+
+
+@pytest.fixture
+def pool():
+    dsp_pool.start_dsp_pool(workers=1, preload=())
+    yield
+    dsp_pool.stop_dsp_pool()
+
+
+def test_runs_inline_without_pool():
+    assert not dsp_pool.is_running()
+    # Unpicklable callables work because nothing leaves the process
+    assert dsp_pool.run_dsp(lambda x: x * 2, 21) == 42
+
+
+def test_runs_in_worker_process(pool):
+    assert dsp_pool.run_dsp(pow, 2, 10) == 1024
+    assert dsp_pool.run_dsp(os.getpid) != os.getpid()
+
+
+def test_task_errors_propagate(pool):
+    with pytest.raises(ZeroDivisionError):
+        dsp_pool.run_dsp(divmod, 1, 0)
+    assert dsp_pool.run_dsp(pow, 3, 2) == 9
+
+
+def test_timeout_kills_task_and_recovers(pool):
+    start = time.monotonic()
+    with pytest.raises(dsp_pool.DSPError, match="timed out"):
+        dsp_pool.run_dsp(time.sleep, 30, timeout=0.5)
+    assert time.monotonic() - start < 10
+    assert dsp_pool.run_dsp(pow, 2, 3) == 8
+
+
+def test_crashed_worker_is_isolated(pool):
+    with pytest.raises(dsp_pool.DSPError, match="crashed"):
+        dsp_pool.run_dsp(os._exit, 1)
+    assert dsp_pool.run_dsp(pow, 2, 4) == 16
+
+
+def test_pool_size_leaves_reserve(monkeypatch):
+    monkeypatch.setattr(dsp_pool, "DSP_POOL_WORKERS", None)
+    monkeypatch.setattr(dsp_pool, "DSP_CPU_RESERVE", 1)
+    monkeypatch.setattr(dsp_pool.os, "cpu_count", lambda: 4)
+    assert dsp_pool.pool_size() == 3
+    monkeypatch.setattr(dsp_pool.os, "cpu_count", lambda: 1)
+    assert dsp_pool.pool_size() == 1
+    monkeypatch.setattr(dsp_pool, "DSP_POOL_WORKERS", 2)
+    assert dsp_pool.pool_size() == 2
+
+
+def test_time_stretch_in_pool(tmp_path, monkeypatch):
+    import numpy as np
+    import soundfile as sf
+    from core import time_stretch_handler
+
+    monkeypatch.setattr(time_stretch_handler, "refresh_library", fake_refresh)
+    sr = 22050
+    inp = tmp_path / "src.wav"
+    sf.write(inp, np.sin(np.linspace(0, 880 * np.pi, sr)).astype(np.float32), sr)
+
+    dsp_pool.start_dsp_pool(workers=1)
+    try:
+        success, msg, path = time_stretch_handler.time_stretch_wav(
+            str(inp), 2.0, str(tmp_path / "out.wav"), algorithm="wsola"
+        )
+    finally:
+        dsp_pool.stop_dsp_pool()
+    assert success, msg
+    assert sf.info(path).duration == pytest.approx(2.0, abs=0.2)
+
+
+def test_admission_limits_concurrency_in_fifo_order(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(dsp_pool, "DSP_MAX_CONCURRENT", 1)
+    monkeypatch.setattr(dsp_pool, "_admission", dsp_pool._Admission())
+    release = threading.Event()
+    order = []
+
+    def task(name):
+        order.append(name)
+        if name == "first":
+            release.wait(5)
+        return name
+
+    threads = [threading.Thread(target=dsp_pool.run_dsp, args=(task, "first"))]
+    threads[0].start()
+    while dsp_pool.get_dsp_status()["running"] == 0:
+        time.sleep(0.01)
+    for name in ("second", "third"):
+        t = threading.Thread(target=dsp_pool.run_dsp, args=(task, name))
+        t.start()
+        threads.append(t)
+        while dsp_pool.get_dsp_status()["queued"] < len(threads) - 1:
+            time.sleep(0.01)
+
+    status = dsp_pool.get_dsp_status()
+    assert status["running"] == 1
+    assert status["queued"] == 2
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert order == ["first", "second", "third"]
+    status = dsp_pool.get_dsp_status()
+    assert status["running"] == 0 and status["queued"] == 0
+    assert status["max_wait"] > 0
+
+
+def test_job_reports_dsp_queue_position(monkeypatch, tmp_path):
+    import threading
+    from core import job_queue
+
+    monkeypatch.setattr(job_queue, "JOB_ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(job_queue, "_jobs", {})
+    monkeypatch.setattr(dsp_pool, "DSP_MAX_CONCURRENT", 1)
+    monkeypatch.setattr(dsp_pool, "_admission", dsp_pool._Admission())
+    release = threading.Event()
+    blocker = threading.Thread(target=dsp_pool.run_dsp, args=(release.wait, 5))
+    blocker.start()
+    while dsp_pool.get_dsp_status()["running"] == 0:
+        time.sleep(0.01)
+
+    job_id = job_queue.submit_job("test", dsp_pool.run_dsp, pow, 2, 5)
+    deadline = time.monotonic() + 5
+    while job_queue.get_job(job_id)["queue_position"] != 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert "Waiting" in job_queue.get_job(job_id)["message"]
+
+    time.sleep(0.05)
+    release.set()
+    blocker.join(5)
+    while job_queue.get_job(job_id)["state"] != job_queue.DONE:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    job = job_queue.get_job(job_id)
+    assert job["result"] == 32
+    assert job["queue_position"] is None
+    assert job["wait_seconds"] > 0
+
+
+def test_worker_runs_at_lower_priority(monkeypatch):
+    monkeypatch.setattr(dsp_pool, "DSP_NICE", 5)
+    dsp_pool.start_dsp_pool(workers=1, preload=())
+    try:
+        assert dsp_pool.run_dsp(os.nice, 0) == os.nice(0) + 5
+        assert dsp_pool.run_dsp(os.getenv, "OMP_NUM_THREADS") == str(dsp_pool.DSP_BLAS_THREADS)
+    finally:
+        dsp_pool.stop_dsp_pool()
+
+
+def test_worker_does_not_import_server_script(tmp_path):
+    # Run a stand-in for move-webserver.py as a script: it imports Flask
+    # and writes a marker at import time, which a worker re-running the
+    # script as __mp_main__ would repeat.
+    root = Path(__file__).resolve().parents[1]
+    marker = tmp_path / "imports.log"
+    script = tmp_path / "server.py"
+    script.write_text(
+        "import os, sys\n"
+        f"sys.path.insert(0, {str(root)!r})\n"
+        "import flask\n"
+        f"with open({str(marker)!r}, 'a') as f: f.write(f'{{os.getpid()}}\\n')\n"
+        "from core import dsp_pool\n"
+        "if __name__ == '__main__':\n"
+        "    dsp_pool.start_dsp_pool(workers=1)\n"
+        "    try:\n"
+        "        print(dsp_pool.run_dsp(eval, \"'flask' in __import__('sys').modules\"))\n"
+        "    finally:\n"
+        "        dsp_pool.stop_dsp_pool()\n"
+    )
+    result = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
+    assert len(marker.read_text().split()) == 1
@@ -508,6 +508,59 @@ def test_samples_route(client, tmp_path, monkeypatch):
     assert b'data' in resp.data
 
 
+def test_samples_route_ranges_and_validators(client, tmp_path, monkeypatch):
+    sample = tmp_path / 's.wav'
+    sample.write_bytes(bytes(range(100)))
+    real_join = move_webserver.os.path.join
+    real_real = move_webserver.os.path.realpath
+    base = '/data/UserData/UserLibrary/Samples/Preset Samples'
+
+    def fake_join(a, *rest):
+        if a == base:
+            return real_join(tmp_path, *rest)
+        return real_join(a, *rest)
+
+    def fake_real(path):
+        if path.startswith(base):
+            return real_real(path.replace(base, str(tmp_path), 1))
+        return real_real(path)
+
+    monkeypatch.setattr(move_webserver.os.path, 'join', fake_join)
+    monkeypatch.setattr(move_webserver.os.path, 'realpath', fake_real)
+
+    resp = client.get('/samples/s.wav')
+    assert resp.status_code == 200
+    assert resp.headers['Accept-Ranges'] == 'bytes'
+    etag = resp.headers['ETag']
+    assert etag.startswith('"64-') and not etag.startswith('W/')
+    last_modified = resp.headers['Last-Modified']
+    assert 'ETag' in resp.headers['Access-Control-Expose-Headers']
+    resp.close()
+
+    resp = client.get('/samples/s.wav', headers={'Range': 'bytes=10-19'})
+    assert resp.status_code == 206
+    assert resp.data == bytes(range(10, 20))
+    assert resp.headers['Content-Range'] == 'bytes 10-19/100'
+    assert resp.headers['Access-Control-Allow-Origin'] == '*'
+    resp.close()
+
+    resp = client.get('/samples/s.wav', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.data == b''
+    resp = client.get('/samples/s.wav', headers={'If-Modified-Since': last_modified})
+    assert resp.status_code == 304
+
+    # A rewritten file gets a new validator
+    sample.write_bytes(bytes(range(50)))
+    resp = client.get('/samples/s.wav', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+    resp.close()
+
+    resp = client.options('/samples/s.wav')
+    assert 'Range' in resp.headers['Access-Control-Allow-Headers']
+
+
 def test_samples_route_not_found(client, tmp_path, monkeypatch):
     real_join = move_webserver.os.path.join
     real_real = move_webserver.os.path.realpath
@@ -748,3 +801,215 @@ def test_set_inspector_post(client, monkeypatch):
 
 
 
+
+
+def test_debug_cache(client):
+    from core.cache_manager import set_cache
+    set_cache("debug_test:key", [1, 2, 3])
+    resp = client.get('/debug/cache')
+    assert resp.status_code == 200
+    stats = resp.json["namespaces"]["debug_test"]
+    assert stats["entries"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_refresh_status(client):
+    resp = client.get('/refresh/status')
+    assert resp.status_code == 200
+    assert {"requests", "dbus_calls", "coalesced", "pending"} <= set(resp.json)
+    assert client.get('/refresh/status?id=999999').status_code == 404
+
+
+def test_analysis_session_detect_and_close(client, monkeypatch, tmp_path):
+    from core import analysis_sessions, onset_cache
+    monkeypatch.setattr(analysis_sessions, "ANALYSIS_SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(onset_cache, "ONSET_CACHE_DIR", str(tmp_path / "onsets"))
+    sr = 22050
+    data = np.zeros(sr)
+    data[int(0.1 * sr):int(0.1 * sr) + 100] = 1.0
+    data[int(0.6 * sr):int(0.6 * sr) + 100] = 1.0
+    buf = io.BytesIO()
+    sf.write(buf, data, sr, format="WAV")
+    buf.seek(0)
+
+    resp = client.post('/analysis-session', data={'file': (buf, 'hits.wav')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200
+    session_id = resp.json['session_id']
+
+    resp = client.post('/detect-transients', data={'session_id': session_id, 'sensitivity': '0.2'})
+    assert resp.json['success'] is True
+    assert len(resp.json['regions']) >= 2
+
+    assert client.delete(f'/analysis-session/{session_id}').status_code == 200
+    resp = client.post('/detect-transients', data={'session_id': session_id})
+    assert resp.status_code == 404
+    assert resp.json['session_expired'] is True
+
+
+def test_slice_background_job_download(client, monkeypatch, tmp_path):
+    import time
+    from core import analysis_sessions, job_queue
+    monkeypatch.setattr(analysis_sessions, "ANALYSIS_SESSION_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setattr(job_queue, "JOB_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    bundle = tmp_path / "hits.ablpresetbundle"
+
+    def fake_handle_post(form):
+        assert form.getvalue('session_id')
+        assert 'file' not in form
+        bundle.write_bytes(b'bundle')
+        return {'success': True, 'download': True, 'bundle_path': str(bundle),
+                'message': 'Preset bundle created successfully.'}
+    monkeypatch.setattr(move_webserver.slice_handler, 'handle_post', fake_handle_post)
+
+    buf = io.BytesIO()
+    sf.write(buf, np.zeros(1000), 22050, format="WAV")
+    buf.seek(0)
+    resp = client.post('/slice', data={'action': 'slice', 'mode': 'download', 'background': '1',
+                                       'file': (buf, 'hits.wav')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200
+    job_id = resp.json['job_id']
+
+    for _ in range(500):
+        job = client.get(f'/jobs/{job_id}').json
+        if job['state'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    assert job['state'] == 'done'
+    assert job['artifact_url'] == f'/jobs/{job_id}/artifact'
+    # The upload's temporary session is closed once the kit is built
+    assert list((tmp_path / "sessions").iterdir()) == []
+
+    resp = client.get(job['artifact_url'])
+    assert resp.status_code == 200
+    assert resp.data == b'bundle'
+    resp.close()
+    # Retried and resumed downloads still find the artifact
+    resp = client.get(job['artifact_url'], headers={'Range': 'bytes=3-'})
+    assert resp.status_code == 206
+    assert resp.data == b'dle'
+    resp.close()
+    assert client.delete(f'/jobs/{job_id}').status_code == 200
+    assert client.get(job['artifact_url']).status_code == 404
+
+
+def test_drum_rack_background_job_requires_bpm(client):
+    resp = client.post('/drum-rack-inspector', data={
+        'action': 'time_stretch_sample', 'background': '1',
+        'sample_path': 'a.wav', 'preset_path': 'p.ablpreset', 'pad_number': '1',
+    })
+    assert resp.status_code == 400
+    assert resp.json['success'] is False
+
+
+def test_drum_rack_time_stretch_preview(client, monkeypatch, tmp_path):
+    import sys
+    sr = 22050
+    sample = tmp_path / "loop.wav"
+    sf.write(sample, np.random.default_rng(0).uniform(-0.5, 0.5, (2 * sr, 2)), sr)
+    handler_module = sys.modules['handlers.drum_rack_inspector_handler_class']
+    monkeypatch.setattr(handler_module, 'get_drum_cell_samples', lambda path: {
+        'success': True, 'message': '',
+        'samples': [{'pad': 3, 'path': str(sample), 'playback_start': 0.25, 'playback_length': 0.5}],
+    })
+
+    resp = client.post('/drum-rack-inspector/preview', data={
+        'sample_path': str(sample), 'preset_path': 'kit.ablpreset', 'pad_number': '3',
+        'bpm': '120', 'measures': '0.25', 'preserve_pitch': 'on', 'algorithm': 'rubberband',
+    })
+    assert resp.status_code == 200
+    assert resp.headers['Content-Type'] == 'audio/wav'
+    preview, preview_sr = sf.read(io.BytesIO(resp.data))
+    assert preview.ndim == 1
+    # One 120 BPM beat from a one-second slice
+    assert len(preview) / preview_sr == pytest.approx(0.5, abs=0.05)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["loop.wav"]
+
+    resp = client.post('/drum-rack-inspector/preview', data={
+        'sample_path': str(sample), 'preset_path': 'kit.ablpreset', 'pad_number': '3', 'bpm': 'x',
+    })
+    assert resp.status_code == 400
+
+
+def test_drum_rack_kit_stretch_job(client, monkeypatch):
+    import sys
+    import time
+    handler_module = sys.modules['handlers.drum_rack_inspector_handler_class']
+    calls = []
+
+    def fake_batch(preset_path, bpm, measures, pads=None, preserve_pitch=True, algorithm='rubberband'):
+        calls.append((preset_path, bpm, measures, pads, preserve_pitch, algorithm))
+        return {'success': True, 'message': 'Stretched 3 pads', 'stretched': {1: 'a'}, 'failed': {}}
+
+    monkeypatch.setattr(handler_module, 'batch_time_stretch', fake_batch)
+    monkeypatch.setattr(handler_module, 'get_drum_cell_samples',
+                        lambda path: {'success': True, 'message': '', 'samples': []})
+    resp = client.post('/drum-rack-inspector', data={
+        'action': 'time_stretch_kit', 'background': '1', 'preset_path': 'kit.ablpreset',
+        'bpm': '100', 'measures': '2', 'pads': '1-2, 5', 'algorithm': 'wsola',
+    })
+    assert resp.status_code == 200
+    job_id = resp.json['job_id']
+    for _ in range(500):
+        job = client.get(f'/jobs/{job_id}').json
+        if job['state'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    assert job['state'] == 'done'
+    assert job['result']['message'] == 'Stretched 3 pads'
+    assert calls == [('kit.ablpreset', 100.0, 2.0, [1, 2, 5], False, 'wsola')]
+
+
+def test_chord_background_job_download(client, monkeypatch, tmp_path):
+    import json
+    import time
+    import zipfile
+    from core import job_queue
+    monkeypatch.setattr(job_queue, "JOB_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+
+    buf = io.BytesIO()
+    sf.write(buf, np.random.default_rng(0).uniform(-0.5, 0.5, 2000), 8000, format="WAV")
+    buf.seek(0)
+    chords = [{'name': 'C', 'intervals': [0, 4, 7]}, {'name': 'Dm', 'intervals': [2, 5, 9]}]
+    resp = client.post('/chord', data={
+        'action': 'chord_kit', 'mode': 'download', 'background': '1',
+        'chords': json.dumps(chords), 'file': (buf, 'keys.wav'),
+    }, content_type='multipart/form-data')
+    assert resp.status_code == 200
+    job_id = resp.json['job_id']
+
+    for _ in range(500):
+        job = client.get(f'/jobs/{job_id}').json
+        if job['state'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    assert job['state'] == 'done', job
+    resp = client.get(job['artifact_url'])
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as zf:
+        assert sorted(zf.namelist()) == [
+            'Preset.ablpreset', 'Samples/keys_chord_C.wav', 'Samples/keys_chord_Dm.wav',
+        ]
+    resp.close()
+
+
+def test_chord_post_requires_file(client):
+    resp = client.post('/chord', data={
+        'action': 'chord_kit', 'mode': 'download', 'chords': '[]',
+    })
+    assert resp.status_code == 400
+    assert resp.json['success'] is False
+
+
+def test_html_response_compressed_when_accepted(client):
+    plain = client.get('/chord')
+    resp = client.get('/chord', headers={'Accept-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    import gzip
+    assert gzip.decompress(resp.data) == plain.data
+    assert 'Content-Encoding' not in plain.headers
+    stats = client.get('/debug/compression').json
+    assert stats['/chord']['original_bytes'] > stats['/chord']['sent_bytes']
@@ -0,0 +1,213 @@
+import http.client
+import io
+import os
+import sys
+import threading
+from pathlib import Path
+from wsgiref.simple_server import make_server
+
+import pytest
+from flask import Flask, request, send_file
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import http_server
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Serve a small app with the sendfile handler; count sendfile calls."""
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path = tmp_path / "big.wav"
+    path.write_bytes(data)
+    calls = []
+    real_sendfile = os.sendfile
+
+    def counting_sendfile(out_fd, in_fd, offset, count):
+        calls.append((offset, count))
+        return real_sendfile(out_fd, in_fd, offset, count)
+
+    monkeypatch.setattr(http_server.os, "sendfile", counting_sendfile)
+    monkeypatch.setattr(http_server, "SENDFILE_CHUNK", 1024 * 1024)
+
+    app = Flask(__name__)
+    app.add_url_rule("/file", "file", lambda: send_file(str(path)))
+    app.add_url_rule("/memory", "memory", lambda: send_file(
+        io.BytesIO(b"in memory"), mimetype="text/plain"))
+
+    httpd = make_server(
+        "127.0.0.1", 0, app,
+        server_class=http_server.ThreadingWSGIServer,
+        handler_class=http_server.SendfileRequestHandler,
+    )
+    httpd.RequestHandlerClass.log_message = lambda *a: None
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1], data, calls
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(port, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_file_response_uses_sendfile(server):
+    port, data, calls = server
+    resp, body = fetch(port, "/file")
+    assert resp.status == 200
+    assert body == data
+    assert int(resp.getheader("Content-Length")) == len(data)
+    assert sum(count for _, count in calls) == len(data)
+    assert len(calls) == 4  # sent in SENDFILE_CHUNK pieces
+
+
+def test_range_response_uses_sendfile(server):
+    port, data, calls = server
+    resp, body = fetch(port, "/file", {"Range": "bytes=2000000-2000099"})
+    assert resp.status == 206
+    assert body == data[2000000:2000100]
+    assert calls == [(2000000, 100)]
+
+
+def test_in_memory_response_falls_back(server):
+    port, _, calls = server
+    resp, body = fetch(port, "/memory")
+    assert resp.status == 200
+    assert body == b"in memory"
+    assert calls == []
+
+
+@pytest.fixture
+def keepalive_server():
+    app = Flask(__name__)
+    app.add_url_rule("/hello", "hello", lambda: "hello")
+    app.add_url_rule("/ignore-body", "ignore", lambda: "ignored", methods=["POST"])
+    app.add_url_rule("/stream", "stream", lambda: app.response_class(iter([b"a", b"b"])))
+    app.add_url_rule(
+        "/length", "length", lambda: str(len(request.get_data())), methods=["POST"]
+    )
+
+    httpd = http_server.make_http_server("127.0.0.1", 0, app, engine="keepalive")
+    httpd.RequestHandlerClass.log_message = lambda *a: None
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_keepalive_reuses_connection(keepalive_server):
+    conn = http.client.HTTPConnection("127.0.0.1", keepalive_server, timeout=10)
+    conn.request("GET", "/hello")
+    resp = conn.getresponse()
+    assert resp.version == 11
+    assert resp.read() == b"hello"
+    sock = conn.sock
+    assert sock is not None
+
+    # An unread request body is drained before the next request
+    conn.request("POST", "/ignore-body", body=b"x" * 5000)
+    assert conn.getresponse().read() == b"ignored"
+    conn.request("GET", "/hello")
+    assert conn.getresponse().read() == b"hello"
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_keepalive_pipelined_requests(keepalive_server):
+    import socket
+    with socket.create_connection(("127.0.0.1", keepalive_server), timeout=10) as sock:
+        request = b"GET /hello HTTP/1.1\r\nHost: x\r\n\r\n"
+        sock.sendall(request * 2 + b"GET /hello HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    assert data.count(b"HTTP/1.1 200 OK") == 3
+    assert data.count(b"hello") == 3
+
+
+def test_keepalive_closes_responses_without_length(keepalive_server):
+    conn = http.client.HTTPConnection("127.0.0.1", keepalive_server, timeout=10)
+    conn.request("GET", "/stream")
+    resp = conn.getresponse()
+    assert resp.getheader("Connection") == "close"
+    assert resp.read() == b"ab"
+    conn.close()
+
+
+def test_queued_connection_is_not_blocked_by_idle_ones(keepalive_server):
+    import time
+    idle = []
+    for _ in range(http_server.PooledWSGIServer.workers):
+        conn = http.client.HTTPConnection("127.0.0.1", keepalive_server, timeout=10)
+        conn.request("GET", "/hello")
+        assert conn.getresponse().read() == b"hello"
+        idle.append(conn)
+
+    started = time.monotonic()
+    conn = http.client.HTTPConnection("127.0.0.1", keepalive_server, timeout=10)
+    conn.request("GET", "/hello")
+    assert conn.getresponse().read() == b"hello"
+    assert time.monotonic() - started < http_server.HTTP_KEEPALIVE_TIMEOUT / 2
+    for c in idle + [conn]:
+        c.close()
+
+
+def test_slow_request_body_outlasts_idle_timeout(keepalive_server, monkeypatch):
+    import socket
+    import time
+    monkeypatch.setattr(http_server, "HTTP_KEEPALIVE_TIMEOUT", 0.2)
+    with socket.create_connection(("127.0.0.1", keepalive_server), timeout=10) as sock:
+        sock.sendall(b"POST /length HTTP/1.1\r\nHost: x\r\nContent-Length: 6\r\n\r\nabc")
+        time.sleep(0.5)
+        sock.sendall(b"def")
+        response = http.client.HTTPResponse(sock)
+        response.begin()
+        assert response.status == 200
+        assert response.read() == b"6"
+
+
+def test_keepalive_closes_when_file_shrinks(tmp_path):
+    import socket
+    path = tmp_path / "shrinking.wav"
+    path.write_bytes(b"x" * 1000)
+
+    def shrinking():
+        resp = send_file(str(path))
+        path.write_bytes(b"x" * 10)
+        return resp
+
+    app = Flask(__name__)
+    app.add_url_rule("/shrinking", "shrinking", shrinking)
+    httpd = http_server.make_http_server("127.0.0.1", 0, app, engine="keepalive")
+    httpd.RequestHandlerClass.log_message = lambda *a: None
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.create_connection(httpd.server_address, timeout=3) as sock:
+            sock.sendall(b"GET /shrinking HTTP/1.1\r\nHost: x\r\n\r\n")
+            data = b""
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert b"Content-Length: 1000" in data
+    assert data.endswith(b"x" * 10)
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        http_server.make_http_server("127.0.0.1", 0, Flask(__name__), engine="bogus")
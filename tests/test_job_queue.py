@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import job_queue
+
+
+@pytest.fixture
+def jobs(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_queue, "JOB_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(job_queue, "_jobs", {})
+    return tmp_path
+
+
+def _wait(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get_job(job_id)
+        if job["state"] in (job_queue.DONE, job_queue.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_reports_progress_and_result(jobs):
+    started = threading.Event()
+    release = threading.Event()
+
+    def work(value):
+        job_queue.report_progress(0.5, "Halfway")
+        started.set()
+        release.wait(5)
+        return {"success": True, "message": "Finished", "value": value}
+
+    job_id = job_queue.submit_job("test", work, 42)
+    assert started.wait(5)
+    job = job_queue.get_job(job_id)
+    assert job["state"] == job_queue.RUNNING
+    assert job["progress"] == 0.5
+    assert job["message"] == "Halfway"
+
+    release.set()
+    job = _wait(job_id)
+    assert job["state"] == job_queue.DONE
+    assert job["progress"] == 1.0
+    assert job["result"]["value"] == 42
+    assert job["message"] == "Finished"
+    assert job["artifact"] is None
+
+
+def test_failed_jobs(jobs):
+    def boom():
+        raise RuntimeError("broken")
+
+    job = _wait(job_queue.submit_job("test", boom))
+    assert job["state"] == job_queue.FAILED
+    assert job["result"] == {"success": False, "message": "broken"}
+
+    job = _wait(job_queue.submit_job("test", lambda: {"success": False, "message": "nope"}))
+    assert job["state"] == job_queue.FAILED
+    assert job["message"] == "nope"
+
+
+def test_artifact_kept_until_collected(jobs):
+    def build():
+        path = os.path.join(job_queue.artifact_dir(job_queue.current_job_id()), "kit.zip")
+        with open(path, "wb") as f:
+            f.write(b"data")
+        return {"success": True, "artifact": path}
+
+    job_id = job_queue.submit_job("test", build)
+    job = _wait(job_id)
+    assert job["artifact"] == "kit.zip"
+    assert "artifact" not in job["result"]
+
+    path = job_queue.collect_artifact(job_id)
+    assert open(path, "rb").read() == b"data"
+    assert job_queue.discard_job(job_id)
+    assert not os.path.exists(path)
+    assert job_queue.get_job(job_id) is None
+    assert job_queue.collect_artifact(job_id) is None
+
+
+def test_finished_jobs_expire(jobs):
+    job_id = job_queue.submit_job("test", lambda: {"success": True})
+    _wait(job_id)
+    assert job_queue.expire_jobs(time.time()) == 0
+    assert job_queue.expire_jobs(time.time() + job_queue.JOB_RETENTION + 1) == 1
+    assert job_queue.get_job(job_id) is None
+
+
+def test_report_progress_outside_job_is_noop():
+    job_queue.report_progress(0.5, "ignored")
+    assert job_queue.current_job_id() is None
+
+
+def test_bound_calls_report_to_the_job(jobs):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def waiting_step():
+        job_queue.report_queue_position(3)
+        return job_queue.current_job_id()
+
+    def work():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            unbound = executor.submit(waiting_step).result()
+            bound = executor.submit(job_queue.bind_current_job(waiting_step)).result()
+        return {"success": True, "unbound": unbound, "bound": bound}
+
+    job_id = job_queue.submit_job("test", work)
+    job = _wait(job_id)
+    assert job["result"]["unbound"] is None
+    assert job["result"]["bound"] == job_id
+    assert job["queue_position"] == 3
+    assert job_queue.bind_current_job(waiting_step) is waiting_step
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import library_watcher as lw
+from core import file_browser as fb
+from core import list_msets_handler as lmh
+from core.cache_manager import get_cache, set_cache, invalidate_cache
+
+
+def test_apply_changes_targets_caches(monkeypatch, tmp_path):
+    presets = tmp_path / "Track Presets"
+    sets = tmp_path / "Sets"
+    monkeypatch.setattr(lw, "TRACK_PRESETS_DIRECTORY", str(presets))
+    monkeypatch.setattr(lw, "MSETS_DIRECTORY", str(sets))
+    updated = []
+    monkeypatch.setattr(lmh, "update_msets_catalogue", updated.append)
+    invalidate_cache()
+
+    set_cache(f"file_browser:{presets}", {"dirs": [], "files": []})
+    set_cache(f"file_browser:{tmp_path / 'Samples'}", {"dirs": [], "files": []})
+    set_cache("synth_presets:drift", ["x"], tags=("presets",))
+
+    lw.apply_changes([
+        str(presets / "Lead.ablpreset"),
+        str(sets / "abc" / "My Set" / "Song.abl"),
+    ])
+
+    assert get_cache(f"file_browser:{presets}") is None
+    assert get_cache("synth_presets:drift") is None
+    assert get_cache(f"file_browser:{tmp_path / 'Samples'}") is not None
+    assert updated == [str(sets / "abc")]
+
+
+def test_poll_fallback_reports_changes(monkeypatch, tmp_path):
+    seen = []
+    monkeypatch.setattr(lw, "apply_changes", lambda paths: seen.extend(paths))
+    (tmp_path / "old.wav").write_bytes(b"1")
+    watcher = lw.LibraryWatcher([str(tmp_path)], use_inotify=False)
+    watcher._snapshot = watcher._take_snapshot()
+
+    assert watcher.poll_once() == []
+    (tmp_path / "new.wav").write_bytes(b"2")
+    os.remove(tmp_path / "old.wav")
+    changed = watcher.poll_once()
+
+    assert str(tmp_path / "new.wav") in changed
+    assert str(tmp_path / "old.wav") in changed
+    assert str(tmp_path) in changed
+    assert set(changed) <= set(seen)
+
+
+@pytest.mark.skipif(lw._load_libc() is None, reason="inotify unavailable")
+def test_inotify_watches_new_directories(monkeypatch, tmp_path):
+    seen = []
+    monkeypatch.setattr(lw, "apply_changes", lambda paths: seen.extend(paths))
+    watcher = lw.LibraryWatcher([str(tmp_path)])
+    assert watcher.start()
+    try:
+        assert watcher.mode == "inotify"
+        assert watcher.covers(str(tmp_path / "sub" / "a.wav"))
+        (tmp_path / "sub").mkdir()
+        deadline = time.monotonic() + 3
+        while str(tmp_path / "sub") not in seen and time.monotonic() < deadline:
+            time.sleep(0.05)
+        (tmp_path / "sub" / "a.wav").write_bytes(b"x")
+        target = str(tmp_path / "sub" / "a.wav")
+        while target not in seen and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert target in seen
+    finally:
+        watcher.stop()
+    assert not watcher.covers(str(tmp_path))
+
+
+def test_list_directory_trusts_watched_cache(monkeypatch, tmp_path):
+    invalidate_cache()
+    (tmp_path / "a.wav").write_text("x")
+    monkeypatch.setattr(fb.library_watcher, "is_watched", lambda p: True)
+
+    _, files = fb._list_directory(str(tmp_path), "")
+    assert files == ["a.wav"]
+
+    (tmp_path / "b.wav").write_text("y")
+    _, files = fb._list_directory(str(tmp_path), "")
+    assert files == ["a.wav"]
+
+    lw.invalidate_path(str(tmp_path / "b.wav"))
+    _, files = fb._list_directory(str(tmp_path), "")
+    assert files == ["a.wav", "b.wav"]
+
+
+def test_list_directory_skips_listing_that_raced_a_change(monkeypatch, tmp_path):
+    invalidate_cache()
+    (tmp_path / "a.wav").write_text("x")
+    monkeypatch.setattr(fb.library_watcher, "is_watched", lambda p: True)
+    real_listdir = os.listdir
+
+    def listdir_then_change(path):
+        entries = real_listdir(path)
+        # The watcher applies a change after the listing was read
+        (tmp_path / "b.wav").write_text("y")
+        lw.apply_changes([str(tmp_path / "b.wav")])
+        return entries
+
+    monkeypatch.setattr(fb.os, "listdir", listdir_then_change)
+    _, files = fb._list_directory(str(tmp_path), "")
+    assert files == ["a.wav"]
+    assert get_cache(f"file_browser:{tmp_path}") is None
+
+    monkeypatch.setattr(fb.os, "listdir", real_listdir)
+    _, files = fb._list_directory(str(tmp_path), "")
+    assert files == ["a.wav", "b.wav"]
+
+
+@pytest.mark.skipif(lw._load_libc() is None, reason="inotify unavailable")
+def test_unwatchable_directory_is_not_covered(monkeypatch, tmp_path):
+    seen = []
+    monkeypatch.setattr(lw, "apply_changes", lambda paths: seen.extend(paths))
+    watcher = lw.LibraryWatcher([str(tmp_path)])
+    assert watcher.start()
+    try:
+        monkeypatch.setattr(watcher, "_add_watch", lambda path: False)
+        (tmp_path / "sub").mkdir()
+        deadline = time.monotonic() + 3
+        while str(tmp_path / "sub") not in seen and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert str(tmp_path / "sub") in seen
+        assert not watcher.covers(str(tmp_path / "sub" / "a.wav"))
+        assert watcher.covers(str(tmp_path / "other.wav"))
+    finally:
+        watcher.stop()
+
+
+def test_apply_changes_keeps_other_sets_cached(monkeypatch, tmp_path):
+    sets = tmp_path / "Sets"
+    monkeypatch.setattr(lw, "MSETS_DIRECTORY", str(sets))
+    monkeypatch.setattr(lmh, "MSETS_DIRECTORY", str(sets))
+    invalidate_cache()
+    for uuid, name in [("uuid1", "SetA"), ("uuid2", "SetB"), ("uuid3", "SetC")]:
+        (sets / uuid / name).mkdir(parents=True)
+        (sets / uuid / name / "Song.abl").write_text("{}")
+    reads = []
+
+    def fake_read_xattrs(path):
+        reads.append(os.path.basename(path))
+        return {"user.song-index": str(len(reads))}
+
+    monkeypatch.setattr(lmh, "read_xattrs", fake_read_xattrs)
+    assert len(lmh.list_msets()) == 3
+
+    reads.clear()
+    song = sets / "uuid2" / "SetB" / "Song.abl"
+    st = song.stat()
+    os.utime(song, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    lw.apply_changes([str(song)])
+    assert len(lmh.list_msets()) == 3
+    assert reads == ["uuid2"]
@@ -1,8 +1,12 @@
+import os
+import subprocess
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import pytest
+
 from core import list_msets_handler as lmh
 
 
@@ -27,10 +31,11 @@ def test_list_msets_and_free(monkeypatch, tmp_path):
         ("uuid2", "user.song-color"): "2",
     }
 
-    def fake_get_xattr(rel, attr):
-        return mapping.get((rel, attr), "")
+    def fake_read_xattrs(path):
+        rel = os.path.basename(path)
+        return {attr: v for (r, attr), v in mapping.items() if r == rel}
 
-    monkeypatch.setattr(lmh, "get_xattr_value", fake_get_xattr)
+    monkeypatch.setattr(lmh, "read_xattrs", fake_read_xattrs)
 
     msets, ids = lmh.list_msets(return_free_ids=True)
     assert [m["mset_id"] for m in msets] == [0, 31]
@@ -38,3 +43,99 @@ def test_list_msets_and_free(monkeypatch, tmp_path):
     free = lmh.list_msets_free()
     assert 0 not in free and 31 not in free
     assert len(free) == 30
+
+
+def test_read_xattrs_native(tmp_path):
+    if not lmh.HAS_NATIVE_XATTR:
+        pytest.skip("xattr syscalls unavailable")
+    try:
+        os.setxattr(tmp_path, "user.song-index", b"7")
+        os.setxattr(tmp_path, "user.song-color", b"3")
+    except OSError:
+        pytest.skip("filesystem does not support user xattrs")
+    attrs = lmh.read_xattrs(str(tmp_path))
+    assert attrs["user.song-index"] == "7"
+    assert attrs["user.song-color"] == "3"
+
+
+def test_read_xattrs_getfattr_fallback(monkeypatch):
+    output = (
+        "# file: /sets/uuid1\n"
+        'user.song-index="4"\n'
+        'user.local-cloud-state="notSynced"\n'
+        "\n"
+    )
+    calls = []
+
+    def fake_check_output(cmd, **kwargs):
+        calls.append(cmd)
+        return output
+
+    monkeypatch.setattr(lmh, "HAS_NATIVE_XATTR", False)
+    monkeypatch.setattr(subprocess, "check_output", fake_check_output)
+    attrs = lmh.read_xattrs("/sets/uuid1")
+    assert attrs == {"user.song-index": "4", "user.local-cloud-state": "notSynced"}
+    assert len(calls) == 1 and calls[0][0] == "getfattr"
+
+
+def test_list_msets_catalogue_skips_unchanged_sets(monkeypatch, tmp_path):
+    monkeypatch.setattr(lmh, "MSETS_DIRECTORY", str(tmp_path))
+    for uuid, name, idx in [("uuid1", "SetA", "0"), ("uuid2", "SetB", "1")]:
+        (tmp_path / uuid / name).mkdir(parents=True)
+        (tmp_path / uuid / name / "Song.abl").write_text("{}")
+
+    reads = []
+
+    def fake_read_xattrs(path):
+        reads.append(os.path.basename(path))
+        return {"user.song-index": "0" if path.endswith("uuid1") else "1"}
+
+    monkeypatch.setattr(lmh, "read_xattrs", fake_read_xattrs)
+
+    assert [m["mset_id"] for m in lmh.list_msets()] == [0, 1]
+    assert sorted(reads) == ["uuid1", "uuid2"]
+
+    reads.clear()
+    assert [m["mset_id"] for m in lmh.list_msets()] == [0, 1]
+    assert reads == []
+
+    # Rewriting Song.abl revalidates only that set
+    song = tmp_path / "uuid2" / "SetB" / "Song.abl"
+    st = song.stat()
+    os.utime(song, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    lmh.list_msets()
+    assert reads == ["uuid2"]
+
+    # Writers update the catalogue themselves
+    reads.clear()
+    before = lmh.msets_root_mtime()
+    (tmp_path / "uuid3" / "SetC").mkdir(parents=True)
+    lmh.update_msets_catalogue(str(tmp_path / "uuid3"), before)
+    assert reads == ["uuid3"]
+    assert lmh.get_cache(lmh._catalogue_key())["root_mtime"] == lmh.msets_root_mtime()
+    reads.clear()
+    assert len(lmh.list_msets()) == 3
+    assert reads == []
+
+
+def _bump_mtime(path, ns):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + ns))
+
+
+def test_update_msets_catalogue_keeps_foreign_changes(monkeypatch, tmp_path):
+    monkeypatch.setattr(lmh, "MSETS_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(lmh, "read_xattrs", lambda path: {"user.song-index": "0"})
+    (tmp_path / "uuid1" / "SetA").mkdir(parents=True)
+    lmh.list_msets()
+
+    # Another writer adds a set the catalogue has not seen yet
+    (tmp_path / "uuid2" / "SetB").mkdir(parents=True)
+    _bump_mtime(tmp_path, 1_000_000)
+    before = lmh.msets_root_mtime()
+    (tmp_path / "uuid3" / "SetC").mkdir(parents=True)
+    _bump_mtime(tmp_path, 1_000_000)
+    lmh.update_msets_catalogue(str(tmp_path / "uuid3"), before)
+
+    assert lmh.get_cache(lmh._catalogue_key())["root_mtime"] is None
+    assert {m["uuid"] for m in lmh.list_msets()} == {"uuid1", "uuid2", "uuid3"}
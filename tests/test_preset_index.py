@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import preset_index as pi
+
+
+def _use_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(pi, "PRESET_INDEX_PATH", str(tmp_path / "index.json"))
+    pi.reset_index()
+
+
+def test_scan_records_kinds_and_flags(monkeypatch, tmp_path):
+    _use_index(monkeypatch, tmp_path)
+    presets = tmp_path / "presets"
+    presets.mkdir()
+    (presets / "Kit.ablpreset").write_text(json.dumps(
+        {"kind": "instrumentRack", "chains": [{"devices": [{"kind": "drumRack"}]}]}
+    ))
+    (presets / "Lead.ablpreset").write_text(json.dumps({"kind": "drift"}))
+    (presets / "Broken.ablpreset").write_text("{bad")
+
+    found = dict(pi.scan_presets(str(presets)))
+    kit = found[str(presets / "Kit.ablpreset")]
+    assert kit["kinds"] == ["instrumentRack", "drumRack"]
+    assert kit["drum"] and not kit["synth"]
+    assert found[str(presets / "Lead.ablpreset")]["synth"]
+    assert str(presets / "Broken.ablpreset") not in found
+
+    saved = json.loads((tmp_path / "index.json").read_text())
+    assert str(presets / "Kit.ablpreset") in saved["presets"]
+
+
+def test_scan_only_rereads_changed_files(monkeypatch, tmp_path):
+    _use_index(monkeypatch, tmp_path)
+    presets = tmp_path / "presets"
+    presets.mkdir()
+    a = presets / "A.ablpreset"
+    b = presets / "B.ablpreset"
+    a.write_text(json.dumps({"kind": "drift"}))
+    b.write_text(json.dumps({"kind": "wavetable"}))
+    pi.scan_presets(str(presets))
+
+    # Reload from disk to make sure the persisted index is used
+    pi.reset_index()
+    parsed = []
+    real_build = pi._build_entry
+    def tracking_build(path, st):
+        parsed.append(os.path.basename(path))
+        return real_build(path, st)
+    monkeypatch.setattr(pi, "_build_entry", tracking_build)
+
+    pi.scan_presets(str(presets))
+    assert parsed == []
+
+    b.write_text(json.dumps({"kind": "melodicSampler", "x": 1}))
+    found = dict(pi.scan_presets(str(presets)))
+    assert parsed == ["B.ablpreset"]
+    assert found[str(b)]["kinds"] == ["melodicSampler"]
+
+
+def test_scan_drops_deleted_files(monkeypatch, tmp_path):
+    _use_index(monkeypatch, tmp_path)
+    presets = tmp_path / "presets"
+    presets.mkdir()
+    p = presets / "Gone.ablpreset"
+    p.write_text(json.dumps({"kind": "drift"}))
+    pi.scan_presets(str(presets))
+    p.unlink()
+    assert pi.scan_presets(str(presets)) == []
+    saved = json.loads((tmp_path / "index.json").read_text())
+    assert saved["presets"] == {}
+
+
+def test_has_kind_missing_file(monkeypatch, tmp_path):
+    _use_index(monkeypatch, tmp_path)
+    assert pi.has_kind(str(tmp_path / "missing.json"), "drift") is False
+
+
+def test_classify_presets_groups_by_kind(monkeypatch, tmp_path):
+    _use_index(monkeypatch, tmp_path)
+    presets = tmp_path / "presets"
+    presets.mkdir()
+    (presets / "Kit.ablpreset").write_text(json.dumps(
+        {"kind": "drumRack", "chains": [{"devices": [{"kind": "drumCell"}]}]}
+    ))
+    (presets / "Lead.ablpreset").write_text(json.dumps({"kind": "wavetable"}))
+    store = {}
+    monkeypatch.setattr(pi, "get_cache", store.get)
+    monkeypatch.setattr(pi, "set_cache", store.__setitem__)
+
+    table = pi.classify_presets(str(presets))
+    assert [p for p, _ in table["drumRack"]] == [str(presets / "Kit.ablpreset")]
+    assert [p for p, _ in table["drumCell"]] == [str(presets / "Kit.ablpreset")]
+    assert [p for p, _ in table["wavetable"]] == [str(presets / "Lead.ablpreset")]
+    assert table["drift"] == []
+
+    # Subsequent lookups reuse the cached table without walking again
+    monkeypatch.setattr(pi, "scan_presets", lambda *a, **k: 1 / 0)
+    assert pi.classify_presets(str(presets)) is table
+
+
+def test_watched_entries_skip_stat_until_forgotten(monkeypatch, tmp_path):
+    _use_index(monkeypatch, tmp_path)
+    monkeypatch.setattr(pi.library_watcher, "is_watched", lambda p: True)
+    preset = tmp_path / "Lead.ablpreset"
+    preset.write_text(json.dumps({"kind": "drift"}))
+    assert pi.has_kind(str(preset), "drift")
+
+    preset.write_text(json.dumps({"kind": "wavetable", "pad": "xxxxxxxx"}))
+    assert pi.has_kind(str(preset), "drift")
+
+    pi.forget(str(tmp_path))
+    assert pi.has_kind(str(preset), "wavetable")
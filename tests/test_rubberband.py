@@ -0,0 +1,90 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core import rubberband
+
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    """Point the backend at a script that copies input to output."""
+    log = tmp_path / "args.log"
+    script = tmp_path / "rubberband"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"echo \"$@\" >> {log}\n"
+        "for last; do :; done\n"
+        "eval in=\\${$(($#-1))}\n"
+        "cp \"$in\" \"$last\"\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr(rubberband, "RUBBERBAND_BINARY", str(script))
+    return log
+
+
+def test_time_stretch_passes_tempo_and_cleans_up(stand_in):
+    y = np.linspace(-0.5, 0.5, 1000, dtype=np.float32)
+    out = rubberband.time_stretch(y, 22050, 1.5)
+    assert out.shape == y.shape
+    assert out.dtype == y.dtype
+    np.testing.assert_allclose(out, y)
+    args = stand_in.read_text().split()
+    assert args[:3] == ["-q", "--tempo", "1.5"]
+    assert os.path.dirname(args[3]) == rubberband.scratch_dir()
+    assert os.listdir(rubberband.scratch_dir()) == []
+
+
+def test_pitch_shift_keeps_channels(stand_in):
+    y = np.zeros((500, 2), dtype=np.float64)
+    y[:, 1] = 0.25
+    out = rubberband.pitch_shift(y, 44100, -3)
+    assert out.shape == (500, 2)
+    np.testing.assert_allclose(out, y)
+    assert stand_in.read_text().split()[:3] == ["-q", "--pitch", "-3"]
+
+
+def test_noop_and_invalid_rate_skip_binary(stand_in):
+    y = np.ones(10, dtype=np.float32)
+    assert rubberband.time_stretch(y, 22050, 1.0) is y
+    assert rubberband.pitch_shift(y, 22050, 0) is y
+    with pytest.raises(ValueError):
+        rubberband.time_stretch(y, 22050, 0)
+    assert not stand_in.exists()
+
+
+def test_failure_raises_runtime_error(tmp_path, monkeypatch):
+    script = tmp_path / "rubberband"
+    script.write_text("#!/bin/sh\necho 'bad option' >&2\nexit 1\n")
+    script.chmod(0o755)
+    monkeypatch.setattr(rubberband, "RUBBERBAND_BINARY", str(script))
+    with pytest.raises(RuntimeError, match="bad option"):
+        rubberband.time_stretch(np.ones(10, dtype=np.float32), 22050, 2.0)
+    assert os.listdir(rubberband.scratch_dir()) == []
+
+    monkeypatch.setattr(rubberband, "RUBBERBAND_BINARY", str(tmp_path / "missing"))
+    with pytest.raises(RuntimeError, match="Failed to execute"):
+        rubberband.time_stretch(np.ones(10, dtype=np.float32), 22050, 2.0)
+
+
+def test_stale_scratch_dirs_are_removed(tmp_path, monkeypatch):
+    import subprocess
+    exited = subprocess.Popen(["true"])
+    exited.wait()
+    stale = tmp_path / f"rubberband-{exited.pid}"
+    stale.mkdir()
+    (stale / "0-in.wav").write_bytes(b"x")
+    live = tmp_path / f"rubberband-{os.getppid()}"
+    live.mkdir()
+    monkeypatch.setattr(rubberband, "SCRATCH_ROOTS", (str(tmp_path),))
+    monkeypatch.setattr(rubberband, "_scratch", None)
+
+    path = rubberband.scratch_dir()
+    assert path == str(tmp_path / f"rubberband-{os.getpid()}")
+    assert not stale.exists()
+    assert live.exists()
+    rubberband._remove_scratch(path)
@@ -6,6 +6,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from core import synth_preset_inspector_handler as spih
+from core import preset_index as pi
 
 
 def create_basic_preset(path, custom_name="Old", vol=0.5):
@@ -98,6 +99,7 @@ def test_scan_for_synth_presets(monkeypatch, tmp_path):
     monkeypatch.setattr(spih.os.path, "exists", fake_exists)
     monkeypatch.setattr(spih.os, "walk", fake_walk)
     monkeypatch.setattr(spih, "get_cache", lambda k: None)
+    monkeypatch.setattr(pi, "get_cache", lambda k: None)
     captured = {}
     monkeypatch.setattr(spih, "set_cache", lambda k, v: captured.setdefault("data", v))
 
@@ -109,3 +111,21 @@ def test_scan_for_synth_presets(monkeypatch, tmp_path):
     monkeypatch.setattr(spih, "get_cache", lambda k: captured["data"])
     result_cached = spih.scan_for_synth_presets()
     assert "cached" in result_cached["message"]
+
+
+def test_scan_for_synth_presets_keys_by_device_type(monkeypatch):
+    table = {
+        "drift": [("/p/Drift.ablpreset", {"kinds": ["drift"]})],
+        "wavetable": [("/p/Wave.ablpreset", {"kinds": ["wavetable"]})],
+    }
+    store = {}
+    monkeypatch.setattr(spih, "get_cache", store.get)
+    monkeypatch.setattr(spih, "set_cache", store.__setitem__)
+    monkeypatch.setattr(spih, "classify_presets", lambda d: table)
+
+    drift = spih.scan_for_synth_presets(("drift",))
+    wave = spih.scan_for_synth_presets(("wavetable",))
+    assert [p["name"] for p in drift["presets"]] == ["Drift"]
+    assert [p["name"] for p in wave["presets"]] == ["Wave"]
+    assert wave["presets"][0]["type"] == "wavetable"
+    assert "cached" in spih.scan_for_synth_presets(("drift",))["message"]
@@ -20,8 +20,10 @@ def client():
     return move_webserver.app.test_client()
 
 
-def test_restart_only(client, monkeypatch):
+def test_restart_only(client, monkeypatch, tmp_path):
     popen_called = {}
+    # The restart is logged to last-update.log; keep it out of the tree
+    monkeypatch.setattr(updater, "ROOT_DIR", tmp_path)
 
     class DummyPopen:
         def __init__(self, *a, **k):
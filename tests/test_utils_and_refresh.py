@@ -59,3 +59,70 @@ def test_refresh_library_failure(monkeypatch):
     assert not success
     assert 'Failed to refresh library' in msg
 
+
+
+def test_refresh_library_targeted(monkeypatch):
+    calls = []
+    monkeypatch.setattr('subprocess.check_output', lambda cmd, stderr=None: b'')
+    monkeypatch.setattr('core.refresh_handler.invalidate_cache', lambda: calls.append('all'))
+    monkeypatch.setattr('core.refresh_handler.invalidate_path', lambda p: calls.append(('path', p)))
+    monkeypatch.setattr('core.refresh_handler.invalidate_tag', lambda t: calls.append(('tag', t)))
+    success, _ = refresh_library(paths=['/lib/Samples'], tags=['presets'])
+    assert success
+    assert calls == [('path', '/lib/Samples'), ('tag', 'presets')]
+
+
+def test_refresh_requests_are_coalesced(monkeypatch, tmp_path):
+    from core import refresh_handler as rh
+    log = tmp_path / "calls.log"
+    stand_in = tmp_path / "dbus-send"
+    stand_in.write_text(f"#!/bin/sh\necho \"$@\" >> {log}\n")
+    stand_in.chmod(0o755)
+    monkeypatch.setattr(rh, "DBUS_SEND", str(stand_in))
+    monkeypatch.setattr(rh, "LIBRARY_REFRESH_WINDOW", 0.2)
+    monkeypatch.setattr(rh, "invalidate_path", lambda p: None)
+
+    before = rh.get_refresh_status()
+    futures = [rh.schedule_refresh(paths=[f"/lib/{i}"]) for i in range(5)]
+    assert all(f is futures[0] for f in futures)
+    queued = rh.refresh_library(paths=["/lib/x"], wait=False)
+    assert queued is futures[0]
+    assert rh.get_refresh_status(queued.refresh_id)["state"] == "pending"
+
+    assert futures[0].result(timeout=5) == (True, "Library refreshed successfully.")
+    assert rh.get_refresh_status(queued.refresh_id)["success"] is True
+    assert log.read_text().count("refreshCache") == 1
+    status = rh.get_refresh_status()
+    assert status["dbus_calls"] == before["dbus_calls"] + 1
+    assert status["coalesced"] == before["coalesced"] + 5
+    assert not status["pending"]
+
+    success, _ = refresh_library(paths=["/lib/y"])
+    assert success
+    assert log.read_text().count("refreshCache") == 2
+
+
+def test_refresh_summary_surfaces_failures(monkeypatch, tmp_path):
+    from core import refresh_handler as rh
+    stand_in = tmp_path / "dbus-send"
+    stand_in.write_text("#!/bin/sh\necho 'no bus' >&2\nexit 1\n")
+    stand_in.chmod(0o755)
+    monkeypatch.setattr(rh, "DBUS_SEND", str(stand_in))
+    monkeypatch.setattr(rh, "LIBRARY_REFRESH_WINDOW", 0.2)
+    monkeypatch.setattr(rh, "invalidate_path", lambda p: None)
+    monkeypatch.setitem(rh._status, "last_success", None)
+
+    failed = rh.refresh_library(paths=["/lib/a"], wait=False)
+    success, message = rh.refresh_summary(failed)
+    assert success and str(failed.refresh_id) in message
+    assert failed.result(timeout=5)[0] is False
+    assert rh.refresh_summary(failed) == failed.result()
+    status = rh.get_refresh_status(failed.refresh_id)
+    assert status["state"] == "done" and status["success"] is False
+
+    # The next queued refresh reports the previous failure
+    queued = rh.refresh_library(paths=["/lib/b"], wait=False)
+    success, message = rh.refresh_summary(queued)
+    assert not success and "no bus" in message
+    queued.result(timeout=5)
+    assert rh.get_refresh_status(10 ** 9) is None
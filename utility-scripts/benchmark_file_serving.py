@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark file downloads through the webserver's WSGI stack.
+
+Serves test files with Flask's ``send_file`` through two servers:
+
+* ``wsgiref``  - the standard request handler, copying through Python
+* ``sendfile`` - :class:`core.http_server.SendfileRequestHandler`
+
+For each file size it downloads the whole file, and a 1 MB range from the
+middle, ``--repeat`` times and reports throughput and the CPU time used
+by this process (server and client together).  Files are written to a
+temporary directory; pass ``--sizes`` to change their sizes in MB.
+"""
+
+import argparse
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from flask import Flask, send_from_directory
+
+from core.http_server import SendfileRequestHandler, ThreadingWSGIServer
+
+ENGINES = {
+    "wsgiref": WSGIRequestHandler,
+    "sendfile": SendfileRequestHandler,
+}
+READ_SIZE = 1024 * 1024
+
+
+def make_file(path: str, size_mb: int) -> None:
+    block = os.urandom(READ_SIZE)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def start_server(handler_class, directory):
+    app = Flask(__name__)
+    app.add_url_rule(
+        "/files/<path:name>", "files",
+        lambda name: send_from_directory(directory, name),
+    )
+    handler_class.log_message = lambda *args: None
+    httpd = make_server("127.0.0.1", 0, app, server_class=ThreadingWSGIServer,
+                        handler_class=handler_class)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def download(port: int, name: str, headers=None) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", f"/files/{name}", headers=headers or {})
+    resp = conn.getresponse()
+    received = 0
+    while True:
+        chunk = resp.read(READ_SIZE)
+        if not chunk:
+            break
+        received += len(chunk)
+    conn.close()
+    return received
+
+
+def measure(port, name, repeat, headers=None):
+    download(port, name, headers)  # warm-up (page cache, imports)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    total = 0
+    for _ in range(repeat):
+        total += download(port, name, headers)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    return total / wall / (1024 * 1024), cpu / repeat * 1000, wall / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200], help="file sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="timed downloads per case")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        servers = {name: start_server(cls, tmp) for name, cls in ENGINES.items()}
+        try:
+            for size in args.sizes:
+                name = f"sample_{size}mb.wav"
+                make_file(os.path.join(tmp, name), size)
+                middle = size * READ_SIZE // 2
+                cases = {
+                    "full": None,
+                    "1 MB range": {"Range": f"bytes={middle}-{middle + READ_SIZE - 1}"},
+                }
+                print(f"\n{size} MB file")
+                for case, headers in cases.items():
+                    for engine, httpd in servers.items():
+                        rate, cpu_ms, wall_ms = measure(httpd.server_address[1], name, args.repeat, headers)
+                        print(f"  {case:<11} {engine:<9} {rate:8.1f} MB/s  "
+                              f"{wall_ms:8.1f} ms  cpu {cpu_ms:8.1f} ms")
+                os.remove(os.path.join(tmp, name))
+        finally:
+            for httpd in servers.values():
+                httpd.shutdown()
+                httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Benchmark full page loads against the webserver's server engines.
+
+Starts the real Flask app under every engine in
+:data:`core.http_server.ENGINES`, then loads each page like a browser
+would: the HTML first, then its same-host scripts, stylesheets and images
+over up to ``--connections`` parallel connections.  For each engine and
+page it reports the number of requests, the TCP connections opened and
+the mean load time.
+
+``--rtt`` adds a delay to every new connection to mimic the TCP handshake
+on a slow Wi-Fi link.  Pages that need files from the Move are rendered
+from whatever the local tree provides, so run it on the device for
+representative page sizes.
+"""
+
+import argparse
+import http.client
+import importlib.util
+import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, Queue
+from urllib.parse import urlsplit
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.http_server import ENGINES, make_http_server
+
+PAGES = ("/synth-params", "/wavetable-params", "/melodic-sampler", "/drum-rack-inspector", "/slice")
+ASSET_RE = re.compile(r'(?:src|href)="([^"]+\.(?:js|css|svg|png|ico))"')
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location("move_webserver", ROOT_DIR / "move-webserver.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logging.getLogger().setLevel(logging.WARNING)
+    return module.app
+
+
+class CountingConnection(http.client.HTTPConnection):
+    """HTTP connection that counts (and optionally delays) new sockets."""
+
+    opened = 0
+    rtt = 0.0
+    _lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            CountingConnection.opened += 1
+        time.sleep(self.rtt)
+        super().connect()
+
+
+def get(conn, path):
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = resp.read()
+    if resp.status >= 400:
+        raise RuntimeError(f"GET {path} returned {resp.status}")
+    return body
+
+
+def same_host_assets(html):
+    assets = []
+    for url in ASSET_RE.findall(html):
+        parts = urlsplit(url)
+        if parts.netloc and parts.hostname not in ("localhost", "127.0.0.1"):
+            continue
+        if parts.path not in assets:
+            assets.append(parts.path)
+    return assets
+
+
+def load_page(port, page, connections):
+    """Load ``page`` and its assets; return ``(requests, seconds)``."""
+    start = time.perf_counter()
+    main = CountingConnection("127.0.0.1", port)
+    html = get(main, page).decode("utf-8", "replace")
+    queue = Queue()
+    for asset in same_host_assets(html):
+        queue.put(asset)
+    requests = 1 + queue.qsize()
+
+    def worker(conn):
+        while True:
+            try:
+                path = queue.get_nowait()
+            except Empty:
+                break
+            get(conn, path)
+        conn.close()
+
+    # The HTML's connection is reused for assets, as in a browser.
+    conns = [main] + [CountingConnection("127.0.0.1", port) for _ in range(connections - 1)]
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        list(pool.map(worker, conns))
+    return requests, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="*", default=list(PAGES), help="page paths to load")
+    parser.add_argument("--repeat", type=int, default=5, help="timed loads per page")
+    parser.add_argument("--connections", type=int, default=6, help="parallel connections per page load")
+    parser.add_argument("--rtt", type=float, default=0.0, help="simulated handshake delay in ms")
+    args = parser.parse_args()
+    CountingConnection.rtt = args.rtt / 1000.0
+
+    app = load_app()
+    for engine in ENGINES:
+        httpd = make_http_server("127.0.0.1", 0, app, engine=engine)
+        httpd.RequestHandlerClass.log_message = lambda *a: None
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        port = httpd.server_address[1]
+        print(f"\n{engine}")
+        try:
+            for page in args.pages:
+                load_page(port, page, args.connections)  # warm-up (templates, caches)
+                CountingConnection.opened = 0
+                total = 0.0
+                for _ in range(args.repeat):
+                    requests, elapsed = load_page(port, page, args.connections)
+                    total += elapsed
+                print(f"  {page:<22} {requests:3d} requests  "
+                      f"{CountingConnection.opened / args.repeat:5.1f} connections  "
+                      f"{total / args.repeat * 1000:8.1f} ms")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
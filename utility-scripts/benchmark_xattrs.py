@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark extended attribute reads used by ``list_msets``.
+
+Creates a synthetic Sets directory with one UUID folder per pad, tags each
+folder with the same ``user.*`` attributes Move writes, and times:
+
+* the legacy path: one ``getfattr`` subprocess per attribute (5 per set)
+* the batched ``getfattr`` fallback: one subprocess per set
+* the native ``os.listxattr``/``os.getxattr`` reader
+
+Run on the device with ``python3 utility-scripts/benchmark_xattrs.py``.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core import list_msets_handler as lmh
+
+ATTRS = {
+    "user.song-index": None,
+    "user.song-color": "5",
+    "user.local-cloud-state": "notSynced",
+    "user.last-modified-time": "2025-01-01T00:00:00Z",
+    "user.was-externally-modified": "false",
+}
+
+
+def create_sets(base_dir: str, count: int) -> list[str]:
+    """Create ``count`` set folders carrying Move's xattrs."""
+    paths = []
+    for idx in range(count):
+        set_dir = os.path.join(base_dir, str(uuid.uuid4()))
+        os.makedirs(os.path.join(set_dir, f"Set {idx}"))
+        for name, value in ATTRS.items():
+            value = str(idx) if value is None else value
+            os.setxattr(set_dir, name, value.encode())
+        paths.append(set_dir)
+    return paths
+
+
+def legacy_read(path: str) -> dict:
+    """Mimic the old per-attribute ``getfattr`` calls."""
+    attrs = {}
+    for name in ATTRS:
+        try:
+            attrs[name] = subprocess.check_output(
+                ["getfattr", "--only-values", "-n", name, path],
+                encoding="utf-8",
+                stderr=subprocess.DEVNULL,
+            ).strip()
+        except subprocess.CalledProcessError:
+            attrs[name] = "Unknown"
+    return attrs
+
+
+def time_reader(label: str, reader, paths: list[str], repeat: int) -> None:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            reader(path)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<28} {elapsed * 1000:9.2f} ms per listing "
+          f"({elapsed / len(paths) * 1e6:8.1f} us per set)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sets", type=int, default=32, help="number of set folders")
+    parser.add_argument("--repeat", type=int, default=5, help="timed iterations")
+    parser.add_argument("--dir", help="parent directory for the synthetic Sets tree")
+    args = parser.parse_args()
+
+    if not lmh.HAS_NATIVE_XATTR:
+        sys.exit("os.setxattr is unavailable on this platform")
+
+    base_dir = tempfile.mkdtemp(prefix="msets-bench-", dir=args.dir)
+    try:
+        try:
+            paths = create_sets(base_dir, args.sets)
+        except OSError as e:
+            sys.exit(f"Filesystem at {base_dir} does not support user xattrs: {e}")
+
+        print(f"{args.sets} sets, {args.repeat} iterations")
+        time_reader("native os.getxattr", lmh._read_xattrs_native, paths, args.repeat)
+        if shutil.which("getfattr"):
+            time_reader("getfattr, 1 call per set", lmh._read_xattrs_getfattr, paths, args.repeat)
+            time_reader("getfattr, 1 call per attr", legacy_read, paths, args.repeat)
+        else:
+            print("getfattr not found; skipping subprocess paths")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()